@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+批量生成：多个文档排队，共用一个进程池编码，各自导出到单独的目录
+
+- 同时处理的文档数有上限（max_jobs），正在处理的文档的输入总大小也有上限（max_input），
+  超出时后面的文档排队等待；单个文档超过上限时在没有其他文档处理时单独处理
+- 各文档的编码任务提交到同一个进程池，每个文档同时提交的段数有上限（qr_core.MAX_PENDING），
+  导出逐个消费矩阵，内存占用与文档数量无关
+- 每个文档导出到 输出目录/文件名（不含扩展名）/二维码_{i}_{n}.png，
+  ZIP/PDF 格式为 输出目录/文件名.zip（.pdf）；重名时加序号
+
+图形界面和命令行（cli.py batch）共用这里的 BatchQueue，不依赖Tkinter。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import binary_payload
+import compression
+import exporter
+import file_source
+import qr_core
+import qr_verify
+
+DEFAULT_MAX_JOBS = 2  # 同时处理的文档数
+DEFAULT_MAX_INPUT_MB = 256  # 正在处理的文档输入总大小上限（分割后的文本段约为输入的数倍）
+
+# 任务状态
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_LABELS = {
+    STATUS_PENDING: "等待",
+    STATUS_RUNNING: "处理中",
+    STATUS_DONE: "完成",
+    STATUS_FAILED: "失败",
+    STATUS_CANCELLED: "已取消",
+}
+FINISHED = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class BatchOptions:
+    """批量任务中所有文档共用的生成和导出参数（含义与命令行 encode 的同名参数相同）"""
+
+    def __init__(self, fmt=exporter.FORMAT_PNG, max_chars=qr_core.DEFAULT_MAX_CHARS, version=None,
+                 policy=qr_core.DEFAULT_POLICY, compress=None, stable=False, binary=False, encoding=None,
+                 box_size=qr_core.BOX_SIZE, grid=exporter.DEFAULT_GRID, overwrite=False, verify=None):
+        self.fmt = fmt
+        self.max_chars = max_chars
+        self.version = version or policy.version  # 按该版本的容量分割
+        self.policy = policy
+        self.compress = compress
+        self.stable = stable
+        self.binary = binary  # 所有文件都按二进制帧编码（否则只有识别为二进制的文件）
+        self.encoding = encoding  # None为自动识别
+        self.box_size = box_size
+        self.grid = grid
+        self.overwrite = overwrite
+        self.verify = verify  # 导出的同时回环校验：None不校验，或 qr_verify.VERIFY_MATRIX/VERIFY_IMAGE
+
+
+class BatchJob:
+    """批量任务中的一个文档"""
+
+    def __init__(self, path, output):
+        self.path = path
+        self.output = output  # 输出目录（png/sheet）或文件（zip/pdf）
+        self.size = os.path.getsize(path)
+        self.status = STATUS_PENDING
+        self.done = 0  # 已导出的二维码数
+        self.total = 0  # 二维码总数（分割后才知道）
+        self.summary = None  # exporter 的导出统计
+        self.report = None  # 回环校验报告（启用时）
+        self.error = None
+        self.start = None
+        self.elapsed = 0.0
+        self.cancel_event = threading.Event()
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def describe(self):
+        """状态说明，如“处理中 120/300”“完成 300 个，12.3s”"""
+        label = STATUS_LABELS[self.status]
+        if self.status == STATUS_RUNNING:
+            return f"{label} {self.done}/{self.total}" if self.total else f"{label}（分割中）"
+        if self.status == STATUS_FAILED:
+            return f"{label}: {self.error}"
+        if self.status in (STATUS_DONE, STATUS_CANCELLED) and self.summary is not None:
+            text = f"{label} {self.summary['saved'] + self.summary['skipped']}/{self.total} 个，{self.elapsed:.1f}s"
+            if self.report is not None:
+                text += "，校验通过" if self.report["match"] else "，校验失败"
+            return text
+        return label
+
+
+def _output_name(path, fmt, used):
+    """不与已有任务重名的输出名称"""
+    stem = os.path.splitext(os.path.basename(path))[0] or "二维码"
+    suffix = {exporter.FORMAT_ZIP: ".zip", exporter.FORMAT_PDF: ".pdf"}.get(fmt, "")
+    name = stem + suffix
+    n = 2
+    while name in used:
+        name = f"{stem}_{n}{suffix}"
+        n += 1
+    used.add(name)
+    return name
+
+
+def expand_paths(paths):
+    """展开输入：文件原样保留，目录取其中的文件（不递归，按名称排序，跳过隐藏文件）"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if not name.startswith(".") and os.path.isfile(full):
+                    result.append(full)
+        else:
+            result.append(path)
+    return result
+
+
+class BatchQueue:
+    """批量任务队列和调度器（线程安全，状态可在任意线程中读取）
+
+    用法::
+
+        batch = BatchQueue("output", BatchOptions(fmt="zip"))
+        batch.add_paths(["docs/"])
+        batch.start()
+        batch.wait()
+        print(format_totals(batch.totals()))
+
+    executor: 可传入已有的进程池（如图形界面的编码进程池），此时不再另建，也不负责关闭
+    on_update: 可选回调 on_update(job)，任务状态或进度变化时在工作线程中调用
+    """
+
+    def __init__(self, output_root, options=None, workers=None, max_jobs=DEFAULT_MAX_JOBS,
+                 max_input=DEFAULT_MAX_INPUT_MB * 1024 * 1024, executor=None, cache=None, on_update=None):
+        self.output_root = output_root
+        self.options = options or BatchOptions()
+        self.workers = workers
+        self.max_jobs = max(1, max_jobs)
+        self.max_input = max_input
+        self.executor = executor
+        self.own_executor = False
+        self.cache = cache  # 可选的 qr_cache.MatrixCache
+        self.on_update = on_update
+        self.jobs = []
+        self.started = False
+        self.cancelled = False
+        self.start_time = None
+        self.end_time = None
+        self._names = set()
+        self._condition = threading.Condition()
+
+    def add(self, path):
+        """加入一个文档，返回 BatchJob；开始后加入的文档同样会被处理"""
+        with self._condition:
+            output = os.path.join(self.output_root, _output_name(path, self.options.fmt, self._names))
+            job = BatchJob(path, output)
+            self.jobs.append(job)
+            if self.started:
+                self._dispatch()
+        return job
+
+    def add_paths(self, paths):
+        """加入多个文件或目录，返回新加入的任务列表"""
+        return [self.add(path) for path in expand_paths(paths)]
+
+    def start(self):
+        """开始处理（不阻塞）"""
+        with self._condition:
+            if self.started:
+                return
+            if self.executor is None:
+                workers = self.workers or os.cpu_count() or 1
+                self.executor = ProcessPoolExecutor(max_workers=workers)
+                self.own_executor = True
+            os.makedirs(self.output_root, exist_ok=True)
+            self.started = True
+            self.start_time = time.perf_counter()
+            self._dispatch()
+
+    def _running(self):
+        return [job for job in self.jobs if job.status == STATUS_RUNNING]
+
+    def _dispatch(self):
+        """在不超过并发数和输入大小上限的前提下启动等待中的任务（调用时持有锁）"""
+        running = self._running()
+        used = sum(job.size for job in running)
+        for job in self.jobs:
+            if self.cancelled or len(running) >= self.max_jobs:
+                break
+            if job.status != STATUS_PENDING:
+                continue
+            if running and used + job.size > self.max_input:
+                break  # 按顺序处理，不让小文档一直插队到大文档前面
+            job.status = STATUS_RUNNING
+            job.start = time.perf_counter()
+            running.append(job)
+            used += job.size
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        if not running:
+            self.end_time = time.perf_counter()
+            self._condition.notify_all()
+
+    def _notify(self, job):
+        if self.on_update is not None:
+            self.on_update(job)
+
+    def _run(self, job):
+        self._notify(job)
+        try:
+            self._process(job)
+            if job.status == STATUS_RUNNING:
+                job.status = STATUS_CANCELLED if job.summary["cancelled"] else STATUS_DONE
+        except Exception as e:
+            job.status = STATUS_FAILED
+            job.error = str(e)
+        job.elapsed = time.perf_counter() - job.start
+        self._notify(job)
+        with self._condition:
+            self._dispatch()
+
+    def _process(self, job):
+        """分割、编码并导出一个文档"""
+        options = self.options
+        source = file_source.FileSource(job.path, options.encoding)
+        error_correction = options.policy.error_correction
+        if options.binary or source.binary:
+            segments = binary_payload.split_file(job.path, options.max_chars, options.version, error_correction)
+            kind = qr_verify.KIND_BINARY
+        elif options.compress:
+            segments = compression.build_segments(source.iter_chunks(), options.compress, options.max_chars,
+                                                  options.version, error_correction)
+            kind = qr_verify.KIND_COMPRESSED
+        else:
+            segments = list(qr_core.iter_segments(source.iter_chunks(), options.max_chars, options.version,
+                                                  stable=options.stable, error_correction=error_correction))
+            kind = qr_verify.KIND_TEXT
+        if not segments:
+            raise ValueError("文件内容为空")
+        job.total = len(segments)
+        self._notify(job)
+
+        def progress(done, total):
+            job.done = done
+            self._notify(job)
+
+        encoded = qr_core.iter_qr_matrices(segments, cache=self.cache, policy=options.policy,
+                                           executor=self.executor)
+        matrices = encoded
+        verifier = None
+        if options.verify:
+            box_size = options.box_size if options.verify == qr_verify.VERIFY_IMAGE else None
+            verifier = qr_verify.LoopbackVerifier(kind, box_size=box_size, executor=self.executor)
+            matrices = verifier.wrap(segments, matrices)
+        try:
+            job.summary = exporter.export_all(options.fmt, matrices, len(segments), job.output,
+                                              box_size=options.box_size, grid=options.grid,
+                                              skip_existing=not options.overwrite,
+                                              progress=progress, cancel_event=job.cancel_event)
+        finally:
+            encoded.close()  # 取消或出错时不再提交剩余的段
+        if job.summary["errors"]:
+            name, error = job.summary["errors"][0]
+            raise OSError(f"{len(job.summary['errors'])} 个文件保存失败（{name}: {error}）")
+
+        if verifier is not None:
+            if job.summary["cancelled"]:
+                verifier.close()
+                return
+            if kind == qr_verify.KIND_BINARY:
+                expected = qr_verify.iter_file_bytes(job.path)
+            else:
+                expected = source.iter_chunks()
+            job.report = verifier.finish(expected)
+            if not job.report["match"] or job.report["failed_count"]:
+                job.status = STATUS_FAILED
+                job.error = qr_verify.format_report(job.report)
+
+    def cancel(self):
+        """取消：等待中的任务不再开始，正在处理的任务停止导出"""
+        with self._condition:
+            self.cancelled = True
+            for job in self.jobs:
+                if job.status == STATUS_PENDING:
+                    job.status = STATUS_CANCELLED
+                elif job.status == STATUS_RUNNING:
+                    job.cancel_event.set()
+            if not self._running():
+                self.end_time = time.perf_counter()
+                self._condition.notify_all()
+
+    @property
+    def finished(self):
+        """已开始且所有任务都已结束"""
+        with self._condition:
+            return self.started and all(job.finished for job in self.jobs)
+
+    def wait(self, timeout=None):
+        """等待所有任务结束，返回是否已全部结束"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self.started and all(job.finished for job in self.jobs), timeout)
+
+    def close(self):
+        """取消未完成的任务并关闭自建的进程池"""
+        self.cancel()
+        if self.own_executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.own_executor = False
+
+    def totals(self):
+        """汇总：各状态的任务数、二维码数、输入字节数、导出字节数和用时"""
+        with self._condition:
+            jobs = list(self.jobs)
+            done = self.started and all(job.finished for job in jobs)
+            end = self.end_time if done and self.end_time is not None else time.perf_counter()
+        counts = {status: 0 for status in STATUS_LABELS}
+        for job in jobs:
+            counts[job.status] += 1
+        elapsed = end - self.start_time if self.start_time is not None else 0.0
+        codes = sum(job.done for job in jobs)
+        return {
+            "jobs": len(jobs),
+            "counts": counts,
+            "codes": codes,
+            "input_bytes": sum(job.size for job in jobs if job.finished),
+            "output_bytes": sum(job.summary["bytes"] for job in jobs if job.summary is not None),
+            "elapsed": elapsed,
+            "codes_per_s": codes / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def format_totals(totals):
+    """生成汇总的简要说明"""
+    counts = totals["counts"]
+    parts = [f"共 {totals['jobs']} 个文档"]
+    for status in (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED, STATUS_RUNNING, STATUS_PENDING):
+        if counts[status]:
+            parts.append(f"{STATUS_LABELS[status]} {counts[status]}")
+    text = "，".join(parts)
+    return (f"{text}；{totals['codes']} 个二维码，{totals['output_bytes'] / (1024 * 1024):.1f} MB，"
+            f"用时 {totals['elapsed']:.1f}s（{totals['codes_per_s']:.1f} 个/秒）")
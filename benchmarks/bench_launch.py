@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动速度测试：比较不同打包方式（build_exe.py 的 onefile / onedir）和源码运行的冷启动、热启动耗时
+
+每次启动时设置 TEXT_COPIER_STARTUP=exit（见 perf.py），程序在主窗口第一次显示后立即退出，
+测量从创建进程到进程结束的总耗时，并读取程序自己记录的各阶段耗时：
+
+- launch:  进程启动和导入模块（单文件exe解压依赖的时间在父进程中，不包括在内）
+- widgets: 创建主窗口和控件
+- window:  到主窗口第一次显示
+- outside: 总耗时减去程序内的耗时，主要是单文件exe的解压和退出时清理临时目录
+
+冷启动为把程序复制到新目录后的第一次启动（新文件尚未被加载过，杀毒软件也会重新扫描），
+Linux上以root运行并指定 --drop-caches 时还会先清空系统文件缓存；之后的 --runs 次为热启动。
+需要图形界面（无显示环境中程序无法创建窗口）。
+
+    python build_exe.py --profile all
+    python benchmarks/bench_launch.py --source -o launch.json
+    python benchmarks/bench_launch.py onedir=D:/apps/text_copier_v1.0.0/text_copier_v1.0.0.exe
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_exe  # noqa: E402
+import perf  # noqa: E402
+
+RESULT_FORMAT = 1
+STAGES = ("launch", "widgets", "window")
+
+
+def find_targets(args):
+    """要测试的 (名称, 可执行文件或main.py路径) 列表"""
+    targets = []
+    for spec in args.targets:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            name, path = os.path.splitext(os.path.basename(spec))[0], spec
+        targets.append((name, os.path.abspath(path)))
+    if not args.targets:
+        # 默认测试已打包的各种方式
+        for profile in build_exe.PROFILES:
+            path = build_exe.executable_path(profile, ROOT)
+            if os.path.isfile(path):
+                targets.append((profile, path))
+    if args.source:
+        targets.append(("source", os.path.join(ROOT, "main.py")))
+    return targets
+
+
+def prepare_copy(path, workdir):
+    """把程序复制到新目录，返回复制后的路径（onedir复制整个目录，源码复制全部.py文件，不含字节码缓存）"""
+    if path.endswith(".py"):
+        directory = os.path.join(workdir, "source")
+        os.makedirs(directory)
+        for name in glob.glob(os.path.join(os.path.dirname(path), "*.py")):
+            shutil.copy2(name, directory)
+        return os.path.join(directory, os.path.basename(path))
+    if is_onedir(path):
+        bundle = os.path.dirname(path)
+        target = os.path.join(workdir, os.path.basename(bundle))
+        shutil.copytree(bundle, target)
+        return os.path.join(target, os.path.basename(path))
+    shutil.copy2(path, workdir)
+    return os.path.join(workdir, os.path.basename(path))
+
+
+def is_onedir(path):
+    """是否为onedir打包的程序（PyInstaller 6起依赖放在 _internal 目录，之前与exe放在一起）"""
+    bundle = os.path.dirname(path)
+    return not path.endswith(".py") and (os.path.isdir(os.path.join(bundle, "_internal"))
+                                         or os.path.isfile(os.path.join(bundle, "base_library.zip")))
+
+
+def drop_caches():
+    """清空Linux的文件缓存（需要root），返回是否成功"""
+    try:
+        subprocess.call(["sync"])
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def launch(path, log_path, timeout):
+    """启动一次，返回结果字典（wall为总耗时，失败时带error）"""
+    cmd = [sys.executable, path] if path.endswith(".py") else [path]
+    env = dict(os.environ)
+    env[perf.STARTUP_ENV] = perf.STARTUP_EXIT
+    env[perf.PERF_LOG_ENV] = log_path
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(cmd, env=env, cwd=os.path.dirname(path), timeout=timeout,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except subprocess.TimeoutExpired:
+        return {"error": f"{timeout}秒内没有退出"}
+    except OSError as e:
+        return {"error": str(e)}
+    wall = time.perf_counter() - start
+    record = None
+    try:
+        with open(log_path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        record = next((r for r in reversed(lines) if r.get("run") == "startup"), None)
+    except (OSError, ValueError):
+        pass
+    if completed.returncode != 0 or record is None:
+        message = completed.stderr.decode("utf-8", "replace").strip().splitlines()
+        return {"wall": round(wall, 4),
+                "error": message[-1] if message else f"退出码 {completed.returncode}，没有启动记录"}
+    result = {"wall": round(wall, 4), "app": record["elapsed"],
+              "outside": round(max(0.0, wall - record["elapsed"]), 4),
+              "peak_rss_mb": record.get("peak_rss_mb")}
+    for stage in STAGES:
+        if stage in record["stages"]:
+            result[stage] = record["stages"][stage]["seconds"]
+    return result
+
+
+def measure_target(name, path, args):
+    """测试一种方式：复制后冷启动一次，再热启动 args.runs 次"""
+    workdir = tempfile.mkdtemp(prefix="bench_launch_")
+    log_path = os.path.join(workdir, "startup.jsonl")
+    try:
+        run_path = path if args.no_copy else prepare_copy(path, workdir)
+        dropped = drop_caches() if args.drop_caches else False
+        cold = launch(run_path, log_path, args.timeout)
+        warm = [launch(run_path, log_path, args.timeout) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    ok = [run for run in warm if "error" not in run]
+    summary = {}
+    for key in ("wall", "app", "outside") + STAGES:
+        values = [run[key] for run in ok if key in run]
+        if values:
+            summary[key] = {"median": round(statistics.median(values), 4),
+                            "min": round(min(values), 4), "max": round(max(values), 4)}
+    return {"name": name, "path": path, "size_mb": round(_size(path) / (1024 * 1024), 1),
+            "copied": not args.no_copy, "drop_caches": dropped,
+            "cold": cold, "warm": warm, "warm_summary": summary}
+
+
+def _size(path):
+    """可执行文件（onedir为整个目录，源码为单个文件）的大小"""
+    if is_onedir(path):
+        bundle = os.path.dirname(path)
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(bundle) for f in files)
+    return os.path.getsize(path)
+
+
+def print_results(results):
+    print(f"\n{'方式':<10}{'大小(MB)':>10}{'冷启动(s)':>11}{'热启动中位数(s)':>17}{'最快(s)':>9}"
+          f"{'程序内(s)':>11}{'进程外(s)':>11}")
+    for result in results:
+        cold = result["cold"]
+        warm = result["warm_summary"]
+        cold_text = f"{cold['wall']:.3f}" if "error" not in cold else "失败"
+
+        def value(key, field="median"):
+            return f"{warm[key][field]:.3f}" if key in warm else "-"
+
+        print(f"{result['name']:<10}{result['size_mb']:>10}{cold_text:>11}{value('wall'):>17}"
+              f"{value('wall', 'min'):>9}{value('app'):>11}{value('outside'):>11}")
+        errors = [run["error"] for run in [cold] + result["warm"] if "error" in run]
+        if errors:
+            print(f"  {len(errors)} 次启动失败: {errors[0]}")
+    print("\n程序内 = 进程启动和导入 + 创建窗口 + 首次显示；进程外主要是单文件exe的解压和清理")
+
+
+def collect_meta(args):
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"format": RESULT_FORMAT, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "options": {"runs": args.runs, "copy": not args.no_copy, "drop_caches": args.drop_caches}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较各种打包方式的冷启动、热启动耗时")
+    parser.add_argument("targets", nargs="*",
+                        help="要测试的程序（名称=路径，或只写路径）；默认为 build_exe.py 打包的各种方式")
+    parser.add_argument("--source", action="store_true", help="同时测试用当前Python直接运行 main.py")
+    parser.add_argument("--runs", type=int, default=5, help="热启动次数（默认 5）")
+    parser.add_argument("--timeout", type=float, default=60, help="每次启动的超时时间（秒，默认 60）")
+    parser.add_argument("--no-copy", action="store_true",
+                        help="不复制到新目录，直接运行原位置的程序（冷启动结果受之前运行的影响）")
+    parser.add_argument("--drop-caches", action="store_true",
+                        help="冷启动前清空系统文件缓存（仅Linux，需要root）")
+    parser.add_argument("-o", "--output", help="结果保存为JSON文件")
+    args = parser.parse_args()
+
+    targets = find_targets(args)
+    if not targets:
+        parser.error("没有找到打包好的程序，请先运行 python build_exe.py --profile all，或指定程序路径、--source")
+
+    results = []
+    for name, path in targets:
+        print(f"测试 {name}: {path}")
+        results.append(measure_target(name, path, args))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": collect_meta(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    failed = all("error" in r["cold"] and not r["warm_summary"] for r in results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
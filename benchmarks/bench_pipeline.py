@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+完整流程基准测试：分割 -> 编码 -> 绘制 -> 保存
+
+对合成的 ASCII / 中文 / 中英混合 / 二进制 内容（默认1KB到50MB）分别测量：
+
+- split:  分割全部内容（文本按 qr_core.split_segments，二进制按 binary_payload.split_bytes）
+- encode: 生成模块矩阵（qr_core.iter_qr_matrices，与界面和命令行相同）
+- render: 绘制预览图和导出图（qr_core.render_images，与界面翻页和下载相同）
+- save:   导出PNG序列（exporter.export_png_sequence，与“下载全部”相同）
+
+大文件的二维码数量很多，encode/render/save 只处理前 --max-codes 个，按个/秒计算速度。
+每种内容和大小在单独的Python进程中运行，峰值内存（RSS）互不影响。进程的峰值RSS只增不减，
+后面的阶段无法单独读取，因此各阶段的内存在阶段进行时由后台线程定期采样当前RSS：rss_peak_mb
+为阶段内的最大值，rss_growth_mb 为它比阶段开始时多出的部分（编码的工作进程不计入）。
+不需要图形界面。
+
+结果可保存为JSON，用 --compare 与之前保存的结果对比，速度下降超过阈值时返回1：
+
+    python benchmarks/bench_pipeline.py --sizes 1KB,1MB,10MB -o before.json
+    python benchmarks/bench_pipeline.py --sizes 1KB,1MB,10MB -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import binary_payload  # noqa: E402
+import exporter  # noqa: E402
+import perf  # noqa: E402
+import qr_core  # noqa: E402
+import segmenter  # noqa: E402
+
+RESULT_FORMAT = 2  # 2: 各阶段的内存改为阶段内采样的 rss_peak_mb/rss_growth_mb
+CORPORA = ("ascii", "cjk", "mixed", "binary")
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,50MB"
+STAGES = ("split", "encode", "render", "save")
+RSS_SAMPLE_INTERVAL = 0.005  # 阶段内采样当前RSS的间隔（秒）
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+
+_ASCII_WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "text", "copier",
+                "2024-01-01", "INFO", "value=42", "path/to/file.txt", "\n"]
+_MIXED_WORDS = ["hello", "world", "text", "copier", "二维码", "长文本", "分割", "12345", "\n"]
+# 常用汉字和中文标点（随机排列，不可压缩，接近真实中文的字节构成）
+_CJK_CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)] + list("，。、：；！？“”（）\n")
+
+
+def parse_size(value):
+    """解析 1KB / 10MB 这样的大小"""
+    text = value.strip().upper()
+    for unit in sorted(_UNITS, key=len, reverse=True):
+        if text.endswith(unit):
+            number = text[:-len(unit)] or "1"
+            break
+    else:
+        unit, number = "B", text
+    try:
+        size = int(float(number) * _UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的大小: {value}")
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"无效的大小: {value}")
+    return size
+
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def make_corpus(kind, size, seed=0):
+    """生成约size字节（UTF-8）的测试内容，二进制返回bytes"""
+    rng = random.Random(f"{kind}-{seed}")
+    if kind == "binary":
+        return rng.getrandbits(size * 8).to_bytes(size, "little")
+    if kind == "cjk":
+        text = "".join(rng.choices(_CJK_CHARS, k=size // 3 + 1))
+        return text.encode("utf-8")[:size].decode("utf-8", "ignore")
+    words = _ASCII_WORDS if kind == "ascii" else _MIXED_WORDS
+    # 平均每个词（含空格）约5字节，多生成一些再按字节截断
+    text = " ".join(rng.choices(words, k=size // 4 + 1))
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore")
+
+
+class RssSampler:
+    """在后台线程中定期采样当前RSS，得到一段时间内的最大值（无法获取当前RSS时为None）"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start = self.peak = perf.current_rss_mb()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._update()
+
+    def _update(self):
+        self.peak = max(self.peak, perf.current_rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update()
+
+
+class StageTimer:
+    """测量一个阶段的耗时、阶段内的峰值RSS，以及可选的Python堆峰值（tracemalloc）"""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def run(self, name, func, items=None, nbytes=None):
+        if self.trace_memory:
+            tracemalloc.start()
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        stage = {"seconds": round(elapsed, 6), "rss_peak_mb": _round(rss.peak)}
+        if rss.start is not None:
+            stage["rss_growth_mb"] = _round(rss.peak - rss.start)
+        if self.trace_memory:
+            stage["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+            tracemalloc.stop()
+        count = items(result) if callable(items) else items
+        if count is not None:
+            stage["items"] = count
+            stage["items_per_s"] = round(count / elapsed, 3) if elapsed else None
+        if nbytes is not None:
+            stage["bytes"] = nbytes
+            stage["mb_per_s"] = round(nbytes / elapsed / (1024 * 1024), 3) if elapsed else None
+        self.stages[name] = stage
+        return result
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def run_case(kind, size, options):
+    """在子进程中运行一种内容和大小的完整流程，返回结果字典"""
+    corpus = make_corpus(kind, size)
+    binary = isinstance(corpus, bytes)
+    nbytes = len(corpus) if binary else len(corpus.encode("utf-8"))
+    policy = qr_core.EncodePolicy(qr_core.ECC_LEVELS[options["ecc"]], None, qr_core.MASK_AUTO)
+    timer = StageTimer(options["trace_memory"])
+
+    if binary:
+        segments = timer.run("split", lambda: binary_payload.split_bytes(
+            corpus, options["max_chars"], options["qr_version"], policy.error_correction), len, nbytes)
+    else:
+        segments = timer.run("split", lambda: qr_core.split_segments(
+            corpus, options["max_chars"], options["qr_version"], error_correction=policy.error_correction),
+            len, nbytes)
+    del corpus
+
+    sample = segments[:options["max_codes"]]
+    matrices = timer.run("encode", lambda: list(qr_core.iter_qr_matrices(
+        sample, options["workers"], policy=policy)), len(sample))
+    timer.run("render", lambda: [qr_core.render_images(matrix) for matrix in matrices], len(matrices))
+
+    save_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        summary = timer.run("save", lambda: exporter.export_png_sequence(
+            matrices, len(matrices), save_dir, skip_existing=False), len(matrices))
+        timer.stages["save"]["bytes"] = summary["bytes"]
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+    # 单进程串行时每个二维码经过编码、绘制、保存三个阶段的总速度
+    per_code = sum(timer.stages[name]["seconds"] for name in ("encode", "render", "save"))
+    return {
+        "corpus": kind,
+        "size": size,
+        "bytes": nbytes,
+        "segments": len(segments),
+        "sampled": len(sample),
+        "codes_per_s": round(len(sample) / per_code, 3) if per_code else None,
+        "peak_rss_mb": _round(perf.peak_rss_mb()),
+        "workers_peak_rss_mb": _round(perf.peak_rss_mb(children=True)),
+        "stages": timer.stages,
+    }
+
+
+def run_case_subprocess(kind, size, options):
+    """在新的Python进程中运行一个用例（峰值内存互不影响，进程内也可以再使用进程池）"""
+    request = json.dumps({"kind": kind, "size": size, "options": options})
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--run-case", request])
+    return json.loads(output.decode("utf-8"))
+
+
+def _git_commit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _package_version(name):
+    try:
+        module = __import__(name)
+        return getattr(module, "__version__", None)
+    except ImportError:
+        return None
+
+
+def collect_meta(args):
+    return {
+        "format": RESULT_FORMAT,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": _package_version("PIL"),
+        "options": {"sizes": [format_size(s) for s in args.sizes], "corpora": args.corpora,
+                    "max_codes": args.max_codes, "max_chars": args.max_chars,
+                    "qr_version": args.qr_version, "ecc": args.ecc, "workers": args.workers,
+                    "trace_memory": args.trace_memory},
+    }
+
+
+def print_result(result):
+    print(f"\n[{result['corpus']} {format_size(result['size'])}] {result['segments']} 个二维码"
+          f"（编码/绘制/保存前 {result['sampled']} 个），串行约 {result['codes_per_s']} 个/秒，"
+          f"峰值内存 {result['peak_rss_mb']} MB")
+    print(f"  {'阶段':<8}{'耗时(s)':>10}{'数量':>8}{'个/秒':>12}{'MB/s':>10}{'阶段峰值RSS(MB)':>16}"
+          f"{'RSS增长(MB)':>13}{'Python峰值(MB)':>16}")
+    for name in STAGES:
+        stage = result["stages"][name]
+        columns = [stage.get(key) for key in ("items", "items_per_s", "mb_per_s", "rss_peak_mb", "rss_growth_mb",
+                                              "py_peak_mb")]
+        items, rate, mbps, rss, growth, py_peak = ("" if value is None else value for value in columns)
+        print(f"  {name:<8}{stage['seconds']:>10.3f}{items:>8}{rate:>12}{mbps:>10}{rss:>16}{growth:>13}"
+              f"{py_peak:>16}")
+
+
+def compare(results, baseline, threshold, options):
+    """与之前的结果对比各阶段速度，返回速度下降超过阈值的项数"""
+    old = {(r["corpus"], r["size"]): r for r in baseline["results"]}
+    regressions = 0
+    matched = 0
+    print(f"\n与 {baseline['meta'].get('commit') or '基准'}（{baseline['meta'].get('time')}）对比：")
+    if baseline["meta"].get("options", {}).get("trace_memory") != options.get("trace_memory"):
+        print("  注意：两次运行是否使用 --trace-memory 不同，耗时不可直接比较")
+    print(f"  {'内容':<16}{'阶段':<8}{'每项之前(s)':>12}{'每项现在(s)':>12}{'变化':>9}")
+    for result in results:
+        before = old.get((result["corpus"], result["size"]))
+        if before is None:
+            continue
+        matched += 1
+        for name in STAGES:
+            a = before["stages"].get(name, {}).get("seconds")
+            b = result["stages"][name]["seconds"]
+            if not a or not b:
+                continue
+            # 按每项耗时比较，采样数量不同时也可对比
+            a /= before["stages"][name].get("items") or 1
+            b /= result["stages"][name].get("items") or 1
+            change = b / a - 1
+            mark = ""
+            if change > threshold:
+                mark = "  变慢"
+                regressions += 1
+            label = f"{result['corpus']} {format_size(result['size'])}"
+            print(f"  {label:<16}{name:<8}{a:>12.5f}{b:>12.5f}{change:>+8.0%}{mark}")
+    if not matched:
+        print("  没有内容类型和大小都相同的用例")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分割 -> 编码 -> 绘制 -> 保存 完整流程基准测试")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        type=lambda v: [parse_size(s) for s in v.split(",") if s.strip()],
+                        help=f"内容大小，逗号分隔（默认 {DEFAULT_SIZES}）")
+    parser.add_argument("--corpora", default=",".join(CORPORA),
+                        type=lambda v: [c.strip() for c in v.split(",") if c.strip()],
+                        help=f"内容类型，逗号分隔（默认 {','.join(CORPORA)}）")
+    parser.add_argument("--max-codes", type=int, default=200,
+                        help="编码/绘制/保存阶段最多处理的二维码数量（默认 200）")
+    parser.add_argument("--max-chars", type=int, default=qr_core.DEFAULT_MAX_CHARS, help="每段最大字符数")
+    parser.add_argument("--qr-version", type=int, default=segmenter.DEFAULT_VERSION,
+                        help=f"按该版本的容量分割（默认 {segmenter.DEFAULT_VERSION}；"
+                             "0 表示按 --max-chars 分割，中文每段800字超出最大容量）")
+    parser.add_argument("--ecc", choices=list(qr_core.ECC_LEVELS), default="M", help="纠错等级")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="编码进程数（默认1，结果不受CPU核数影响，便于对比）")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="同时用tracemalloc统计各阶段的Python内存峰值（耗时会明显增加）")
+    parser.add_argument("-o", "--output", help="结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="对比时每项耗时增加超过该比例视为变慢（默认 0.1）")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)  # 内部使用：在子进程中运行一个用例
+    args = parser.parse_args()
+
+    if args.run_case:
+        request = json.loads(args.run_case)
+        result = run_case(request["kind"], request["size"], request["options"])
+        sys.stdout.write(json.dumps(result))
+        return 0
+
+    unknown = [c for c in args.corpora if c not in CORPORA]
+    if unknown:
+        parser.error(f"未知的内容类型: {', '.join(unknown)}（可选 {', '.join(CORPORA)}）")
+
+    options = {"max_codes": args.max_codes, "max_chars": args.max_chars, "qr_version": args.qr_version or None,
+               "ecc": args.ecc, "workers": args.workers, "trace_memory": args.trace_memory}
+    results = []
+    for kind in args.corpora:
+        for size in args.sizes:
+            result = run_case_subprocess(kind, size, options)
+            print_result(result)
+            results.append(result)
+
+    report = {"meta": collect_meta(args), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, options):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编码策略对比：纠错等级、固定版本、掩码选择对二维码数量和编码速度的影响
+
+- qrcode默认：version=None + fit，逐一生成8种掩码再评估（原来的实现）
+- 其余各行使用 qr_core.make_qr_matrix 和对应的 EncodePolicy
+
+文本按目标版本的容量分割（与界面中“按容量分割”相同），单进程编码。
+
+用法:
+    python benchmarks/bench_policy.py --chars 100000 --qr-version 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode  # noqa: E402
+
+import qr_core  # noqa: E402
+
+
+def make_text(chars, seed=0):
+    """生成中英文混合的测试文本"""
+    rng = random.Random(seed)
+    words = ["hello", "world", "text", "copier", "二维码", "长文本", "分割", "12345", "\n"]
+    parts = []
+    length = 0
+    while length < chars:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:chars]
+
+
+def qrcode_default(segment, ecc):
+    qr = qrcode.QRCode(version=None, error_correction=ecc,
+                       box_size=qr_core.BOX_SIZE, border=qr_core.BORDER)
+    qr.add_data(segment)
+    qr.make(fit=True)
+    return qr.modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二维码编码策略对比")
+    parser.add_argument("--chars", type=int, default=100000, help="测试文本字符数")
+    parser.add_argument("--qr-version", type=int, default=20, help="分割和固定版本使用的二维码版本")
+    parser.add_argument("--limit", type=int, default=100, help="每种策略最多编码的二维码数量")
+    args = parser.parse_args()
+
+    text = make_text(args.chars)
+    version = args.qr_version
+    print(f"测试文本: {len(text)} 字符，按版本 {version} 的容量分割，每种策略编码前 {args.limit} 个")
+    print(f"{'纠错':<6}{'策略':<22}{'二维码数':>8}{'个/秒':>10}{'相对':>8}")
+
+    for name, ecc in qr_core.ECC_LEVELS.items():
+        segments = qr_core.split_segments(text, version=version, error_correction=ecc)
+        sample = segments[:args.limit]
+        methods = (
+            ("qrcode默认", lambda s: qrcode_default(s, ecc)),
+            ("自动版本+自动掩码", qr_core.EncodePolicy(ecc, None, qr_core.MASK_AUTO)),
+            ("固定版本+自动掩码", qr_core.EncodePolicy(ecc, version, qr_core.MASK_AUTO)),
+            ("自动版本+固定掩码", qr_core.EncodePolicy(ecc, None, 0)),
+            ("固定版本+固定掩码", qr_core.EncodePolicy(ecc, version, 0)),
+        )
+        baseline = None
+        for label, method in methods:
+            encode = method if callable(method) else (lambda s, p=method: qr_core.make_qr_matrix(s, p))
+            encode(sample[0])  # 预热：qr_mask按版本计算的布局每个进程只计算一次
+            start = time.perf_counter()
+            for segment in sample:
+                encode(segment)
+            rate = len(sample) / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{name:<6}{label:<22}{len(segments):>8}{rate:>10.1f}{rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
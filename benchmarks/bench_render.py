@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+栅格化性能对比：每个二维码同时绘制预览图（350x350）和导出图（每模块10像素）
+
+- qrcode.make_image：最初的实现，make_image + copy + LANCZOS缩放
+- 放大后缩小：先按导出尺寸绘制，再缩放到预览尺寸
+- 直接栅格化：qr_core.render_images，整数倍最近邻放大，一次得到两种尺寸
+
+只计绘制时间，二维码编码在计时前完成。
+
+用法:
+    python benchmarks/bench_render.py --count 1000 --chars 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import qr_core  # noqa: E402
+
+
+def make_segments(count, chars, seed=0):
+    """生成中英文混合的测试文本段"""
+    rng = random.Random(seed)
+    words = ["hello", "world", "text", "copier", "二维码", "长文本", "分割", "12345"]
+    segments = []
+    for _ in range(count):
+        parts = []
+        length = 0
+        while length < chars:
+            word = rng.choice(words)
+            parts.append(word)
+            length += len(word) + 1
+        segments.append(" ".join(parts)[:chars])
+    return segments
+
+
+def make_qr(segment):
+    qr = qrcode.QRCode(version=None,
+                       error_correction=qr_core.ERROR_CORRECTION,
+                       box_size=qr_core.BOX_SIZE,
+                       border=qr_core.BORDER)
+    qr.add_data(segment)
+    qr.make(fit=True)
+    return qr
+
+
+def render_make_image(qr, matrix):
+    img = qr.make_image(fill_color="black", back_color="white")
+    original = img.copy()
+    preview = img.resize((qr_core.PREVIEW_SIZE, qr_core.PREVIEW_SIZE), Image.LANCZOS)
+    return preview, original
+
+
+def render_downscale(qr, matrix):
+    original = matrix.to_image(qr_core.BOX_SIZE, qr_core.BORDER)
+    preview = original.resize((qr_core.PREVIEW_SIZE, qr_core.PREVIEW_SIZE), Image.LANCZOS)
+    return preview, original
+
+
+def render_direct(qr, matrix):
+    return qr_core.render_images(matrix)
+
+
+def preview_downscale(qr, matrix):
+    return render_downscale(qr, matrix)[0]
+
+
+def preview_direct(qr, matrix):
+    return qr_core.render_preview(matrix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二维码栅格化性能对比")
+    parser.add_argument("--count", type=int, default=1000, help="二维码数量")
+    parser.add_argument("--chars", type=int, default=200, help="每段字符数")
+    args = parser.parse_args()
+
+    segments = make_segments(args.count, args.chars)
+    print(f"编码 {len(segments)} 个二维码（每段 {args.chars} 个字符）...")
+    qrs = [make_qr(segment) for segment in segments]
+    matrices = [qr_core.make_qr_matrix(segment) for segment in segments]
+    print(f"版本 {qrs[0].version}，{matrices[0].size}x{matrices[0].size} 模块")
+
+    groups = (
+        ("预览图 + 导出图", (("qrcode.make_image", render_make_image),
+                            ("放大后缩小", render_downscale),
+                            ("直接栅格化", render_direct))),
+        ("只绘制预览图（翻页时）", (("放大后缩小", preview_downscale),
+                                  ("直接栅格化", preview_direct))),
+    )
+    for title, methods in groups:
+        print(f"\n{title}")
+        print(f"{'方法':<20}{'耗时(s)':>10}{'个/秒':>12}{'相对':>8}")
+        baseline = None
+        for name, render in methods:
+            start = time.perf_counter()
+            for qr, matrix in zip(qrs, matrices):
+                render(qr, matrix)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{name:<20}{elapsed:>10.3f}{len(qrs) / elapsed:>12.0f}{baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
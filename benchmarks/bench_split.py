@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分割性能对比：textwrap.wrap（旧实现） vs 流式分割器
+
+用法:
+    python benchmarks/bench_split.py --size-mb 20 --max-chars 800
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import segmenter  # noqa: E402
+
+
+def make_corpus(size_mb, seed=0):
+    """生成中英文混合的测试文本"""
+    rng = random.Random(seed)
+    words = ["hello", "world", "text", "copier", "二维码", "长文本", "分割", "12345", "\n"]
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    length = 0
+    while length < target:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)
+
+
+def measure(name, func):
+    """运行func，返回(名称, 段数, 耗时, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return name, count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本分割性能对比")
+    parser.add_argument("--size-mb", type=float, default=20, help="测试文本大小（MB字符数）")
+    parser.add_argument("--max-chars", type=int, default=800, help="每段最大字符数")
+    args = parser.parse_args()
+
+    text = make_corpus(args.size_mb)
+    print(f"测试文本: {len(text)} 字符, max_chars={args.max_chars}")
+
+    results = [
+        measure("textwrap.wrap", lambda: len(textwrap.wrap(
+            text, width=args.max_chars, break_long_words=True, replace_whitespace=False))),
+        measure("iter_split_text", lambda: sum(
+            1 for _ in segmenter.iter_split_text(text, args.max_chars))),
+        measure("iter_stable_chunks", lambda: sum(
+            1 for _ in segmenter.iter_stable_chunks((text,), args.max_chars))),
+    ]
+
+    # 从内存映射文件流式分割
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        del text
+        results.append(measure("iter_split_chunks(mmap)", lambda: sum(
+            1 for _ in segmenter.iter_split_chunks(segmenter.iter_file_chunks(path), args.max_chars))))
+    finally:
+        os.remove(path)
+
+    print(f"{'方法':<26}{'段数':>10}{'耗时(s)':>12}{'峰值内存(MB)':>16}")
+    for name, count, elapsed, peak in results:
+        print(f"{name:<26}{count:>10}{elapsed:>12.3f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
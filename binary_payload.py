@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+二进制文件分帧
+
+任意文件（图片、压缩包等）按原始字节切分，每帧放入二维码的字节模式，不需要先转成
+Base64文本，同样的二维码能多放约三分之一的内容。每帧内容为（大端序）::
+
+    "QB"(2) 版本(1) 文件ID(4) 序号(4) 总数(4) CRC32(4) + 数据
+
+- 文件ID为整个文件的CRC32，接收端据此区分不同文件的帧，并在拼接后校验整个文件
+- 序号从0开始
+- CRC32覆盖头部的其余字段和数据，接收端据此丢弃扫描错误或不完整的帧
+"""
+
+import mmap
+import struct
+import zlib
+
+import segmenter
+
+MAGIC = b"QB"
+FRAME_VERSION = 1
+_HEADER = struct.Struct(">2sBIIII")
+HEADER_SIZE = _HEADER.size
+CRC_BLOCK_SIZE = 1024 * 1024  # 计算文件ID时每次处理的字节数
+
+
+def frame_bytes(max_bytes, version=None, error_correction=None):
+    """每帧可携带的数据字节数
+
+    指定version时按该版本字节模式的容量计算，否则每个二维码（含头部）不超过max_bytes字节。
+    """
+    if version:
+        max_bytes = segmenter.capacity(version, error_correction, segmenter.MODE_8BIT_BYTE)
+    size = max_bytes - HEADER_SIZE
+    if size < 1:
+        raise ValueError("每个二维码的容量不足以放下二进制帧头部")
+    return size
+
+
+def checksum(data):
+    """分块计算CRC32，内存映射的大文件也不会一次性复制"""
+    crc = 0
+    view = memoryview(data)
+    for offset in range(0, len(view), CRC_BLOCK_SIZE):
+        crc = zlib.crc32(view[offset:offset + CRC_BLOCK_SIZE], crc)
+    return crc
+
+
+def build_frame(file_id, index, total, data):
+    """组装一帧"""
+    crc = zlib.crc32(struct.pack(">III", file_id, index, total) + data)
+    return _HEADER.pack(MAGIC, FRAME_VERSION, file_id, index, total, crc) + data
+
+
+def parse_frame(frame):
+    """解析一帧，返回 (文件ID, 序号, 总数, 数据)；格式错误或校验失败时抛出ValueError"""
+    if len(frame) < HEADER_SIZE:
+        raise ValueError("二进制帧过短")
+    magic, version, file_id, index, total, crc = _HEADER.unpack_from(frame)
+    if magic != MAGIC:
+        raise ValueError("不是二进制帧")
+    if version != FRAME_VERSION:
+        raise ValueError(f"不支持的二进制帧版本: {version}")
+    data = bytes(frame[HEADER_SIZE:])
+    if zlib.crc32(struct.pack(">III", file_id, index, total) + data) != crc:
+        raise ValueError(f"二进制帧校验失败: 第 {index + 1} 帧")
+    if index >= total:
+        raise ValueError(f"无效的帧序号: {index}/{total}")
+    return file_id, index, total, data
+
+
+def split_bytes(data, max_bytes, version=None, error_correction=None):
+    """把字节串（或内存映射）切分为二进制帧列表，内容为空时返回空列表"""
+    if not len(data):
+        return []
+    size = frame_bytes(max_bytes, version, error_correction)
+    file_id = checksum(data)
+    total = -(-len(data) // size)
+    return [build_frame(file_id, i, total, bytes(data[i * size:(i + 1) * size])) for i in range(total)]
+
+
+def split_file(path, max_bytes, version=None, error_correction=None):
+    """以内存映射方式读取文件并切分为二进制帧列表"""
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            return []
+        with data:
+            return split_bytes(data, max_bytes, version, error_correction)
+
+
+def estimate_codes(size, max_bytes, version=None, error_correction=None):
+    """size字节的文件需要的二维码数量"""
+    return -(-size // frame_bytes(max_bytes, version, error_correction))
+
+
+class FrameAssembler:
+    """接收任意顺序的二进制帧并还原文件（参考实现，便于接收端移植和自测）"""
+
+    def __init__(self):
+        self.file_id = None
+        self.total = None
+        self.parts = {}  # 序号 -> 数据
+
+    @property
+    def done(self):
+        return self.total is not None and len(self.parts) == self.total
+
+    def missing(self):
+        """尚未收到的帧序号"""
+        if self.total is None:
+            return []
+        return [i for i in range(self.total) if i not in self.parts]
+
+    def add_frame(self, frame):
+        """加入一帧，全部收到后返回True；帧格式错误或不属于同一文件时抛出ValueError"""
+        file_id, index, total, data = parse_frame(frame)
+        if self.file_id is None:
+            self.file_id, self.total = file_id, total
+        elif (file_id, total) != (self.file_id, self.total):
+            raise ValueError("二进制帧不属于同一文件")
+        self.parts[index] = data
+        return self.done
+
+    def result(self):
+        """还原的文件内容，尚未收齐时返回None；整个文件校验失败时抛出ValueError"""
+        if not self.done:
+            return None
+        data = b"".join(self.parts[i] for i in range(self.total))
+        if checksum(data) != self.file_id:
+            raise ValueError("文件校验失败")
+        return data
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+二维码模块矩阵的紧凑存储
+
+每个模块只占1比特，按行打包（每行补齐到整字节，高位在前），与PIL "1" 模式的
+原始数据格式一致，绘制时无需逐像素转换。只有在显示或保存时才按需要的尺寸栅格化。
+PIL在第一次栅格化时才导入，只编码的工作进程和程序启动时不需要加载。
+"""
+
+
+class BitMatrix:
+    """按位打包的二维码模块矩阵，1为深色模块"""
+
+    __slots__ = ("size", "row_bytes", "data")
+
+    def __init__(self, size, data):
+        self.size = size  # 边长（模块数）
+        self.row_bytes = (size + 7) // 8  # 每行字节数
+        if len(data) != self.row_bytes * size:
+            raise ValueError("矩阵数据长度与边长不匹配")
+        self.data = bytes(data)
+
+    @classmethod
+    def from_modules(cls, modules):
+        """由qrcode的modules（布尔值二维列表）创建"""
+        size = len(modules)
+        row_bytes = (size + 7) // 8
+        pad = row_bytes * 8 - size
+        data = bytearray()
+        for row in modules:
+            value = 0
+            for cell in row:
+                value = (value << 1) | bool(cell)
+            data += (value << pad).to_bytes(row_bytes, "big")
+        return cls(size, data)
+
+    def __getitem__(self, pos):
+        """matrix[row, col] -> 是否为深色模块"""
+        row, col = pos
+        byte = self.data[row * self.row_bytes + (col >> 3)]
+        return bool(byte & (0x80 >> (col & 7)))
+
+    def __eq__(self, other):
+        return isinstance(other, BitMatrix) and self.size == other.size and self.data == other.data
+
+    def __getstate__(self):
+        return self.size, self.data
+
+    def __setstate__(self, state):
+        self.size, self.data = state
+        self.row_bytes = (self.size + 7) // 8
+
+    def __repr__(self):
+        return f"BitMatrix(size={self.size})"
+
+    @property
+    def nbytes(self):
+        """占用的数据字节数"""
+        return len(self.data)
+
+    def grid_image(self, border=0):
+        """每个模块1像素的黑白图像，四周留 border 个模块的空白
+
+        空白直接拼接在打包的比特数据中，不需要再新建画布粘贴。
+        """
+        from PIL import Image
+
+        if not border:
+            # "1;I" 表示反相：1比特为黑色
+            return Image.frombytes("1", (self.size, self.size), self.data, "raw", "1;I")
+
+        full = self.size + border * 2
+        row_bytes = (full + 7) // 8
+        # 原行末尾的补齐位数，以及加上左侧空白后新行末尾需要的补齐位数
+        tail = self.row_bytes * 8 - self.size
+        shift = row_bytes * 8 - full + border
+        blank = bytes(row_bytes * border)
+        rows = [blank]
+        data = self.data
+        for offset in range(0, len(data), self.row_bytes):
+            value = int.from_bytes(data[offset:offset + self.row_bytes], "big") >> tail
+            rows.append((value << shift).to_bytes(row_bytes, "big"))
+        rows.append(blank)
+        return Image.frombytes("1", (full, full), b"".join(rows), "raw", "1;I")
+
+    def to_image(self, scale, border):
+        """栅格化为黑白图像：每个模块 scale x scale 像素，四周留 border 个模块的空白"""
+        return self.to_images((scale,), border)[0]
+
+    def to_images(self, scales, border):
+        """一次栅格化出多种尺寸（如预览和导出），只构建一次每模块1像素的图像
+
+        每种尺寸都是整数倍最近邻放大，模块边缘清晰、宽度一致。
+        """
+        from PIL import Image
+
+        grid = self.grid_image(border)
+        full = grid.size[0]
+        return [grid if scale == 1 else grid.resize((full * scale, full * scale), Image.NEAREST)
+                for scale in scales]
+
+    def fit_scale(self, border, size):
+        """加上空白后能放进 size x size 像素的最大整数模块尺寸（至少为1）"""
+        return max(1, size // (self.size + border * 2))
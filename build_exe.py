@@ -2,11 +2,61 @@
 # -*- coding: utf-8 -*-
 """
 打包脚本 - 将长文本二维码生成器打包为exe文件
+
+用法:
+    python build_exe.py                     # 单个exe文件（onefile）
+    python build_exe.py --profile onedir    # 目录形式，启动最快
+    python build_exe.py --profile all       # 两种都打包，再用 benchmarks/bench_launch.py 比较启动速度
+
+onefile 每次启动都要把全部依赖解压到临时目录，杀毒软件还会扫描解压出的每个文件；
+onedir 把exe和依赖放在同一目录（相当于只解压一次），启动时直接加载，分发时压缩整个目录即可。
+两种方式都排除用不到的模块、不使用UPX压缩，并预先编译优化的字节码。
 """
 
+import argparse
 import os
 import sys
 import subprocess
+from collections import OrderedDict
+
+APP_NAME = "text_copier_v1.0.0"
+
+# 打包方式 -> (PyInstaller参数, 说明)
+PROFILES = OrderedDict([
+    ("onefile", ("--onefile", "单个exe文件，每次启动都解压到临时目录")),
+    ("onedir", ("--onedir", "目录形式，启动时不需要解压，启动最快")),
+])
+
+# 程序用不到、但可能被依赖间接引入的模块，排除后体积更小、需要加载和扫描的文件更少
+EXCLUDES = [
+    "unittest", "doctest", "pdb", "pydoc", "lib2to3", "distutils", "setuptools", "pip",
+    "tkinter.test", "test",
+    "numpy", "matplotlib", "IPython",
+    "PIL.ImageQt", "PyQt5", "PyQt6", "PySide2", "PySide6",
+]
+OPTIMIZE = 1  # 字节码优化级别（去掉assert）；2 会去掉文档字符串，帮助信息依赖它，不使用
+
+
+def dist_path(profile):
+    """打包输出目录（两种方式分开，互不覆盖）"""
+    return "dist" if profile == "onefile" else os.path.join("dist", profile)
+
+
+def executable_path(profile, root="."):
+    """打包生成的可执行文件路径"""
+    exe = APP_NAME + (".exe" if os.name == "nt" else "")
+    if profile == "onefile":
+        return os.path.join(root, dist_path(profile), exe)
+    return os.path.join(root, dist_path(profile), APP_NAME, exe)
+
+
+def pyinstaller_version():
+    """已安装的PyInstaller版本（如 (6, 3)），未安装时返回None"""
+    try:
+        from PyInstaller import __version__
+    except ImportError:
+        return None
+    return tuple(int(part) for part in __version__.split(".")[:2] if part.isdigit())
 
 
 def install_pyinstaller():
@@ -21,25 +71,34 @@ def install_pyinstaller():
         return False
 
 
-def build_exe():
+def build_exe(profile="onefile"):
     """构建exe文件"""
-    print("开始构建exe文件...")
+    mode, description = PROFILES[profile]
+    print(f"开始构建exe文件（{profile}：{description}）...")
 
     # PyInstaller命令参数
     cmd = [
-        "pyinstaller",
-        "--onefile",  # 打包成单个exe文件
+        sys.executable, "-m", "PyInstaller",
+        mode,  # 单个exe文件或目录
         "--windowed",  # 不显示控制台窗口
-        "--name=text_copier_v1.0.0",  # 设置exe文件名
+        f"--name={APP_NAME}",  # 设置exe文件名
         "--icon=icon.ico",  # 设置图标（如果有的话）
-        "--add-data=requirements.txt;.",  # 包含requirements.txt
-        "--add-data=icon.ico;.",  # 包含图标文件
+        f"--add-data=requirements.txt{os.pathsep}.",  # 包含requirements.txt
+        f"--add-data=icon.ico{os.pathsep}.",  # 包含图标文件
         "--hidden-import=PIL._tkinter_finder",  # 确保PIL正确导入
         "--hidden-import=tkinter",  # 确保tkinter正确导入
         "--hidden-import=qrcode",  # 确保qrcode正确导入
+        f"--distpath={dist_path(profile)}",  # 输出目录
+        f"--workpath={os.path.join('build', profile)}",  # 中间文件目录
+        "--noupx",  # 不用UPX压缩：压缩的DLL每次启动都要解压，也更容易被杀毒软件拦截扫描
         "--clean",  # 清理临时文件
-        "main.py"  # 主程序文件
     ]
+    cmd += [f"--exclude-module={name}" for name in EXCLUDES]
+    if os.name != "nt":
+        cmd.append("--strip")  # 去掉动态库的符号表（Windows上不适用）
+    if (pyinstaller_version() or (0,)) >= (6, 0):
+        cmd.append(f"--optimize={OPTIMIZE}")  # 打包优化过的字节码，启动时不再编译
+    cmd.append("main.py")  # 主程序文件
 
     try:
         subprocess.check_call(cmd)
@@ -61,6 +120,12 @@ def create_icon():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="将长文本二维码生成器打包为exe文件")
+    parser.add_argument("--profile", choices=list(PROFILES) + ["all"], default="onefile",
+                        help="onefile 单个exe文件（默认）；onedir 目录形式，启动最快；all 两种都打包")
+    args = parser.parse_args()
+    profiles = list(PROFILES) if args.profile == "all" else [args.profile]
+
     print("=== 长文本二维码生成器 - 打包工具 ===")
 
     # 检查Python版本
@@ -73,20 +138,26 @@ def main():
         print("错误：找不到main.py文件！")
         return
 
-    # 安装PyInstaller
-    if not install_pyinstaller():
+    # 安装PyInstaller（已安装时跳过，便于在无法联网的机器上打包）
+    if pyinstaller_version() is None and not install_pyinstaller():
         return
 
     # 创建图标
     create_icon()
 
     # 构建exe
-    if build_exe():
-        print("\n=== 构建完成 ===")
-        print("exe文件位置: dist/text_copier_v1.0.0.exe")
-        print("你可以将exe文件复制到任何地方运行！")
-    else:
-        print("\n=== 构建失败 ===")
+    for profile in profiles:
+        if not build_exe(profile):
+            print("\n=== 构建失败 ===")
+            return
+        print(f"\n=== 构建完成（{profile}） ===")
+        print(f"exe文件位置: {executable_path(profile)}")
+        if profile == "onefile":
+            print("你可以将exe文件复制到任何地方运行！")
+        else:
+            print(f"请复制整个 {os.path.dirname(executable_path(profile))} 目录（或压缩后分发）")
+    if len(profiles) > 1:
+        print("\n比较启动速度: python benchmarks/bench_launch.py")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行工具 - 无需图形界面即可批量生成二维码
+
+用法:
+    python cli.py encode input.txt -o output_dir
+    cat input.txt | python cli.py encode - -o output_dir
+    python cli.py encode photo.jpg --binary -o output_dir
+    python cli.py encode input.txt -o output_dir --verify
+    python cli.py verify output_dir input.txt
+    python cli.py serve input.txt
+    python cli.py pull http://192.168.1.5:8765/ -o received.txt
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+import batch
+import binary_payload
+import compression
+import exporter
+import file_source
+import perf
+import qr_cache
+import qr_core
+import qr_server
+import qr_verify
+
+
+BATCH_PROGRESS_INTERVAL = 0.5  # batch 刷新进度的间隔（秒）
+SERVE_PROGRESS_INTERVAL = 1.0  # serve 刷新状态的间隔（秒）
+PART_SUFFIX = ".part"  # pull 保存已接收段的目录后缀
+
+
+def open_input(source, encoding):
+    """打开输入，返回一个每次调用都从头按块产出文本的函数
+
+    文件（FileSource）以内存映射方式流式读取，不一次性载入；None 表示标准输入。
+    两者都按原样编码（不去掉首尾空白），还原后与输入逐字节一致；图形界面中输入框的
+    文字则会去掉首尾空白。
+    """
+    if source is None:
+        data = sys.stdin.buffer.read()
+        text = data.decode("utf-8" if encoding == "auto" else encoding)
+        return lambda: iter((text,) if text else ())
+    return source.iter_chunks
+
+
+def read_binary_frames(source, args):
+    """把输入按原始字节切分为二进制帧，返回 (帧列表, 每次调用都从头按块产出原始字节的函数)"""
+    if source is None:
+        data = sys.stdin.buffer.read()
+        frames = binary_payload.split_bytes(data, args.max_chars, args.qr_version, args.policy.error_correction)
+        return frames, lambda: iter((data,))
+    frames = binary_payload.split_file(source.path, args.max_chars, args.qr_version, args.policy.error_correction)
+    return frames, lambda: qr_verify.iter_file_bytes(source.path)
+
+
+def parse_mask(value):
+    """解析掩码：auto 或 0-7"""
+    if value == qr_core.MASK_AUTO:
+        return value
+    try:
+        mask = int(value)
+    except ValueError:
+        mask = None
+    if mask not in qr_core.MASK_PATTERNS:
+        raise argparse.ArgumentTypeError(f"无效的掩码: {value}（应为 auto 或 0-7）")
+    return mask
+
+
+def build_policy(args):
+    """由命令行参数得到编码策略"""
+    if args.fixed_version and not args.qr_version:
+        raise ValueError("--fixed-version 需要同时指定 --qr-version")
+    return qr_core.EncodePolicy(qr_core.ECC_LEVELS[args.ecc],
+                                args.qr_version if args.fixed_version else None,
+                                args.mask)
+
+
+def parse_grid(value):
+    """解析 "列x行"，如 3x4"""
+    try:
+        columns, rows = (int(n) for n in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的排列方式: {value}（应为 列x行，如 3x4）")
+    if columns < 1 or rows < 1:
+        raise argparse.ArgumentTypeError(f"无效的排列方式: {value}")
+    return columns, rows
+
+
+def parse_positive_int(value):
+    """解析正整数（如 --box-size）"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"无效的数值: {value}（应为正整数）")
+    return number
+
+
+def cmd_encode(args):
+    """encode 子命令：文本（或任意文件的二进制帧） -> PNG序列"""
+    try:
+        args.policy = build_policy(args)
+    except ValueError as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(qr_core.describe_policy(args.policy, args.qr_version), file=sys.stderr)
+    # 设置环境变量 TEXT_COPIER_PERF 等后统计各阶段耗时（见 perf.py）
+    args.perf_run = None
+    if perf.enabled():
+        args.perf_run = perf.RunStats("cli", input=args.input, format=args.format,
+                                      ecc=args.ecc, version=args.policy.version, mask=args.policy.mask)
+    try:
+        return encode_input(args)
+    finally:
+        # 只估算或出错提前返回时也写入统计（剖析结果在此时保存）
+        if args.perf_run is not None and args.perf_run.record is None:
+            args.perf_run.finish()
+
+
+def encode_input(args):
+    """读取、分割（或压缩）输入并导出"""
+    try:
+        source = None
+        if args.input != "-":
+            source = file_source.FileSource(args.input, None if args.encoding == "auto" else args.encoding)
+        if args.binary or (source is not None and source.binary):
+            return encode_binary(args, source)
+        chunks = open_input(source, args.encoding)
+        with perf.measure(args.perf_run, "split"):
+            segments = list(qr_core.iter_segments(chunks(), args.max_chars, args.qr_version, stable=args.stable,
+                                                  error_correction=args.policy.error_correction))
+    except (OSError, UnicodeDecodeError, LookupError, ValueError) as e:
+        print(f"读取输入失败: {e}", file=sys.stderr)
+        return 1
+
+    plain_count = len(segments)
+    if not plain_count:
+        print("输入为空，没有生成二维码", file=sys.stderr)
+        return 1
+
+    if args.compress:
+        try:
+            with perf.measure(args.perf_run, "compress"):
+                stats = compression.estimate(chunks(), args.compress, args.max_chars, args.qr_version,
+                                             args.policy.error_correction, plain_count)
+        except Exception as e:
+            print(f"压缩失败: {e}", file=sys.stderr)
+            return 1
+        if not args.quiet or args.estimate:
+            print(compression.format_estimate(stats), file=sys.stderr)
+    if args.estimate:
+        if not args.compress:
+            print(f"需要 {plain_count} 个二维码", file=sys.stderr)
+        return 0
+
+    if args.compress:
+        segments = stats["segments"]
+        kind = qr_verify.KIND_COMPRESSED
+    else:
+        kind = qr_verify.KIND_TEXT
+    return export_segments(args, segments, kind, chunks)
+
+
+def encode_binary(args, source):
+    """按二进制帧编码输入（不压缩、不按文本分割）"""
+    with perf.measure(args.perf_run, "split"):
+        segments, read_bytes = read_binary_frames(source, args)
+    if not segments:
+        print("输入为空，没有生成二维码", file=sys.stderr)
+        return 1
+    if not args.quiet or args.estimate:
+        size = source.size if source is not None else sum(len(s) - binary_payload.HEADER_SIZE for s in segments)
+        print(f"二进制帧: {size} 字节，需要 {len(segments)} 个二维码", file=sys.stderr)
+    if args.estimate:
+        return 0
+    return export_segments(args, segments, qr_verify.KIND_BINARY, read_bytes)
+
+
+def export_segments(args, segments, kind, expected):
+    """编码并按指定格式保存
+
+    kind: 内容类型（qr_verify.KIND_*）；expected: 返回原文块的函数，--verify 时用于逐字节比较
+    """
+    def progress(done, total):
+        if not args.quiet:
+            print(f"\r正在生成二维码... {done}/{total}", end="", file=sys.stderr)
+
+    verifier = None
+    try:
+        cache = qr_cache.MatrixCache(cache_dir=args.cache_dir) if args.cache_dir else None
+        matrices = qr_core.iter_qr_matrices(segments, args.workers, cache, args.policy)
+        # 导出时等待下一个矩阵的时间计为编码，其余为绘制和保存
+        matrices = perf.timed_iter(matrices, args.perf_run, "encode")
+        if args.verify:
+            # 每得到一个矩阵就交给另一组进程解码，与编码和保存同时进行
+            box_size = args.box_size if args.verify == qr_verify.VERIFY_IMAGE else None
+            verifier = qr_verify.LoopbackVerifier(kind, args.workers, box_size)
+            matrices = verifier.wrap(segments, matrices)
+        summary = exporter.export_all(args.format, matrices, len(segments), args.output_dir,
+                                      box_size=args.box_size,
+                                      grid=args.grid,
+                                      skip_existing=not args.overwrite,
+                                      progress=progress)
+    except Exception as e:
+        if verifier is not None:
+            verifier.close()
+        print(f"\n生成二维码时出错: {e}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        print(file=sys.stderr)
+        print(f"{exporter.format_summary(summary)} - {summary.get('path', args.output_dir)}", file=sys.stderr)
+        if cache is not None:
+            print(f"缓存命中 {cache.hits} 个，新编码 {cache.misses} 个", file=sys.stderr)
+    if args.perf_run is not None:
+        encode = args.perf_run.stages.get("encode", (0.0, 0))[0]
+        args.perf_run.add("save", max(0.0, summary["elapsed"] - encode), summary["saved"])
+        record = args.perf_run.finish(codes=summary["saved"], bytes=summary["bytes"])
+        print(f"性能统计: {perf.summary_text(record)}（已写入 {perf.log_path()}）", file=sys.stderr)
+    for name, error in summary["errors"]:
+        print(f"保存失败 {name}: {error}", file=sys.stderr)
+    if verifier is not None:
+        if summary["cancelled"]:
+            verifier.close()
+        elif not print_report(verifier.finish(expected())):
+            return 1
+    return 1 if summary["errors"] else 0
+
+
+def print_report(report):
+    """输出校验结果，全部通过时返回True"""
+    for line in qr_verify.format_failures(report):
+        print(line, file=sys.stderr)
+    print(qr_verify.format_report(report), file=sys.stderr)
+    return bool(report["match"]) and not report["failed_count"]
+
+
+def cmd_verify(args):
+    """verify 子命令：解码导出的PNG（目录或ZIP），拼接后与原文逐字节比较"""
+    data = sys.stdin.buffer.read() if args.input == "-" else None
+
+    def expected(kind):
+        # 二进制帧与原始字节比较；文本与按编码解码后的原文（UTF-8）比较
+        if kind == qr_verify.KIND_BINARY:
+            return (data,) if data is not None else qr_verify.iter_file_bytes(args.input)
+        if data is not None:
+            text = data.decode("utf-8" if args.encoding == "auto" else args.encoding).strip()
+            return (qr_core.normalize_text(text),)
+        return file_source.FileSource(args.input, None if args.encoding == "auto" else args.encoding).iter_chunks()
+
+    try:
+        report = qr_verify.verify_saved(args.path, expected if args.input else None, args.workers)
+    except (OSError, UnicodeDecodeError, LookupError) as e:
+        print(f"读取失败: {e}", file=sys.stderr)
+        return 1
+    ok = print_report(report)
+    if report["sha256"]:
+        print(f"内容SHA-256: {report['sha256']}", file=sys.stderr)
+    if args.input is None:
+        return 0 if not report["failed_count"] and not report["error"] else 1
+    return 0 if ok else 1
+
+
+def cmd_batch(args):
+    """batch 子命令：多个文件排队编码，共用进程池，每个文件单独输出"""
+    try:
+        policy = build_policy(args)
+    except ValueError as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 1
+    options = batch.BatchOptions(fmt=args.format, max_chars=args.max_chars, version=args.qr_version,
+                                 policy=policy, compress=args.compress, stable=args.stable, binary=args.binary,
+                                 encoding=None if args.encoding == "auto" else args.encoding,
+                                 box_size=args.box_size, grid=args.grid, overwrite=args.overwrite,
+                                 verify=args.verify)
+    cache = qr_cache.MatrixCache(cache_dir=args.cache_dir) if args.cache_dir else None
+    queue = batch.BatchQueue(args.output_dir, options, args.workers, args.jobs,
+                             args.max_input_mb * 1024 * 1024, cache=cache)
+    try:
+        jobs = queue.add_paths(args.inputs)
+    except OSError as e:
+        print(f"读取输入失败: {e}", file=sys.stderr)
+        return 1
+    if not jobs:
+        print("没有输入文件", file=sys.stderr)
+        return 1
+
+    queue.start()
+    try:
+        while not queue.wait(BATCH_PROGRESS_INTERVAL):
+            if not args.quiet:
+                print(f"\r{batch.format_totals(queue.totals())}", end="", file=sys.stderr)
+    except KeyboardInterrupt:
+        queue.cancel()
+        queue.wait()
+    finally:
+        queue.close()
+
+    if not args.quiet:
+        print(file=sys.stderr)
+        for job in jobs:
+            print(f"{job.name} -> {job.output}: {job.describe()}", file=sys.stderr)
+    print(batch.format_totals(queue.totals()), file=sys.stderr)
+    return 0 if all(job.status == batch.STATUS_DONE for job in jobs) else 1
+
+
+def cmd_serve(args):
+    """serve 子命令：在局域网内提供二维码序列和原始段，手机浏览器打开地址即可接收"""
+    try:
+        args.policy = build_policy(args)
+    except ValueError as e:
+        print(f"参数错误: {e}", file=sys.stderr)
+        return 1
+    try:
+        source = None
+        if args.input != "-":
+            source = file_source.FileSource(args.input, None if args.encoding == "auto" else args.encoding)
+        if args.binary or (source is not None and source.binary):
+            segments, _ = read_binary_frames(source, args)
+        else:
+            chunks = open_input(source, args.encoding)
+            segments = list(qr_core.iter_segments(chunks(), args.max_chars, args.qr_version, compress=args.compress,
+                                                  stable=args.stable, error_correction=args.policy.error_correction))
+    except (OSError, UnicodeDecodeError, LookupError, ValueError) as e:
+        print(f"读取输入失败: {e}", file=sys.stderr)
+        return 1
+    if not segments:
+        print("输入为空，没有生成二维码", file=sys.stderr)
+        return 1
+
+    # 后台编码，已编码的部分立即可以被拉取
+    items = []
+    errors = []
+
+    def encode():
+        cache = qr_cache.MatrixCache(cache_dir=args.cache_dir) if args.cache_dir else None
+        try:
+            matrices = qr_core.iter_qr_matrices(segments, args.workers, cache, args.policy)
+            for segment, matrix in zip(segments, matrices):
+                items.append({"text": segment, "matrix": matrix})
+        except Exception as e:
+            errors.append(e)
+
+    server = qr_server.StreamServer(lambda: (0, items, len(segments)), args.host, args.port, args.box_size)
+    try:
+        server.start()
+    except OSError as e:
+        print(f"启动服务失败: {e}", file=sys.stderr)
+        return 1
+    threading.Thread(target=encode, daemon=True).start()
+    print(f"局域网地址: {server.url}（共 {len(segments)} 个，Ctrl+C 停止）", file=sys.stderr)
+    try:
+        while not errors:
+            time.sleep(SERVE_PROGRESS_INTERVAL)
+            if not args.quiet:
+                print(f"\r已编码 {len(items)}/{len(segments)}，连接 {server.clients} 个，已推送 {server.sent} 个",
+                      end="", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if not args.quiet:
+            print(file=sys.stderr)
+    if errors:
+        print(f"生成二维码时出错: {errors[0]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _part_path(part_dir, index):
+    return os.path.join(part_dir, f"{index:06d}.seg")
+
+
+def load_parts(part_dir, sequence):
+    """读取已接收段的目录，返回已有的序号集合；与当前序列不符时清空"""
+    marker = os.path.join(part_dir, "sequence")
+    if os.path.isdir(part_dir):
+        with open(marker, encoding="utf-8") as f:
+            if f.read() == sequence:
+                return {int(name[:-4]) for name in os.listdir(part_dir) if name.endswith(".seg")}
+        shutil.rmtree(part_dir)
+    os.makedirs(part_dir)
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(sequence)
+    return set()
+
+
+def cmd_pull(args):
+    """pull 子命令：从 serve（或图形界面的局域网服务）接收原始段并还原，断线后再次运行即可续传"""
+    url = urlsplit(args.url if "//" in args.url else "http://" + args.url)
+    host, port = url.hostname, url.port or qr_server.DEFAULT_PORT
+    try:
+        info = json.loads(urlopen(f"http://{host}:{port}/info", timeout=10).read().decode("utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"连接失败: {e}", file=sys.stderr)
+        return 1
+    total = info["total"]
+    if not total:
+        print("服务端没有内容", file=sys.stderr)
+        return 1
+
+    part_dir = args.output + PART_SUFFIX
+    try:
+        received = load_parts(part_dir, info["sequence"])
+    except (OSError, ValueError) as e:
+        print(f"读取已接收的部分失败: {e}", file=sys.stderr)
+        return 1
+    start = 0
+    while start in received:
+        start += 1
+    if received and not args.quiet:
+        print(f"已有 {len(received)}/{total} 个，从第 {start + 1} 个继续", file=sys.stderr)
+
+    def on_frame(index, count, payload):
+        with open(_part_path(part_dir, index), "wb") as f:
+            f.write(payload)
+        received.add(index)
+        if not args.quiet:
+            print(f"\r已接收 {len(received)}/{count}", end="", file=sys.stderr)
+
+    if start < total:
+        try:
+            result, _ = qr_server.pull(host, port, start, qr_server.MODE_RAW, args.limit, on_frame)
+        except (OSError, qr_server.ProtocolError) as e:
+            print(f"\n接收失败: {e}", file=sys.stderr)
+            return 1
+        if not args.quiet:
+            print(file=sys.stderr)
+        if result["sequence"] != info["sequence"]:
+            shutil.rmtree(part_dir)
+            print("服务端重新生成了内容，已丢弃接收的部分，请重新运行", file=sys.stderr)
+            return 1
+    missing = [i for i in range(total) if i not in received]
+    if missing:
+        print(f"已接收 {total - len(missing)}/{total} 个，连接已断开；再次运行同一命令从第 {missing[0] + 1} 个继续",
+              file=sys.stderr)
+        return 1
+
+    payloads = []
+    for index in range(total):
+        with open(_part_path(part_dir, index), "rb") as f:
+            payloads.append(f.read())
+    kind = qr_verify.detect_kind(payloads[0])
+    try:
+        data = qr_verify.reassemble(payloads, kind)
+    except Exception as e:
+        print(f"还原内容失败: {e}", file=sys.stderr)
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(data)
+    shutil.rmtree(part_dir)
+    print(f"已接收 {total} 个（{kind}），{len(data)} 字节 -> {args.output}", file=sys.stderr)
+    return 0
+
+
+def add_encode_options(parser):
+    """encode 和 batch 共用的生成和导出参数"""
+    parser.add_argument("-f", "--format", choices=exporter.FORMATS, default=exporter.FORMAT_PNG,
+                        help="输出格式：png 单独文件、zip 压缩包、pdf 多页文档、sheet 拼图（默认 png）")
+    parser.add_argument("--grid", type=parse_grid, default=exporter.DEFAULT_GRID,
+                        help="pdf/sheet 每页排列 列x行（默认 %dx%d）" % exporter.DEFAULT_GRID)
+    add_segment_options(parser)
+    parser.add_argument("--overwrite", action="store_true",
+                        help="重新写入所有文件（默认跳过清单中记录的、内容和尺寸都相同的PNG，便于中断后继续）")
+    parser.add_argument("--verify", nargs="?", const=qr_verify.VERIFY_MATRIX, default=None,
+                        choices=(qr_verify.VERIFY_MATRIX, qr_verify.VERIFY_IMAGE),
+                        help="生成的同时把每个二维码解码回来，拼接后与输入逐字节比较（不一致时返回1）；"
+                             "image 表示从按 --box-size 绘制的图像解码，同时检查绘制")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出进度信息")
+
+
+def add_segment_options(parser):
+    """分割和编码参数（encode、batch、serve 共用）"""
+    parser.add_argument("--max-chars", type=int, default=qr_core.DEFAULT_MAX_CHARS,
+                        help=f"每个二维码最大字符数（默认 {qr_core.DEFAULT_MAX_CHARS}）")
+    parser.add_argument("--qr-version", type=int, default=None, choices=range(1, 41),
+                        metavar="1-40",
+                        help="按该二维码版本的容量自动分割，尽量装满每个二维码（忽略 --max-chars）")
+    parser.add_argument("--fixed-version", action="store_true",
+                        help="所有二维码都使用 --qr-version 指定的版本（大小一致，编码略快）")
+    parser.add_argument("--ecc", choices=list(qr_core.ECC_LEVELS),
+                        default=qr_core.ecc_name(qr_core.ERROR_CORRECTION),
+                        help="纠错等级：L/M/Q/H 依次更耐污损、容量更小（默认 %(default)s）")
+    parser.add_argument("--mask", type=parse_mask, default=qr_core.MASK_AUTO, metavar="auto|0-7",
+                        help="掩码：auto 按标准规则自动选择（默认），0-7 固定使用该掩码，编码更快")
+    parser.add_argument("--stable", action="store_true",
+                        help="稳定分段：断点由内容决定，修改文字后只有附近的二维码变化（配合 --cache-dir 重新生成更快）")
+    parser.add_argument("--compress", choices=sorted(compression.METHODS), default=None,
+                        help="先压缩再分割（每段带头部，接收端拼接后解压），可大幅减少二维码数量")
+    parser.add_argument("--box-size", type=parse_positive_int, default=qr_core.BOX_SIZE,
+                        help=f"图片中每个模块的像素数（默认 {qr_core.BOX_SIZE}）")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="并行进程数（默认CPU核数，1 表示单进程）")
+    parser.add_argument("--binary", action="store_true",
+                        help="按原始字节分帧编码（字节模式，每帧带序号和CRC校验），可用于任意文件；"
+                             "无法识别为文本的文件自动使用；此时 --max-chars 为每个二维码的字节数")
+    parser.add_argument("--encoding", default="auto",
+                        help="输入文件编码（默认 auto 自动识别 UTF-8/UTF-16/GB18030）")
+    parser.add_argument("--cache-dir", default=None,
+                        help="二维码缓存目录：内容未变的段直接复用上次的编码结果，修改后重新生成更快")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="text-copier",
+                                     description="长文本二维码生成器 - 命令行版")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    encode = subparsers.add_parser("encode", help="将文本文件（或任意文件）编码为二维码PNG序列")
+    encode.add_argument("input", help="输入文件，- 表示标准输入")
+    encode.add_argument("-o", "--output-dir", default=".",
+                        help="输出目录（默认当前目录）；zip/pdf格式时为输出文件路径，"
+                             "指定已存在的目录时在其中保存为 二维码_{总数}.zip/.pdf")
+    encode.add_argument("--estimate", action="store_true",
+                        help="只输出需要的二维码数量和压缩率，不生成图片")
+    add_encode_options(encode)
+    encode.set_defaults(func=cmd_encode)
+
+    batch_parser = subparsers.add_parser("batch", help="批量将多个文件（或目录中的文件）编码为二维码，每个文件单独输出")
+    batch_parser.add_argument("inputs", nargs="+", help="输入文件或目录（目录取其中的文件，不递归）")
+    batch_parser.add_argument("-o", "--output-dir", default=".",
+                              help="输出根目录（默认当前目录），每个文件输出到其中以文件名命名的目录"
+                                   "（zip/pdf格式时为以文件名命名的文件）")
+    batch_parser.add_argument("--jobs", type=int, default=batch.DEFAULT_MAX_JOBS,
+                              help="同时处理的文件数（默认 %(default)s），编码共用 --workers 个进程")
+    batch_parser.add_argument("--max-input-mb", type=int, default=batch.DEFAULT_MAX_INPUT_MB,
+                              help="同时处理的文件总大小上限（MB，默认 %(default)s），超出时排队等待")
+    add_encode_options(batch_parser)
+    batch_parser.set_defaults(func=cmd_batch)
+
+    verify = subparsers.add_parser("verify", help="解码导出的二维码PNG（目录或ZIP），拼接后与原文逐字节比较")
+    verify.add_argument("path", help="encode 输出的PNG目录或ZIP文件")
+    verify.add_argument("input", nargs="?", default=None,
+                        help="原始输入文件（- 表示标准输入）；省略时只解码并拼接，输出内容的SHA-256")
+    verify.add_argument("--encoding", default="auto",
+                        help="原始输入文件的编码（默认 auto 自动识别 UTF-8/UTF-16/GB18030）")
+    verify.add_argument("--workers", type=int, default=None,
+                        help="并行进程数（默认CPU核数，1 表示单进程）")
+    verify.set_defaults(func=cmd_verify)
+
+    serve = subparsers.add_parser("serve", help="在局域网内提供二维码序列，手机浏览器打开地址直接接收（不必逐个扫描）")
+    serve.add_argument("input", help="输入文件，- 表示标准输入")
+    serve.add_argument("--host", default=qr_server.DEFAULT_HOST,
+                       help="监听地址（默认 %(default)s，只接受局域网来源的连接）")
+    serve.add_argument("--port", type=int, default=qr_server.DEFAULT_PORT, help="端口（默认 %(default)s）")
+    add_segment_options(serve)
+    serve.add_argument("-q", "--quiet", action="store_true", help="不输出状态信息")
+    serve.set_defaults(func=cmd_serve)
+
+    pull = subparsers.add_parser("pull", help="从 serve 或图形界面的局域网服务接收原始段并还原为文件（断线后可续传）")
+    pull.add_argument("url", help="服务地址，如 http://192.168.1.5:8765/")
+    pull.add_argument("-o", "--output", required=True, help="输出文件；接收过程中的各段保存在 输出文件.part 目录")
+    pull.add_argument("--limit", type=int, default=None, help="收到这么多段后断开（用于测试续传）")
+    pull.add_argument("-q", "--quiet", action="store_true", help="不输出进度信息")
+    pull.set_defaults(func=cmd_pull)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
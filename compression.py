@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+压缩后再分割，减少二维码数量
+
+文本先用标准库压缩（zlib/lzma/bz2），再转为Base45，使整段内容都落在二维码的
+字母数字模式内（每字符5.5比特），最后按容量切分。每个二维码的内容为::
+
+    "C" + 压缩方式 + 序号 + "/" + 总数 + ":" + Base45片段
+
+例如 ``CD3/12:...`` 表示zlib压缩的第3段（共12段）。接收端按序号拼接所有片段，
+Base45解码后解压即得原文（UTF-8）。头部字符同样属于字母数字模式。
+"""
+
+import bz2
+import lzma
+import zlib
+
+import fountain
+import segmenter
+
+# 压缩方式 -> (头部代码, 创建增量压缩器, 解压函数)
+METHODS = {
+    "zlib": ("D", lambda: zlib.compressobj(9), zlib.decompress),
+    "lzma": ("X", lambda: lzma.LZMACompressor(preset=9), lzma.decompress),
+    "bz2": ("B", lambda: bz2.BZ2Compressor(9), bz2.decompress),
+}
+DEFAULT_METHOD = "lzma"
+_CODE_TO_METHOD = {code: name for name, (code, _, _) in METHODS.items()}
+
+SEGMENT_PREFIX = "C"
+
+
+def _compress(source, method):
+    """增量压缩文本或文本块序列，返回 (压缩后的字节串, 原文UTF-8字节数)"""
+    if method not in METHODS:
+        raise ValueError(f"不支持的压缩方式: {method}")
+    chunks = (source,) if isinstance(source, str) else source
+    compressor = METHODS[method][1]()
+    parts = []
+    raw_size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        raw_size += len(data)
+        parts.append(compressor.compress(data))
+    parts.append(compressor.flush())
+    return b"".join(parts), raw_size
+
+
+def compress_text(source, method):
+    """压缩文本（或按顺序产出文本块的可迭代对象），返回压缩后的字节串"""
+    return _compress(source, method)[0]
+
+
+def _header(method, index, total):
+    return f"{SEGMENT_PREFIX}{METHODS[method][0]}{index}/{total}:"
+
+
+def _segment_chars(max_chars, version, error_correction):
+    """每个二维码可容纳的字母数字字符数"""
+    if version:
+        return segmenter.capacity(version, error_correction, segmenter.MODE_ALPHA_NUM)
+    return max_chars
+
+
+def build_segments(source, method, max_chars, version=None, error_correction=None):
+    """压缩文本（或文本块序列）并切分为带头部的二维码内容列表
+
+    指定version时按该版本字母数字模式的容量切分，否则每段不超过max_chars个字符。
+    """
+    return _split_payload(compress_text(source, method), method, max_chars, version, error_correction)
+
+
+def _split_payload(compressed, method, max_chars, version, error_correction):
+    payload = fountain.base45_encode(compressed)
+    chars = _segment_chars(max_chars, version, error_correction)
+
+    # 头部长度取决于总段数的位数，反复估算直到稳定
+    total = 1
+    while True:
+        body = chars - len(_header(method, total, total))
+        if body < 1:
+            raise ValueError("每个二维码的容量不足以放下压缩段头部")
+        needed = max(1, -(-len(payload) // body))
+        if needed <= total:
+            break
+        total = needed
+
+    body = -(-len(payload) // total)  # 平均分配，避免最后一段过短
+    return [_header(method, i + 1, total) + payload[i * body:(i + 1) * body] for i in range(total)]
+
+
+def decode_segments(segments):
+    """按序号拼接压缩段并解压，返回原文；格式错误时抛出ValueError"""
+    parts = {}
+    method = None
+    total = None
+    for segment in segments:
+        try:
+            header, body = segment.split(":", 1)
+            code = header[1]
+            index, count = (int(n) for n in header[2:].split("/"))
+        except (ValueError, IndexError):
+            raise ValueError(f"无效的压缩段: {segment[:20]!r}")
+        if not header.startswith(SEGMENT_PREFIX) or code not in _CODE_TO_METHOD:
+            raise ValueError(f"无效的压缩段: {segment[:20]!r}")
+        if method is None:
+            method, total = _CODE_TO_METHOD[code], count
+        elif (_CODE_TO_METHOD[code], count) != (method, total):
+            raise ValueError("压缩段不属于同一内容")
+        parts[index] = body
+
+    if total is None or len(parts) != total or set(parts) != set(range(1, total + 1)):
+        raise ValueError("压缩段不完整")
+    payload = "".join(parts[i] for i in range(1, total + 1))
+    return METHODS[method][2](fountain.base45_decode(payload)).decode("utf-8")
+
+
+def estimate(source, method, max_chars, version=None, error_correction=None, plain_count=None):
+    """估算压缩效果，返回统计字典（其中segments为压缩后的二维码内容，可直接用于生成）
+
+    source: 文本或按顺序产出文本块的可迭代对象
+    plain_count: 不压缩时的二维码数量（已知时传入可避免重复分割）
+    """
+    compressed, raw_size = _compress(source, method)
+    segments = _split_payload(compressed, method, max_chars, version, error_correction)
+    return {
+        "method": method,
+        "raw_bytes": raw_size,
+        "compressed_bytes": len(compressed),
+        "ratio": len(compressed) / raw_size if raw_size else 1.0,
+        "codes": len(segments),
+        "plain_codes": plain_count,
+        "segments": segments,
+    }
+
+
+def format_estimate(stats):
+    """生成压缩效果的简要说明"""
+    text = (f"{stats['method']} 压缩: {stats['raw_bytes']} 字节 -> {stats['compressed_bytes']} 字节"
+            f"（{stats['ratio'] * 100:.1f}%），需要 {stats['codes']} 个二维码")
+    if stats.get("plain_codes") is not None:
+        text += f"，不压缩需要 {stats['plain_codes']} 个"
+    return text
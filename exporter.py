@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+批量导出二维码图片
+
+- PNG序列：使用线程池并行完成PNG编码和写盘（PIL压缩时会释放GIL），同一时间只保留
+  少量待写入的图片，内存占用与二维码总数无关。文件先写入临时文件再改名，并在目录中
+  的清单文件里记录每个文件对应的内容和尺寸；中途失败或取消后再次导出时，只跳过与
+  清单一致的文件，其他内容或参数生成的同名文件会重新写入。
+- 单文件归档：ZIP压缩包、多页PDF、拼图PNG（每页多个二维码，便于打印），均边生成边
+  写入，避免大量小文件的文件系统开销。
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+import zlib
+from collections import deque
+
+import qr_core
+
+# 导出格式
+FORMAT_PNG = "png"
+FORMAT_ZIP = "zip"
+FORMAT_PDF = "pdf"
+FORMAT_SHEET = "sheet"
+FORMATS = (FORMAT_PNG, FORMAT_ZIP, FORMAT_PDF, FORMAT_SHEET)
+
+DEFAULT_GRID = (3, 4)  # PDF和拼图每页的列数、行数
+LABEL_HEIGHT = 14  # 拼图中序号文字的高度（像素）
+PDF_PAGE_SIZE = (595, 842)  # A4，单位pt
+PDF_MARGIN = 36
+MANIFEST_NAME = "二维码_清单.json"  # PNG序列目录中记录已写入文件的清单
+MANIFEST_FORMAT = 1
+MANIFEST_FLUSH = 256  # 每写入这么多个文件保存一次清单，进程被强制结束时也能保留大部分进度
+
+
+def _write_png(matrix, file_path, box_size, border):
+    """绘制并保存一个二维码，返回写入的字节数"""
+    tmp_path = file_path + ".part"
+    qr_core.matrix_to_image(matrix, box_size, border).save(tmp_path, "PNG")
+    os.replace(tmp_path, file_path)
+    return os.path.getsize(file_path)
+
+
+def png_key(matrix, box_size, border):
+    """PNG文件的内容标识：模块矩阵（已包含内容、纠错等级、版本和掩码）和像素尺寸的SHA-256"""
+    h = hashlib.sha256(f"{MANIFEST_FORMAT}|{matrix.size}|{box_size}|{border}|".encode("utf-8"))
+    h.update(matrix.data)
+    return h.hexdigest()
+
+
+def load_manifest(save_dir):
+    """读取目录中的清单，返回 {文件名: [内容标识, 文件大小, 修改时间(ns)]}，没有或无法读取时为空"""
+    try:
+        with open(os.path.join(save_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") == MANIFEST_FORMAT and isinstance(data.get("files"), dict):
+            return data["files"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def save_manifest(save_dir, files):
+    """原子地保存清单（先写临时文件再改名）"""
+    file_path = os.path.join(save_dir, MANIFEST_NAME)
+    tmp_path = file_path + ".part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": MANIFEST_FORMAT, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+
+def _file_entry(key, file_path):
+    stat = os.stat(file_path)
+    return [key, stat.st_size, stat.st_mtime_ns]
+
+
+def _matches_manifest(entry, key, file_path):
+    """已有文件是否由相同内容和参数写入，且写入后没有被修改或替换"""
+    if not entry or entry[0] != key:
+        return False
+    try:
+        return _file_entry(key, file_path) == list(entry)
+    except OSError:
+        return False
+
+
+def _default_workers():
+    return min(8, (os.cpu_count() or 1) + 2)
+
+
+def _new_summary(total):
+    return {
+        "total": total,
+        "saved": 0,
+        "skipped": 0,
+        "errors": [],
+        "bytes": 0,
+        "elapsed": 0.0,
+        "cancelled": False,
+    }
+
+
+def _iter_ordered(func, items, workers, cancel_event=None):
+    """在线程池中对items逐个执行func，按原顺序产出 (索引, 结果)，同时最多保留少量结果"""
+    # 线程池、zipfile和PIL在导出时才导入，图形界面启动时只需要本模块的常量
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for i, item in enumerate(items):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            pending.append((i, executor.submit(func, item)))
+            if len(pending) >= workers * 2:
+                index, future = pending.popleft()
+                yield index, future.result()
+        while pending:
+            index, future = pending.popleft()
+            yield index, future.result()
+
+
+def export_png_sequence(matrices, total, save_dir, box_size=qr_core.BOX_SIZE, border=qr_core.BORDER,
+                        workers=None, skip_existing=True, progress=None, cancel_event=None):
+    """把模块矩阵序列导出为 二维码_{i}_{n}.png，返回统计信息字典
+
+    matrices: 按顺序产出BitMatrix的可迭代对象（可以是生成器）
+    total: 二维码总数，用于文件命名
+    skip_existing: 跳过清单中记录的、由相同矩阵和尺寸写入且之后未被修改的文件
+    progress: 可选回调 progress(done, total)，在工作线程中调用
+    cancel_event: 可选threading.Event，置位后停止提交新的任务
+
+    返回字典包含 saved/skipped/errors/total/bytes/elapsed/cancelled，
+    errors为 [(文件名, 错误信息)] 列表。
+    """
+    if workers is None:
+        workers = _default_workers()
+    os.makedirs(save_dir, exist_ok=True)
+
+    summary = _new_summary(total)
+    start = time.perf_counter()
+    max_pending = workers * 2  # 限制同时在内存中的图片数量
+    pending = {}
+    manifest = load_manifest(save_dir)
+    unsaved = [0]  # 上次保存清单后新写入的文件数
+
+    def collect(done_futures):
+        for future in done_futures:
+            filename, key = pending.pop(future)
+            try:
+                summary["bytes"] += future.result()
+                summary["saved"] += 1
+                manifest[filename] = _file_entry(key, os.path.join(save_dir, filename))
+                unsaved[0] += 1
+            except Exception as e:
+                summary["errors"].append((filename, str(e)))
+            if progress is not None:
+                progress(summary["saved"] + summary["skipped"] + len(summary["errors"]), total)
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, matrix in enumerate(matrices):
+                if cancel_event is not None and cancel_event.is_set():
+                    summary["cancelled"] = True
+                    break
+
+                filename = qr_core.qr_filename(i, total)
+                file_path = os.path.join(save_dir, filename)
+                key = png_key(matrix, box_size, border)
+                if skip_existing and _matches_manifest(manifest.get(filename), key, file_path):
+                    summary["skipped"] += 1
+                    if progress is not None:
+                        progress(summary["saved"] + summary["skipped"] + len(summary["errors"]), total)
+                    continue
+                # 写入前先移除旧记录，中途被强制结束时不会把未完成的文件当作已写入
+                manifest.pop(filename, None)
+
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    if unsaved[0] >= MANIFEST_FLUSH:
+                        save_manifest(save_dir, manifest)
+                        unsaved[0] = 0
+
+                pending[executor.submit(_write_png, matrix, file_path, box_size, border)] = (filename, key)
+
+            collect(wait(pending).done)
+    finally:
+        # 取消或出错时也保存已写入的部分，再次导出时跳过
+        try:
+            save_manifest(save_dir, manifest)
+        except OSError as e:
+            summary["errors"].append((MANIFEST_NAME, str(e)))
+
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def _png_bytes(img):
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def archive_name(total, ext):
+    """ZIP/PDF的默认文件名，如 二维码_12.zip"""
+    return f"二维码_{total}{ext}"
+
+
+def archive_path(path, total, ext):
+    """ZIP/PDF的输出路径：path为已存在的目录时在其中使用默认文件名"""
+    if os.path.isdir(path):
+        return os.path.join(path, archive_name(total, ext))
+    return path
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _finish_archive(tmp_path, file_path, summary, cancel_event, start):
+    """取消时删除未完成的归档，否则改名为最终文件"""
+    if cancel_event is not None and cancel_event.is_set():
+        summary["cancelled"] = True
+        _remove_quietly(tmp_path)
+    else:
+        try:
+            os.replace(tmp_path, file_path)
+        except OSError:
+            _remove_quietly(tmp_path)
+            raise
+        summary["bytes"] = os.path.getsize(file_path)
+    summary["path"] = file_path
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def export_zip(matrices, total, zip_path, box_size=qr_core.BOX_SIZE, border=qr_core.BORDER,
+               workers=None, progress=None, cancel_event=None):
+    """把所有二维码PNG写入一个ZIP文件（PNG本身已压缩，ZIP只存储不再压缩）
+
+    zip_path为已存在的目录时写入其中的 二维码_{total}.zip；实际路径见返回字典的 path。
+    """
+    import zipfile
+
+    if workers is None:
+        workers = _default_workers()
+
+    summary = _new_summary(total)
+    start = time.perf_counter()
+    zip_path = archive_path(zip_path, total, ".zip")
+    tmp_path = zip_path + ".part"
+
+    def render(matrix):
+        return _png_bytes(qr_core.matrix_to_image(matrix, box_size, border))
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as zf:
+            for i, data in _iter_ordered(render, matrices, workers, cancel_event):
+                zf.writestr(qr_core.qr_filename(i, total), data)
+                summary["saved"] += 1
+                if progress is not None:
+                    progress(summary["saved"], total)
+    except BaseException:
+        _remove_quietly(tmp_path)  # 出错时不留下未完成的文件
+        raise
+
+    return _finish_archive(tmp_path, zip_path, summary, cancel_event, start)
+
+
+def _iter_pages(matrices, per_page, cancel_event):
+    """把矩阵序列按每页数量分组，产出 (首个索引, 矩阵列表)"""
+    page = []
+    first = 0
+    for i, matrix in enumerate(matrices):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if not page:
+            first = i
+        page.append(matrix)
+        if len(page) == per_page:
+            yield first, page
+            page = []
+    if page:
+        yield first, page
+
+
+def _fit_code(matrix, cell, border):
+    """按整数倍缩放到不超过cell像素的二维码图像"""
+    scale = max(1, cell // (matrix.size + border * 2))
+    return qr_core.matrix_to_image(matrix, scale, border)
+
+
+def render_sheet(matrices, first, total, grid=DEFAULT_GRID, cell=None, border=qr_core.BORDER,
+                 box_size=qr_core.BOX_SIZE):
+    """把一页二维码拼成一张图，每个二维码下方标注序号（cell为None时按box_size计算每格大小）"""
+    columns, rows = grid
+    if cell is None:
+        cell = (matrices[0].size + border * 2) * box_size
+
+    from PIL import Image, ImageDraw
+
+    sheet = Image.new("1", (columns * cell, rows * (cell + LABEL_HEIGHT)), 1)
+    draw = ImageDraw.Draw(sheet)
+    for n, matrix in enumerate(matrices):
+        x = (n % columns) * cell
+        y = (n // columns) * (cell + LABEL_HEIGHT)
+        img = _fit_code(matrix, cell, border)
+        offset = (cell - img.size[0]) // 2
+        sheet.paste(img, (x + offset, y + offset))
+        draw.text((x + cell // 2 - 12, y + cell), f"{first + n + 1}/{total}", fill=0)
+    return sheet
+
+
+def export_sheets(matrices, total, save_dir, grid=DEFAULT_GRID, box_size=qr_core.BOX_SIZE, border=qr_core.BORDER,
+                  workers=None, progress=None, cancel_event=None):
+    """每页拼接多个二维码，保存为 二维码_{起}-{止}_{n}.png（每个模块 box_size 像素）"""
+    if workers is None:
+        workers = _default_workers()
+    os.makedirs(save_dir, exist_ok=True)
+
+    summary = _new_summary(total)
+    start = time.perf_counter()
+    columns, rows = grid
+    cell = None
+
+    def save(page):
+        first, page_matrices, page_cell = page
+        last = first + len(page_matrices)
+        file_path = os.path.join(save_dir, f"二维码_{first + 1}-{last}_{total}.png")
+        tmp_path = file_path + ".part"
+        render_sheet(page_matrices, first, total, grid, page_cell, border).save(tmp_path, "PNG")
+        os.replace(tmp_path, file_path)
+        return len(page_matrices), os.path.getsize(file_path)
+
+    def pages():
+        nonlocal cell
+        for first, page_matrices in _iter_pages(matrices, columns * rows, cancel_event):
+            if cell is None:
+                # 以第一个二维码的尺寸作为每格大小，所有页保持一致
+                cell = (page_matrices[0].size + border * 2) * box_size
+            yield first, page_matrices, cell
+
+    for _, (count, size) in _iter_ordered(save, pages(), workers, cancel_event):
+        summary["saved"] += count
+        summary["bytes"] += size
+        if progress is not None:
+            progress(summary["saved"], total)
+
+    summary["cancelled"] = cancel_event is not None and cancel_event.is_set()
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+class _PdfWriter:
+    """逐页写入的最小PDF生成器，只支持1位黑白图像和简单文字"""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4  # 1: Catalog, 2: Pages, 3: Font
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    def new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % obj_id)
+        self.f.write(body)
+        if stream is not None:
+            self.f.write(b"\nstream\n")
+            self.f.write(stream)
+            self.f.write(b"\nendstream")
+        self.f.write(b"\nendobj\n")
+
+    def add_image(self, img):
+        """写入一个"1"模式图像，返回对象编号"""
+        data = zlib.compress(img.tobytes())
+        obj_id = self.new_id()
+        width, height = img.size
+        self.write_object(obj_id, (
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /DeviceGray /BitsPerComponent 1 /Interpolate false "
+            b"/Filter /FlateDecode /Length %d >>" % (width, height, len(data))), data)
+        return obj_id
+
+    def add_page(self, images, content):
+        """images: {名称: 对象编号}，content: 页面绘制指令"""
+        content = zlib.compress(content)
+        content_id = self.new_id()
+        self.write_object(content_id, b"<< /Filter /FlateDecode /Length %d >>" % len(content), content)
+
+        xobjects = b" ".join(b"/%s %d 0 R" % (name, obj_id) for name, obj_id in images.items())
+        page_id = self.new_id()
+        self.write_object(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> /XObject << %s >> >> /Contents %d 0 R >>"
+            % (PDF_PAGE_SIZE[0], PDF_PAGE_SIZE[1], xobjects, content_id)))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self.write_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self.write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.f.tell()
+        count = self.next_id
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        for obj_id in range(1, count):
+            self.f.write(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self.f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref_offset))
+
+
+def export_pdf(matrices, total, pdf_path, grid=DEFAULT_GRID, border=qr_core.BORDER,
+               progress=None, cancel_event=None):
+    """导出为多页A4 PDF，每页按grid排列二维码并标注序号
+
+    图像以每模块1像素嵌入，由PDF阅读器无插值放大，文件很小且打印清晰。
+    pdf_path为已存在的目录时写入其中的 二维码_{total}.pdf；实际路径见返回字典的 path。
+    """
+    summary = _new_summary(total)
+    start = time.perf_counter()
+    pdf_path = archive_path(pdf_path, total, ".pdf")
+    tmp_path = pdf_path + ".part"
+
+    columns, rows = grid
+    page_width, page_height = PDF_PAGE_SIZE
+    cell_width = (page_width - PDF_MARGIN * 2) / columns
+    cell_height = (page_height - PDF_MARGIN * 2) / rows
+    side = min(cell_width, cell_height - LABEL_HEIGHT) - 6  # 二维码边长（pt）
+
+    try:
+        with open(tmp_path, "wb") as f:
+            writer = _PdfWriter(f)
+            for first, page_matrices in _iter_pages(matrices, columns * rows, cancel_event):
+                images = {}
+                content = []
+                for n, matrix in enumerate(page_matrices):
+                    name = b"Im%d" % n
+                    images[name] = writer.add_image(qr_core.matrix_to_image(matrix, 1, border))
+
+                    x = PDF_MARGIN + (n % columns) * cell_width + (cell_width - side) / 2
+                    top = page_height - PDF_MARGIN - (n // columns) * cell_height
+                    y = top - side
+                    content.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q" % (side, side, x, y, name))
+                    label = f"{first + n + 1}/{total}".encode("ascii")
+                    content.append(b"BT /F1 9 Tf %.2f %.2f Td (%s) Tj ET"
+                                   % (x + side / 2 - len(label) * 2.5, y - 10, label))
+
+                writer.add_page(images, b"\n".join(content))
+                summary["saved"] += len(page_matrices)
+                if progress is not None:
+                    progress(summary["saved"], total)
+            writer.close()
+    except BaseException:
+        _remove_quietly(tmp_path)  # 出错时不留下未完成的文件
+        raise
+
+    return _finish_archive(tmp_path, pdf_path, summary, cancel_event, start)
+
+
+def export_all(fmt, matrices, total, path, box_size=qr_core.BOX_SIZE, grid=DEFAULT_GRID,
+               skip_existing=True, progress=None, cancel_event=None):
+    """按格式导出：png/sheet时path为目录，zip/pdf时path为文件（或已存在的目录，其中使用默认文件名）"""
+    if fmt == FORMAT_PNG:
+        return export_png_sequence(matrices, total, path, box_size=box_size, skip_existing=skip_existing,
+                                   progress=progress, cancel_event=cancel_event)
+    if fmt == FORMAT_ZIP:
+        return export_zip(matrices, total, path, box_size=box_size,
+                          progress=progress, cancel_event=cancel_event)
+    if fmt == FORMAT_PDF:
+        return export_pdf(matrices, total, path, grid=grid, progress=progress, cancel_event=cancel_event)
+    if fmt == FORMAT_SHEET:
+        return export_sheets(matrices, total, path, grid=grid, box_size=box_size,
+                             progress=progress, cancel_event=cancel_event)
+    raise ValueError(f"不支持的导出格式: {fmt}")
+
+
+def format_summary(summary):
+    """生成导出结果的简要说明"""
+    elapsed = summary["elapsed"]
+    rate = summary["saved"] / elapsed if elapsed > 0 else 0.0
+    mb = summary["bytes"] / (1024 * 1024)
+    text = (f"保存 {summary['saved']} 个，跳过已存在 {summary['skipped']} 个，"
+            f"失败 {len(summary['errors'])} 个；"
+            f"耗时 {elapsed:.2f}s，{rate:.1f} 个/秒，{mb:.1f} MB")
+    if summary["cancelled"]:
+        text = "已取消：" + text
+    return text
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+大文件输入
+
+以内存映射方式读取文本文件并自动识别编码，按块把内容直接交给分割器，
+不经过Tkinter文本框，也不一次性把整个文件载入内存。
+"""
+
+import codecs
+import mmap
+import os
+
+import segmenter
+
+# 按顺序尝试的编码（有BOM时直接使用BOM指定的编码）
+CANDIDATE_ENCODINGS = ("utf-8", "gb18030")
+FALLBACK_ENCODING = "latin-1"  # 任何字节序列都能解码
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+PREVIEW_CHARS = 2000  # 预览显示的字符数
+SNIFF_BYTES = 8192  # 判断是否为二进制文件时检查的开头字节数
+
+
+def _scan(data, encoding, chunk_size=segmenter.FILE_CHUNK_SIZE):
+    """用指定编码完整解码一遍，返回字符数；无法解码时抛出UnicodeDecodeError"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    chars = 0
+    for offset in range(0, len(data), chunk_size):
+        chars += len(decoder.decode(data[offset:offset + chunk_size]))
+    chars += len(decoder.decode(b"", final=True))
+    return chars
+
+
+def count_chars(path, encoding):
+    """按指定编码统计文件的字符数"""
+    if os.path.getsize(path) == 0:
+        return 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return _scan(data, encoding)
+
+
+def detect_encoding(path):
+    """识别文件编码，返回 (编码, 字符数)"""
+    if os.path.getsize(path) == 0:
+        return "utf-8", 0
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        head = data[:4]
+        for bom, encoding in _BOMS:
+            if head.startswith(bom):
+                try:
+                    return encoding, _scan(data, encoding)
+                except UnicodeDecodeError:
+                    break
+
+        for encoding in CANDIDATE_ENCODINGS:
+            try:
+                return encoding, _scan(data, encoding)
+            except UnicodeDecodeError:
+                continue
+
+        return FALLBACK_ENCODING, len(data)
+
+
+def looks_binary(path, encoding):
+    """是否应按二进制文件处理：无法按文本编码识别，或开头含有NUL字节（UTF-16/32除外）"""
+    if encoding == FALLBACK_ENCODING:
+        return True
+    if codecs.lookup(encoding).name.startswith(("utf-16", "utf-32")):
+        return False
+    with open(path, "rb") as f:
+        return b"\0" in f.read(SNIFF_BYTES)
+
+
+class FileSource:
+    """已识别编码的输入文件，可反复按块读取"""
+
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.size = os.path.getsize(path)  # 字节数
+        if encoding is None:
+            self.encoding, self.chars = detect_encoding(path)
+            self.binary = looks_binary(path, self.encoding)  # 自动识别为二进制文件
+        else:
+            self.encoding = encoding
+            self.chars = count_chars(path, encoding)
+            self.binary = False
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def iter_chunks(self):
+        """按块产出解码后的文本"""
+        return segmenter.iter_file_chunks(self.path, self.encoding)
+
+    def read_text(self):
+        """读取全部文本（仅在确实需要完整文本时使用）"""
+        return "".join(self.iter_chunks())
+
+    def preview(self, max_chars=PREVIEW_CHARS):
+        """文件开头的一段文本"""
+        parts = []
+        length = 0
+        for chunk in self.iter_chunks():
+            parts.append(chunk[:max_chars - length])
+            length += len(parts[-1])
+            if length >= max_chars:
+                break
+        return "".join(parts)
+
+    def summary(self):
+        """文件信息的简要说明"""
+        if self.size >= 1024 * 1024:
+            size = f"{self.size / (1024 * 1024):.1f} MB"
+        else:
+            size = f"{self.size / 1024:.1f} KB"
+        if self.binary:
+            return f"{self.name} · {size} · 二进制"
+        return f"{self.name} · {size} · {self.encoding} · {self.chars} 个字符"
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+喷泉码（LT码）帧编码与解码
+
+自动播放时把整段内容编码为无限的帧序列：接收端收到任意足够多的帧即可还原全部
+内容，漏扫的帧不需要等待重播。分块数在一百左右时所需帧数约为分块数的1.2~1.4倍，
+分块越多越接近分块数。
+
+帧格式（放入二维码的文本）::
+
+    "LT" + Base45(头部 + 数据块)
+
+头部为大端序 15 字节：版本(1) 分块数K(4) 原文字节数(4) 分块大小(2) 帧序号(4)。
+
+- 帧序号 < K：系统帧，直接携带第“帧序号”个分块
+- 帧序号 >= K：以帧序号为种子，用 xorshift32 伪随机数按鲁棒孤波分布选取度数d，
+  再选出d个不同分块，数据块为它们的异或
+
+Base45（RFC 9285）只使用二维码字母数字模式的字符，比Base64在二维码中更紧凑。
+"""
+
+import bisect
+import math
+import struct
+
+import segmenter
+
+FRAME_PREFIX = "LT"
+FRAME_VERSION = 1
+_HEADER = struct.Struct(">BIIHI")
+
+BASE45_CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_BASE45_INDEX = {ch: i for i, ch in enumerate(BASE45_CHARSET)}
+
+# 鲁棒孤波分布参数
+SOLITON_C = 0.1
+SOLITON_DELTA = 0.5
+
+
+def base45_encode(data):
+    """字节串 -> Base45文本"""
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        chars.append(BASE45_CHARSET[c] + BASE45_CHARSET[d] + BASE45_CHARSET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars.append(BASE45_CHARSET[c] + BASE45_CHARSET[d])
+    return "".join(chars)
+
+
+def base45_decode(text):
+    """Base45文本 -> 字节串，格式错误时抛出ValueError"""
+    try:
+        values = [_BASE45_INDEX[ch] for ch in text]
+    except KeyError as e:
+        raise ValueError(f"无效的Base45字符: {e.args[0]!r}")
+    if len(values) % 3 == 1:
+        raise ValueError("无效的Base45长度")
+
+    out = bytearray()
+    for i in range(0, len(values) - 2, 3):
+        n = values[i] + values[i + 1] * 45 + values[i + 2] * 2025
+        if n > 0xFFFF:
+            raise ValueError("无效的Base45数据")
+        out += n.to_bytes(2, "big")
+    if len(values) % 3 == 2:
+        n = values[-2] + values[-1] * 45
+        if n > 0xFF:
+            raise ValueError("无效的Base45数据")
+        out.append(n)
+    return bytes(out)
+
+
+def xorshift32(seed):
+    """32位xorshift伪随机数生成器（接收端需使用相同算法）"""
+    x = (seed * 2654435761 + 1) & 0xFFFFFFFF or 1
+    while True:
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        yield x
+
+
+def soliton_cdf(k):
+    """K个分块时鲁棒孤波分布的累积分布，cdf[d-1] = P(度数 <= d)"""
+    if k == 1:
+        return [1.0]
+    s = SOLITON_C * math.log(k / SOLITON_DELTA) * math.sqrt(k)
+    pivot = max(1, min(k, int(k / s)))
+    rho = [1.0 / k] + [1.0 / (d * (d - 1)) for d in range(2, k + 1)]
+    tau = [0.0] * k
+    for d in range(1, pivot):
+        tau[d - 1] = s / (k * d)
+    tau[pivot - 1] = s * math.log(s / SOLITON_DELTA) / k if s > SOLITON_DELTA else 0.0
+    weights = [r + t for r, t in zip(rho, tau)]
+    total = sum(weights)
+
+    cdf = []
+    acc = 0.0
+    for w in weights:
+        acc += w / total
+        cdf.append(acc)
+    cdf[-1] = 1.0
+    return cdf
+
+
+def frame_blocks(index, k, cdf):
+    """帧序号对应的分块编号列表"""
+    if index < k:
+        return [index]
+    rng = xorshift32(index)
+    degree = bisect.bisect_left(cdf, next(rng) / 4294967296.0) + 1
+    blocks = []
+    seen = set()
+    while len(blocks) < degree:
+        block = next(rng) % k
+        if block not in seen:
+            seen.add(block)
+            blocks.append(block)
+    return blocks
+
+
+def block_size_for_version(version, error_correction):
+    """目标二维码版本下每帧能携带的数据块字节数"""
+    chars = segmenter.capacity(version, error_correction, segmenter.MODE_ALPHA_NUM) - len(FRAME_PREFIX)
+    # Base45每2字节占3个字符
+    size = (chars // 3) * 2 - _HEADER.size
+    if size < 1:
+        raise ValueError(f"二维码版本 {version} 容量不足以放下喷泉码帧")
+    return min(size, 0xFFFF)
+
+
+class LTEncoder:
+    """把字节串编码为喷泉码帧文本"""
+
+    def __init__(self, data, block_size):
+        if not data:
+            raise ValueError("没有可编码的内容")
+        self.length = len(data)
+        self.block_size = block_size
+        self.k = (self.length + block_size - 1) // block_size
+        padded = data + bytes(self.k * block_size - self.length)
+        self.blocks = [int.from_bytes(padded[i:i + block_size], "big")
+                       for i in range(0, len(padded), block_size)]
+        self.cdf = soliton_cdf(self.k)
+
+    def frame(self, index):
+        """第index帧的二维码文本"""
+        value = 0
+        for block in frame_blocks(index, self.k, self.cdf):
+            value ^= self.blocks[block]
+        header = _HEADER.pack(FRAME_VERSION, self.k, self.length, self.block_size, index)
+        return FRAME_PREFIX + base45_encode(header + value.to_bytes(self.block_size, "big"))
+
+
+class LTDecoder:
+    """接收任意顺序的喷泉码帧并还原原始字节串（参考实现，便于接收端移植和自测）"""
+
+    def __init__(self):
+        self.k = None
+        self.length = None
+        self.block_size = None
+        self.cdf = None
+        self.solved = {}  # 分块编号 -> 数值
+        self.pending = []  # [(未解分块集合, 异或值)]
+        self.received = 0
+
+    @property
+    def done(self):
+        return self.k is not None and len(self.solved) == self.k
+
+    def add_frame(self, text):
+        """加入一帧，全部还原后返回True；帧格式错误时抛出ValueError"""
+        if not text.startswith(FRAME_PREFIX):
+            raise ValueError("不是喷泉码帧")
+        raw = base45_decode(text[len(FRAME_PREFIX):])
+        if len(raw) < _HEADER.size:
+            raise ValueError("喷泉码帧过短")
+        version, k, length, block_size, index = _HEADER.unpack_from(raw)
+        if version != FRAME_VERSION:
+            raise ValueError(f"不支持的喷泉码版本: {version}")
+        if self.k is None:
+            self.k, self.length, self.block_size = k, length, block_size
+            self.cdf = soliton_cdf(k)
+        elif (k, length, block_size) != (self.k, self.length, self.block_size):
+            raise ValueError("喷泉码帧不属于同一内容")
+
+        self.received += 1
+        if self.done:
+            return True
+
+        value = int.from_bytes(raw[_HEADER.size:_HEADER.size + block_size], "big")
+        blocks = set()
+        for block in frame_blocks(index, k, self.cdf):
+            if block in self.solved:
+                value ^= self.solved[block]
+            else:
+                blocks.add(block)
+        if blocks:
+            self._add_equation(blocks, value)
+        return self.done
+
+    def _add_equation(self, blocks, value):
+        """加入方程并用剥离法（peeling）传播已解出的分块"""
+        queue = [(blocks, value)]
+        while queue:
+            blocks, value = queue.pop()
+            blocks = set(blocks)
+            for block in list(blocks):
+                if block in self.solved:
+                    value ^= self.solved[block]
+                    blocks.discard(block)
+            if not blocks:
+                continue
+            if len(blocks) > 1:
+                self.pending.append((blocks, value))
+                continue
+
+            block = blocks.pop()
+            self.solved[block] = value
+            remaining = []
+            for other_blocks, other_value in self.pending:
+                if block in other_blocks:
+                    queue.append((other_blocks, other_value))
+                else:
+                    remaining.append((other_blocks, other_value))
+            self.pending = remaining
+
+    def result(self):
+        """还原的字节串，尚未完成时返回None"""
+        if not self.done:
+            return None
+        data = b"".join(self.solved[i].to_bytes(self.block_size, "big") for i in range(self.k))
+        return data[:self.length]
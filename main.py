@@ -1,10 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import qrcode
-from PIL import Image, ImageTk
-import textwrap
 import os
-import webbrowser
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+# 只在启动时需要的模块在此导入；PIL（ImageTk）、进程池、批量生成、局域网服务、校验、
+# 全文查看器和浏览器等在第一次使用时才导入，缩短启动时间（进程池的工作进程在Windows上
+# 也会重新导入本模块）
+import binary_payload
+import compression
+import exporter
+import file_source
+import fountain
+import perf
+import qr_cache
+import qr_core
+import segmenter
+
+try:
+    # 可选依赖：支持把文件拖入输入框
+    from tkinterdnd2 import TkinterDnD, DND_FILES
+except ImportError:
+    TkinterDnD = None
 
 
 class QRCodeGeneratorApp:
@@ -46,9 +66,68 @@ class QRCodeGeneratorApp:
         self.root.configure(bg=self.bg_color)
 
         # 应用变量
-        self.qr_codes = []  # 存储二维码图片
+        self.qr_codes = []  # 存储二维码的文本段和模块矩阵，预览图按需绘制
+        self.source_text = ""  # 生成二维码时使用的原文
+        self.input_file = None  # 打开的输入文件（FileSource），内容不载入文本框
+        self.load_thread = None  # 识别输入文件编码的线程（需要扫描整个文件）
+        self.load_id = 0  # 每次打开或清空时递增，忽略之前未完成的读取结果
+        self.source_file = None  # 生成二维码时使用的输入文件
+        self.source_compressed = False  # 二维码内容是否为压缩后的数据（不再与原文逐段对应）
+        self.source_binary = False  # 二维码内容是否为二进制帧
         self.current_index = 0  # 当前显示的二维码索引
-        self.max_chars = 800  # 每个二维码最多包含的字符数
+        self.preview_cache = OrderedDict()  # 预览图LRU缓存：索引 -> PhotoImage
+        self.preview_cache_size = 16  # 最多缓存的预览图数量
+        self.max_chars = qr_core.DEFAULT_MAX_CHARS  # 每个二维码最多包含的字符数
+
+        # 输入统计（由文本框的插入/删除操作增量更新，无需读取全文）
+        self.input_chars = 0  # 字符数
+        self.input_bytes = 0  # UTF-8字节数
+        self.count_job = None  # 延迟刷新统计的after任务
+
+        # 后台生成相关变量
+        self.executor = None  # 进程池，首次生成时创建并复用
+        self.result_queue = queue.Queue()  # 工作进程完成结果队列
+        self.generation_state = None  # 当前任务的准备进度（见 prepare_generation），在后台线程中更新
+        self.pending_results = {}  # 已完成但尚未按顺序加入的结果
+        self.generation_id = 0  # 任务编号，用于丢弃已取消任务的结果
+        self.generation_total = 0  # 当前任务的二维码总数
+        self.generating = False  # 是否正在生成
+        self.generation_policy = qr_core.DEFAULT_POLICY  # 当前任务的编码策略（纠错等级、版本、掩码）
+        # 性能统计（设置环境变量 TEXT_COPIER_PERF 等后启用，见 perf.py）
+        self.perf_run = None  # 当前生成任务的分阶段统计
+        self.perf_preview = perf.RunStats("preview", profile=False) if perf.enabled() else None  # 翻页预览
+        # 回环校验：生成的同时把二维码解码回来，完成后与原文逐字节比较
+        self.verifier = None  # 当前任务的校验器（未勾选“生成时校验”时为None）
+        self.verify_thread = None  # 等待校验完成并比较原文的线程
+        self.verify_result = None  # 校验报告或异常
+        # 模块矩阵缓存：修改少量文字后重新生成时只编码变化的段
+        try:
+            self.matrix_cache = qr_cache.MatrixCache(cache_dir=os.environ.get(qr_cache.CACHE_DIR_ENV))
+        except OSError:
+            self.matrix_cache = qr_cache.MatrixCache()
+
+        # 自动播放相关变量
+        self.playing = False  # 是否正在自动播放
+        self.play_job = None  # 下一帧的after任务
+        self.play_encoder = None  # 喷泉码编码器，普通播放时为None
+        self.play_next = 0  # 下一个要提交编码的喷泉码帧序号
+        self.play_futures = deque()  # 已提交编码的喷泉码帧 (帧序号, future)
+        self.play_policy = qr_core.DEFAULT_POLICY  # 喷泉码帧的编码策略
+
+        # 后台导出相关变量
+        self.export_thread = None  # 导出线程
+        self.export_cancel = threading.Event()  # 置位后停止导出
+        self.export_progress = (0, 0)  # 导出进度 (已完成, 总数)
+        self.export_result = None  # 导出结果统计或异常
+        self.export_record = None  # 导出的性能统计（启用时）
+
+        # 批量生成（见 batch.py）
+        self.batch_window = None  # 批量生成窗口
+        self.batch_queue = None  # 最近一次批量任务
+
+        # 局域网服务（见 qr_server.py）：手机浏览器直接拉取当前的二维码序列
+        self.lan_server = None  # 运行中的服务，未启动时为None
+        self.lan_window = None  # 显示访问地址的窗口
 
         # 创建UI
         self.create_widgets()
@@ -56,6 +135,9 @@ class QRCodeGeneratorApp:
         # 居中显示主窗口
         self.center_window(self.root)
 
+        # 关闭窗口时释放进程池
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def create_widgets(self):
         # 创建样式
         style = ttk.Style()
@@ -144,7 +226,12 @@ class QRCodeGeneratorApp:
                                   fg=self.text_color,
                                   insertbackground=self.primary_color)
         self.text_input.pack(fill=tk.BOTH, expand=True)
-        self.text_input.bind("<KeyRelease>", self.update_char_count)
+        self.install_text_proxy()
+
+        # 安装了tkinterdnd2时支持拖入文件
+        if TkinterDnD is not None and hasattr(self.text_input, "drop_target_register"):
+            self.text_input.drop_target_register(DND_FILES)
+            self.text_input.dnd_bind("<<Drop>>", self.on_drop_file)
 
         # 字符计数与最大字符数设置（同一行）
         char_and_max_frame = tk.Frame(input_card, bg="white")
@@ -189,6 +276,195 @@ class QRCodeGeneratorApp:
         )
         max_chars_spinbox.pack(side=tk.LEFT, padx=(5, 0))
 
+        # 按二维码容量分割（忽略最大字符数）
+        tk.Label(char_and_max_frame, text="  ", bg="white").pack(side=tk.LEFT)
+
+        self.fill_capacity_var = tk.BooleanVar(value=False)
+        fill_capacity_check = tk.Checkbutton(
+            char_and_max_frame,
+            text="按容量分割，目标版本:",
+            variable=self.fill_capacity_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        fill_capacity_check.pack(side=tk.LEFT)
+
+        self.qr_version_var = tk.IntVar(value=segmenter.DEFAULT_VERSION)
+        qr_version_spinbox = tk.Spinbox(
+            char_and_max_frame,
+            from_=1, to=40, increment=1,
+            textvariable=self.qr_version_var,
+            width=4,
+            font=("Microsoft YaHei UI", 9),
+            bg="#FAFAFA",
+            fg=self.text_color,
+            relief="flat",
+            bd=0,
+            highlightthickness=1,
+            highlightbackground="#DEE2E6",
+            justify="center"
+        )
+        qr_version_spinbox.pack(side=tk.LEFT, padx=(5, 0))
+
+        # 设置变化时刷新预计数量
+        for var in (self.max_chars_var, self.fill_capacity_var, self.qr_version_var):
+            var.trace_add("write", lambda *args: self.schedule_char_count())
+
+        # 压缩设置（单独一行）
+        compress_frame = tk.Frame(input_card, bg="white")
+        compress_frame.pack(fill=tk.X, pady=(8, 0))
+
+        compress_label = tk.Label(
+            compress_frame,
+            text="先压缩再分割:",
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white"
+        )
+        compress_label.pack(side=tk.LEFT)
+
+        self.compress_methods = {"不压缩": None}
+        for method in compression.METHODS:
+            self.compress_methods[method] = method
+        self.compress_var = tk.StringVar(value="不压缩")
+        compress_combo = ttk.Combobox(compress_frame,
+                                      textvariable=self.compress_var,
+                                      values=list(self.compress_methods),
+                                      state="readonly",
+                                      width=8,
+                                      font=("Microsoft YaHei UI", 9))
+        compress_combo.pack(side=tk.LEFT, padx=(5, 10))
+
+        compress_hint = tk.Label(
+            compress_frame,
+            text="（需要接收端支持解压，生成前会显示压缩率和二维码数量）",
+            font=("Microsoft YaHei UI", 9),
+            fg="#6C757D",
+            bg="white"
+        )
+        compress_hint.pack(side=tk.LEFT)
+
+        # 二进制模式：打开的文件按原始字节编码（无法识别为文本的文件自动使用）
+        self.binary_var = tk.BooleanVar(value=False)
+        binary_check = tk.Checkbutton(
+            compress_frame,
+            text="文件按二进制编码",
+            variable=self.binary_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        binary_check.pack(side=tk.RIGHT)
+
+        # 稳定分段：断点由内容决定，修改后只有附近的二维码变化，其余直接使用缓存
+        self.stable_var = tk.BooleanVar(value=False)
+        stable_check = tk.Checkbutton(
+            compress_frame,
+            text="稳定分段",
+            variable=self.stable_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        stable_check.pack(side=tk.RIGHT, padx=(0, 10))
+
+        # 生成时校验：把每个二维码解码回来，拼接后与原文逐字节比较
+        self.verify_var = tk.BooleanVar(value=False)
+        verify_check = tk.Checkbutton(
+            compress_frame,
+            text="生成时校验",
+            variable=self.verify_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        verify_check.pack(side=tk.RIGHT, padx=(0, 10))
+        self.binary_var.trace_add("write", lambda *args: self.schedule_char_count())
+
+        # 编码策略：纠错等级、掩码、固定版本（在容量和编码速度之间取舍）
+        policy_frame = tk.Frame(input_card, bg="white")
+        policy_frame.pack(fill=tk.X, pady=(8, 0))
+
+        tk.Label(
+            policy_frame,
+            text="纠错等级:",
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white"
+        ).pack(side=tk.LEFT)
+
+        self.ecc_levels = {f"{name}（约{qr_core.ECC_RECOVERY[level]}%）": level
+                           for name, level in qr_core.ECC_LEVELS.items()}
+        default_ecc = next(label for label, level in self.ecc_levels.items()
+                           if level == qr_core.ERROR_CORRECTION)
+        self.ecc_var = tk.StringVar(value=default_ecc)
+        ecc_combo = ttk.Combobox(policy_frame,
+                                 textvariable=self.ecc_var,
+                                 values=list(self.ecc_levels),
+                                 state="readonly",
+                                 width=9,
+                                 font=("Microsoft YaHei UI", 9))
+        ecc_combo.pack(side=tk.LEFT, padx=(5, 10))
+
+        tk.Label(
+            policy_frame,
+            text="掩码:",
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white"
+        ).pack(side=tk.LEFT)
+
+        self.mask_options = {"自动选择": qr_core.MASK_AUTO}
+        for mask in qr_core.MASK_PATTERNS:
+            self.mask_options[f"固定 {mask}"] = mask
+        self.mask_var = tk.StringVar(value="自动选择")
+        mask_combo = ttk.Combobox(policy_frame,
+                                  textvariable=self.mask_var,
+                                  values=list(self.mask_options),
+                                  state="readonly",
+                                  width=8,
+                                  font=("Microsoft YaHei UI", 9))
+        mask_combo.pack(side=tk.LEFT, padx=(5, 10))
+
+        # 固定版本：所有二维码都使用目标版本（需勾选按容量分割）
+        self.fixed_version_var = tk.BooleanVar(value=False)
+        fixed_version_check = tk.Checkbutton(
+            policy_frame,
+            text="固定为目标版本",
+            variable=self.fixed_version_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        fixed_version_check.pack(side=tk.LEFT)
+
+        # 当前策略在容量和速度上的取舍
+        self.policy_hint = tk.Label(
+            input_card,
+            text="",
+            font=("Microsoft YaHei UI", 9),
+            fg="#6C757D",
+            bg="white",
+            anchor="w",
+            justify=tk.LEFT,
+            wraplength=700
+        )
+        self.policy_hint.pack(fill=tk.X, pady=(4, 0))
+
+        for var in (self.ecc_var, self.mask_var, self.fixed_version_var):
+            var.trace_add("write", lambda *args: self.schedule_char_count())
+
         # 按钮区域
         button_frame = tk.Frame(input_card, bg="white")
         button_frame.pack(fill=tk.X, pady=(15, 0))
@@ -206,6 +482,30 @@ class QRCodeGeneratorApp:
                                       cursor="hand2")
         self.generate_btn.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.open_file_btn = tk.Button(button_frame,
+                                       text="打开文件",
+                                       command=self.open_file,
+                                       font=("Microsoft YaHei UI", 10),
+                                       bg=self.primary_color,
+                                       fg="white",
+                                       relief="flat",
+                                       padx=15,
+                                       pady=6,
+                                       cursor="hand2")
+        self.open_file_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.batch_btn = tk.Button(button_frame,
+                                   text="批量生成",
+                                   command=self.show_batch_window,
+                                   font=("Microsoft YaHei UI", 10),
+                                   bg=self.primary_color,
+                                   fg="white",
+                                   relief="flat",
+                                   padx=15,
+                                   pady=6,
+                                   cursor="hand2")
+        self.batch_btn.pack(side=tk.LEFT, padx=(0, 10))
+
         self.show_text_btn = tk.Button(button_frame,
                                        text="展示全部",
                                        command=self.show_full_text,
@@ -309,6 +609,31 @@ class QRCodeGeneratorApp:
         download_btn_frame = tk.Frame(nav_frame, bg="white")
         download_btn_frame.pack(side=tk.RIGHT)
 
+        # 下载图片尺寸：每个模块的像素数
+        export_scale_label = tk.Label(download_btn_frame,
+                                      text="像素/模块:",
+                                      font=("Microsoft YaHei UI", 9),
+                                      fg=self.text_color,
+                                      bg="white")
+        export_scale_label.pack(side=tk.LEFT)
+
+        self.export_scale_var = tk.IntVar(value=qr_core.BOX_SIZE)
+        export_scale_spinbox = tk.Spinbox(
+            download_btn_frame,
+            from_=1, to=40, increment=1,
+            textvariable=self.export_scale_var,
+            width=4,
+            font=("Microsoft YaHei UI", 9),
+            bg="#FAFAFA",
+            fg=self.text_color,
+            relief="flat",
+            bd=0,
+            highlightthickness=1,
+            highlightbackground="#DEE2E6",
+            justify="center"
+        )
+        export_scale_spinbox.pack(side=tk.LEFT, padx=(5, 10))
+
         self.download_single_btn = tk.Button(download_btn_frame,
                                              text="下载当前",
                                              command=self.download_single_qr,
@@ -322,6 +647,22 @@ class QRCodeGeneratorApp:
                                              cursor="hand2")
         self.download_single_btn.pack(side=tk.LEFT, padx=(0, 5))
 
+        # 批量下载格式
+        self.export_formats = {
+            "PNG文件": exporter.FORMAT_PNG,
+            "ZIP压缩包": exporter.FORMAT_ZIP,
+            "PDF文档": exporter.FORMAT_PDF,
+            "拼图PNG": exporter.FORMAT_SHEET,
+        }
+        self.export_format_var = tk.StringVar(value="PNG文件")
+        export_format_combo = ttk.Combobox(download_btn_frame,
+                                           textvariable=self.export_format_var,
+                                           values=list(self.export_formats),
+                                           state="readonly",
+                                           width=9,
+                                           font=("Microsoft YaHei UI", 9))
+        export_format_combo.pack(side=tk.LEFT, padx=(0, 5))
+
         self.download_all_btn = tk.Button(download_btn_frame,
                                           text="下载全部",
                                           command=self.download_all_qr,
@@ -335,6 +676,72 @@ class QRCodeGeneratorApp:
                                           cursor="hand2")
         self.download_all_btn.pack(side=tk.LEFT)
 
+        # 自动播放控制区域
+        play_frame = tk.Frame(qr_card, bg="white")
+        play_frame.pack(fill=tk.X, pady=(8, 0))
+
+        self.play_btn = tk.Button(play_frame,
+                                  text="自动播放",
+                                  command=self.toggle_playback,
+                                  state=tk.DISABLED,
+                                  font=("Microsoft YaHei UI", 9),
+                                  bg=self.primary_color,
+                                  fg="white",
+                                  relief="flat",
+                                  padx=12,
+                                  pady=4,
+                                  cursor="hand2")
+        self.play_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        fps_label = tk.Label(play_frame,
+                             text="每秒帧数:",
+                             font=("Microsoft YaHei UI", 9),
+                             fg=self.text_color,
+                             bg="white")
+        fps_label.pack(side=tk.LEFT)
+
+        self.fps_var = tk.IntVar(value=5)
+        fps_spinbox = tk.Spinbox(
+            play_frame,
+            from_=1, to=30, increment=1,
+            textvariable=self.fps_var,
+            width=4,
+            font=("Microsoft YaHei UI", 9),
+            bg="#FAFAFA",
+            fg=self.text_color,
+            relief="flat",
+            bd=0,
+            highlightthickness=1,
+            highlightbackground="#DEE2E6",
+            justify="center"
+        )
+        fps_spinbox.pack(side=tk.LEFT, padx=(5, 10))
+
+        self.fountain_var = tk.BooleanVar(value=False)
+        fountain_check = tk.Checkbutton(
+            play_frame,
+            text="喷泉码（接收端收到任意足够多的帧即可还原）",
+            variable=self.fountain_var,
+            font=("Microsoft YaHei UI", 9),
+            fg=self.text_color,
+            bg="white",
+            activebackground="white",
+            highlightthickness=0
+        )
+        fountain_check.pack(side=tk.LEFT)
+
+        self.lan_btn = tk.Button(play_frame,
+                                 text="局域网服务",
+                                 command=self.show_lan_window,
+                                 font=("Microsoft YaHei UI", 9),
+                                 bg=self.secondary_color,
+                                 fg="white",
+                                 relief="flat",
+                                 padx=12,
+                                 pady=4,
+                                 cursor="hand2")
+        self.lan_btn.pack(side=tk.RIGHT)
+
         # 状态栏
         status_frame = tk.Frame(self.root, bg="#E9ECEF")
         status_frame.pack(side=tk.BOTTOM, fill=tk.X)
@@ -350,6 +757,10 @@ class QRCodeGeneratorApp:
                                    pady=5)
         self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # 导出进度条（仅在批量下载时显示，第一次下载时创建）
+        self.status_frame = status_frame
+        self.progress_bar = None
+
         # 版权信息
         copyright_label = tk.Label(status_frame,
                                    text="© 2025 xuzhenkang",
@@ -368,98 +779,570 @@ class QRCodeGeneratorApp:
         copyright_label.bind("<Enter>", lambda e: copyright_label.config(fg="#005A9E"))  # 悬停时变深蓝色
         copyright_label.bind("<Leave>", lambda e: copyright_label.config(fg="#007ACC"))  # 离开时恢复原色
 
+    def install_text_proxy(self):
+        """拦截文本框的insert/delete/replace命令，增量统计字符数和字节数
+
+        打字、粘贴、程序修改都会经过这里，统计时只读取被删除的那一段，不复制全文。
+        """
+        widget = str(self.text_input)
+        original = widget + "_orig"
+        self.root.tk.call("rename", widget, original)
+
+        def proxy(*args):
+            command = args[0] if args else ""
+            if command in ("delete", "replace"):
+                # delete index1 ?index2 ...?，只给出一个索引时删除该位置的一个字符
+                start = args[1]
+                end = args[2] if len(args) > 2 else start + "+1c"
+                # 文本框末尾的换行符不会被删除
+                if self.root.tk.call(original, "compare", end, ">", "end-1c"):
+                    end = "end-1c"
+                removed = self.root.tk.call(original, "get", start, end)
+                self.input_chars -= len(removed)
+                self.input_bytes -= len(removed.encode("utf-8", "surrogatepass"))
+            if command in ("insert", "replace"):
+                # insert index chars ?tagList chars tagList ...?
+                first = 2 if command == "insert" else 3
+                for chars in args[first::2]:
+                    self.input_chars += len(chars)
+                    self.input_bytes += len(chars.encode("utf-8", "surrogatepass"))
+
+            result = self.root.tk.call((original,) + args)
+            if command in ("insert", "delete", "replace"):
+                self.schedule_char_count()
+            return result
+
+        self.root.tk.createcommand(widget, proxy)
+
+    def schedule_char_count(self, delay=200):
+        """输入停顿后再刷新统计，连续输入时不重复计算"""
+        if self.count_job is not None:
+            self.root.after_cancel(self.count_job)
+        self.count_job = self.root.after(delay, self.update_char_count)
+
     def update_char_count(self, event=None):
-        """更新字符计数标签"""
-        text = self.text_input.get("1.0", tk.END).strip()
-        count = len(text)
-        self.char_count.config(text=f"字符数: {count}")
+        """更新字符计数标签和预计的二维码数量"""
+        self.count_job = None
+        policy = self.get_policy()
+        try:
+            self.policy_hint.config(text=qr_core.describe_policy(policy, self.get_target_version()))
+        except ValueError as e:
+            self.policy_hint.config(text=str(e))
+        if self.is_binary_input():
+            # 二进制文件：按字节数计算帧数
+            label = f"文件: {self.input_file.summary()}"
+            if self.input_file.size:
+                try:
+                    max_bytes = max(1, int(self.max_chars_var.get()))
+                except Exception:
+                    max_bytes = self.max_chars
+                try:
+                    codes = binary_payload.estimate_codes(self.input_file.size, max_bytes,
+                                                          self.get_target_version(), policy.error_correction)
+                    label += f" · 按二进制帧预计 {codes} 个二维码"
+                except ValueError as e:
+                    label += f" · {e}"
+            self.char_count.config(text=label)
+            state = tk.NORMAL if self.input_file.size or self.generating else tk.DISABLED
+            self.generate_btn.config(state=state)
+            return
+
+        if self.input_file is not None:
+            # 文件输入：文本框中只有预览，按文件统计（字节数以文件大小近似）
+            count = self.input_file.chars
+            nbytes = self.input_file.size
+            label = f"文件: {self.input_file.summary()}"
+        else:
+            count = max(0, self.input_chars)
+            nbytes = self.input_bytes
+            label = f"字符数: {count}"
 
-        # 根据文本长度启用/禁用生成按钮
         if count > 0:
+            try:
+                max_chars = max(1, int(self.max_chars_var.get()))
+            except Exception:
+                max_chars = self.max_chars
+            codes, version = segmenter.estimate_codes(count, nbytes, max_chars,
+                                                      self.get_target_version(), policy.error_correction)
+            if version is None:
+                label += f" · 预计 {codes} 个二维码（单个超出最大容量，请减小最大字符数）"
+            else:
+                label += f" · 预计约 {codes} 个二维码（版本≈{version}）"
+        self.char_count.config(text=label)
+
+        # 根据文本长度启用/禁用生成按钮（生成过程中为取消按钮，保持可用）
+        if count > 0 or self.generating:
             self.generate_btn.config(state=tk.NORMAL)
         else:
             self.generate_btn.config(state=tk.DISABLED)
 
     def generate_qr_codes(self):
-        """生成二维码"""
-        text = self.text_input.get("1.0", tk.END).strip()
-        if not text:
-            messagebox.showwarning("输入错误", "请输入要生成二维码的文本内容")
-            return
-
-        # 处理代理对字符
-        try:
-            text = text.encode('utf-16', 'surrogatepass').decode('utf-16')
-        except Exception as e:
-            messagebox.showerror("编码错误", f"文本包含无法识别的字符：\n{str(e)}")
+        """生成二维码（在后台线程中分割，进程池中并行编码）"""
+        if self.generating or self.load_thread is not None:
             return
+        self.stop_playback()
+
+        source_file = self.input_file
+        binary = self.is_binary_input()
+        text = ""
+        if source_file is None:
+            text = self.text_input.get("1.0", tk.END).strip()
+            if not text:
+                messagebox.showwarning("输入错误", "请输入要生成二维码的文本内容")
+                return
+
+            # 处理代理对字符
+            try:
+                text = qr_core.normalize_text(text)
+            except Exception as e:
+                messagebox.showerror("编码错误", f"文本包含无法识别的字符：\n{str(e)}")
+                return
 
         # 读取最新的最大字符数
         try:
             self.max_chars = int(self.max_chars_var.get())
         except Exception:
-            self.max_chars = 800  # fallback
-
-        self.status_bar.config(text="正在生成二维码...")
-        self.root.update()
+            self.max_chars = qr_core.DEFAULT_MAX_CHARS  # fallback
+
+        # 界面上的设置在这里读取，后台线程不访问界面
+        policy = self.get_policy()
+        max_chars = self.max_chars
+        version = self.get_target_version()
+        stable = self.stable_var.get()
+        run = None
+        if perf.enabled():
+            run = perf.RunStats("generate", binary=binary, ecc=qr_core.ecc_name(policy.error_correction),
+                                version=policy.version, mask=policy.mask)
+
+        # 分割长文本（文件输入时按块流式读取分割，二进制文件按原始字节分帧）
+        if binary:
+            def split():
+                return binary_payload.split_file(source_file.path, max_chars, version, policy.error_correction)
+        elif source_file is None:
+            def split():
+                return qr_core.split_segments(text, max_chars, version, stable=stable,
+                                              error_correction=policy.error_correction)
+        else:
+            def split():
+                # 生成器：后台线程逐段取出，可以显示进度和中途取消
+                return qr_core.iter_segments(source_file.iter_chunks(), max_chars, version, stable=stable,
+                                             error_correction=policy.error_correction)
+
+        # 压缩：分割后在后台线程中估算压缩效果，再回到界面由用户决定是否使用
+        method = self.compress_methods.get(self.compress_var.get())
+        if method and not binary:
+            def compress(plain_count):
+                source = text if source_file is None else source_file.iter_chunks()
+                return compression.estimate(source, method, max_chars, version, policy.error_correction,
+                                            plain_count)
+        else:
+            compress = None
 
         try:
             # 清空现有二维码
             self.qr_codes = []
+            self.source_text = text
+            self.source_file = source_file
+            self.source_compressed = False  # 用户选择使用压缩后由 poll_generation 更新
+            self.source_binary = binary
             self.current_index = 0
+            self.pending_results = {}
+            self.preview_cache.clear()
 
-            # 分割长文本
-            segments = self.split_text(text)
+            self.ensure_executor()
 
-            # 为每个文本段生成二维码
-            for i, segment in enumerate(segments):
-                qr = qrcode.QRCode(
-                    version=None,
-                    error_correction=qrcode.constants.ERROR_CORRECT_M,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(segment)
-                qr.make(fit=True)
-
-                # 创建二维码图像并转换为PhotoImage
-                img = qr.make_image(fill_color="black", back_color="white")
-                original_img = img.copy()  # 保存原始图像用于下载
-                img = img.resize((350, 350), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-
-                # 存储二维码和相关信息
-                self.qr_codes.append({
-                    "photo": photo,
-                    "original_image": original_img,  # 保存原始图像
-                    "text": segment,
-                    "index": i,
-                    "total": len(segments)
-                })
-
-            # 显示第一个二维码
-            if self.qr_codes:
-                self.show_current_qr()
-                self.update_nav_buttons()
-
-            self.status_bar.config(text=f"已生成 {len(segments)} 个二维码")
+            # 在后台线程中分割并提交任务，完成的结果通过队列回传给UI线程
+            self.generation_id += 1
+            self.generation_total = 0  # 分割完成后才知道
+            self.generation_policy = policy
+            self.perf_run = run
+            self.verifier = None  # 知道是否压缩后在 poll_generation 中创建
         except Exception as e:
+            if run is not None:
+                run.finish(error=str(e))
+                self.perf_run = None
             messagebox.showerror("生成错误", f"生成二维码时出错:\n{str(e)}")
             self.status_bar.config(text="生成失败")
+            return
 
-    def split_text(self, text):
-        """将长文本分割为多个段落"""
-        segments = []
+        # stage: split -> compress -> confirm（等待用户选择是否压缩）-> asked（已显示对话框）-> submit；
+        # total: 要编码的段数（提交前为None）；split/chars: 已分割和总共的字符数；
+        # stats: 压缩预估，用户的选择写入 use_compressed 后置位 answered；hits: 直接使用缓存的段数
+        chars = 0 if binary else len(text) if source_file is None else source_file.chars
+        self.generation_state = {"stage": "split", "total": None, "split": 0, "chars": chars, "stats": None,
+                                 "use_compressed": False, "answered": threading.Event(),
+                                 "verify": self.verify_var.get(), "hits": 0, "futures": [], "error": None,
+                                 "cancel": threading.Event()}
+        threading.Thread(target=self.prepare_generation, daemon=True,
+                         args=(self.generation_id, self.generation_state, split, compress, policy, run)).start()
+
+        self.set_generating(True)
+        self.status_bar.config(text="正在分割文本...")
+        self.root.after(50, self.poll_generation)
+
+    def prepare_generation(self, generation_id, state, split, compress, policy, run):
+        """后台线程：分割内容、估算压缩效果（compress不为None时）、查找缓存，其余的段提交给进程池编码
+
+        不访问界面，进度和错误记录在state中，结果通过 result_queue 交给 poll_generation。
+        """
+        try:
+            segments = []
+            with perf.measure(run, "split"):
+                for segment in split():
+                    if state["cancel"].is_set():
+                        return
+                    segments.append(segment)
+                    state["split"] += len(segment)
+            if compress is not None and segments:
+                # 复用上面的分割结果作为不压缩时的数量，不再重复分割
+                state["stage"] = "compress"
+                with perf.measure(run, "compress"):
+                    state["stats"] = compress(len(segments))
+                state["stage"] = "confirm"
+                state["answered"].wait()
+                if state["cancel"].is_set():
+                    return
+                if state["use_compressed"]:
+                    segments = state["stats"]["segments"]
+            state["stage"] = "submit"
+            state["total"] = len(segments)
+            for i, segment in enumerate(segments):
+                if state["cancel"].is_set():
+                    return
+                # 内容和参数都未变的段直接使用缓存的矩阵
+                matrix = self.matrix_cache.get(segment, policy)
+                if matrix is not None:
+                    state["hits"] += 1
+                    self.result_queue.put((generation_id, i, segment, None, matrix))
+                    continue
+                if run is None:
+                    future = self.executor.submit(qr_core.make_qr_matrix, segment, policy)
+                else:
+                    # 在工作进程中测量编码耗时，结果为 (矩阵, 秒数)
+                    future = self.executor.submit(perf.timed_call, qr_core.make_qr_matrix, segment, policy)
+                future.add_done_callback(
+                    lambda f, idx=i, seg=segment: self.result_queue.put((generation_id, idx, seg, f, None)))
+                state["futures"].append(future)
+        except Exception as e:
+            state["error"] = e
+
+    def poll_generation(self):
+        """轮询工作进程结果，按顺序加入二维码列表并刷新进度"""
+        if not self.generating:
+            return
+
+        state = self.generation_state
+        if state["error"] is not None:
+            self.fail_generation("生成错误", f"生成二维码时出错:\n{str(state['error'])}")
+            return
+        if not self.generation_total:
+            if state["total"] is None:
+                if state["stage"] == "confirm":
+                    self.confirm_compression(state)
+                elif state["stage"] == "compress":
+                    self.status_bar.config(text="正在估算压缩效果...")
+                elif state["chars"]:
+                    percent = min(100, state["split"] * 100 // state["chars"])
+                    self.status_bar.config(text=f"正在分割文本... {percent}%")
+                self.root.after(50, self.poll_generation)
+                return
+            if not state["total"]:
+                self.fail_generation("输入错误", "文件内容为空", warning=True)
+                return
+            self.generation_total = state["total"]
+            self.source_compressed = state["use_compressed"]
+            if state["verify"]:
+                import qr_verify
+
+                kind = qr_verify.KIND_BINARY if self.source_binary else \
+                    qr_verify.KIND_COMPRESSED if self.source_compressed else qr_verify.KIND_TEXT
+                self.verifier = qr_verify.LoopbackVerifier(kind, executor=self.executor)
+
+        try:
+            while True:
+                gid, index, segment, future, matrix = self.result_queue.get_nowait()
+                if gid != self.generation_id:
+                    continue
+                if future is not None:
+                    if future.cancelled():
+                        continue
+                    matrix = future.result()
+                    if self.perf_run is not None:
+                        matrix, seconds = matrix
+                        self.perf_run.add("encode", seconds, worker=True)
+                    self.matrix_cache.put(segment, matrix, self.generation_policy)
+                self.pending_results[index] = (segment, matrix)
+        except queue.Empty:
+            pass
+        except Exception as e:
+            self.fail_generation("生成错误", f"生成二维码时出错:\n{str(e)}")
+            return
+
+        # 按顺序把已完成的结果加入列表
+        added = False
+        while len(self.qr_codes) in self.pending_results:
+            i = len(self.qr_codes)
+            segment, matrix = self.pending_results.pop(i)
+            if self.verifier is not None:
+                self.verifier.submit(i, segment, matrix)
+            self.qr_codes.append({
+                "matrix": matrix,  # 按位打包的模块矩阵，用于绘制预览和下载
+                "text": segment,
+                "index": i,
+                "total": self.generation_total
+            })
+            added = True
+
+        if added:
+            if len(self.qr_codes) == 1:
+                self.show_current_qr()
+            self.update_nav_buttons()
+
+        done = len(self.qr_codes)
+        if done >= self.generation_total:
+            self.set_generating(False)
+            self.update_nav_buttons()
+            text = f"已生成 {done} 个二维码"
+            if state["hits"]:
+                text += f"（其中 {state['hits']} 个内容未变，直接使用缓存）"
+            if self.perf_run is not None:
+                record = self.perf_run.finish(codes=done, cache_hits=state["hits"])
+                self.perf_run = None
+                text += f"；{perf.summary_text(record)}"
+            self.status_bar.config(text=text)
+            if self.verifier is not None:
+                self.start_verification(text)
+            return
+
+        self.status_bar.config(text=f"正在生成二维码... {done}/{self.generation_total}")
+        self.root.after(50, self.poll_generation)
+
+    def cancel_generation(self, silent=False):
+        """取消正在进行的生成任务"""
+        if not self.generating:
+            return
+
+        state = self.generation_state
+        state["cancel"].set()  # 停止后台线程提交剩余的段
+        state["answered"].set()  # 后台线程可能在等待是否压缩的选择
+        for future in list(state["futures"]):
+            future.cancel()
+        self.pending_results = {}
+        self.generation_id += 1  # 丢弃仍在运行的任务结果
+        # 保留的部分二维码以实际数量作为总数
+        self.generation_total = len(self.qr_codes)
+        for qr_data in self.qr_codes:
+            qr_data["total"] = self.generation_total
+        if self.perf_run is not None:
+            self.perf_run.finish(codes=len(self.qr_codes), cancelled=True)
+            self.perf_run = None
+        if self.verifier is not None:
+            self.verifier.close()
+            self.verifier = None
+        self.set_generating(False)
+        self.update_nav_buttons()
+
+        if not silent:
+            self.status_bar.config(text=f"已取消生成，保留 {len(self.qr_codes)} 个二维码")
+
+    def confirm_compression(self, state):
+        """显示后台估算的压缩效果，由用户决定是否使用，然后让后台线程继续"""
+        state["stage"] = "asked"
+        with perf.measure(self.perf_run, "confirm"):
+            state["use_compressed"] = messagebox.askyesno(
+                "压缩预估", f"{compression.format_estimate(state['stats'])}\n\n"
+                            "是否使用压缩后的内容生成二维码？\n"
+                            "（选择“否”将生成不压缩的二维码）")
+        state["answered"].set()
+        self.status_bar.config(text="正在准备生成...")
+
+    def fail_generation(self, title, message, warning=False):
+        """后台分割或编码出错时停止生成并提示"""
+        if self.perf_run is not None:
+            self.perf_run.finish(error=message)
+            self.perf_run = None
+        self.cancel_generation(silent=True)
+        if warning:
+            messagebox.showwarning(title, message)
+        else:
+            messagebox.showerror(title, message)
+        self.status_bar.config(text="生成失败")
+
+    def start_verification(self, status):
+        """在后台线程中等待校验完成，拼接解码内容并与原文比较"""
+        import qr_verify
+
+        verifier = self.verifier
+        self.verifier = None
+        if self.source_binary:
+            expected = qr_verify.iter_file_bytes(self.source_file.path)
+        elif self.source_file is not None:
+            expected = self.source_file.iter_chunks()
+        else:
+            expected = (self.source_text,)
+        self.verify_result = None
+
+        def run():
+            try:
+                self.verify_result = verifier.finish(expected)
+            except Exception as e:
+                self.verify_result = e
+
+        self.verify_thread = threading.Thread(target=run, daemon=True)
+        self.verify_thread.start()
+        self.status_bar.config(text=f"{status}；正在校验...")
+        self.root.after(100, self.poll_verification, self.generation_id, status)
+
+    def poll_verification(self, generation_id, status):
+        """校验完成后在状态栏显示结果，失败时列出出错的二维码"""
+        import qr_verify
+
+        if self.verify_thread is not None and self.verify_thread.is_alive():
+            self.root.after(100, self.poll_verification, generation_id, status)
+            return
+        self.verify_thread = None
+        result = self.verify_result
+        if generation_id != self.generation_id:
+            return  # 已开始新的生成任务
+        if isinstance(result, Exception):
+            self.status_bar.config(text=f"{status}；校验出错")
+            messagebox.showerror("校验错误", f"校验二维码时出错:\n{str(result)}")
+            return
+        self.status_bar.config(text=f"{status}；{qr_verify.format_report(result)}")
+        if not result["match"] or result["failed_count"]:
+            details = "\n".join(qr_verify.format_failures(result)[:10])
+            messagebox.showerror("校验失败", f"{qr_verify.format_report(result)}\n\n{details}".strip())
+
+    def ensure_executor(self):
+        """首次需要时创建进程池，之后复用"""
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return self.executor
+
+    def set_generating(self, generating):
+        """切换生成按钮为“取消生成”或恢复原状"""
+        self.generating = generating
+        if generating:
+            self.generate_btn.config(text="取消生成", command=self.cancel_generation,
+                                     bg=self.warning_color)
+        else:
+            self.generate_btn.config(text="生成二维码", command=self.generate_qr_codes,
+                                     bg=self.primary_color)
+
+    def on_close(self):
+        """关闭窗口前停止后台任务"""
+        self.cancel_generation(silent=True)
+        self.stop_playback()
+        self.export_cancel.set()
+        if self.batch_queue is not None:
+            self.batch_queue.cancel()
+        self.stop_lan_server()
+        if self.perf_preview is not None and self.perf_preview.stages:
+            self.perf_preview.finish(codes=self.perf_preview.stages["render"][1])
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.root.destroy()
+
+    def open_file(self):
+        """选择要生成二维码的文本文件"""
+        path = filedialog.askopenfilename(
+            title="选择文本文件",
+            filetypes=[("文本文件", "*.txt *.log *.csv *.json *.md"), ("所有文件", "*.*")])
+        if path:
+            self.load_input_file(path)
+
+    def on_drop_file(self, event):
+        """拖入文件时作为输入文件打开（多个文件只取第一个）"""
+        paths = self.root.tk.splitlist(event.data)
+        if paths:
+            self.load_input_file(paths[0])
+
+    def load_input_file(self, path):
+        """以文件作为输入：文本框只显示摘要和开头部分的预览，生成时直接从文件流式读取
+
+        识别编码需要扫描整个文件，在后台线程中进行，完成前不能生成。
+        """
+        self.status_bar.config(text=f"正在读取文件: {os.path.basename(path)}")
+        self.generate_btn.config(state=tk.DISABLED)
+        self.load_id += 1
+        result = []  # 每次读取单独保存结果：(FileSource, 预览文本) 或异常
 
-        if len(text) <= self.max_chars:
-            segments.append(text)
+        def run():
+            try:
+                source = file_source.FileSource(path)
+                result.append((source, source.preview()))
+            except Exception as e:
+                result.append(e)
+
+        self.load_thread = threading.Thread(target=run, daemon=True)
+        self.load_thread.start()
+        self.root.after(50, self.poll_input_file, self.load_id, self.load_thread, result)
+
+    def poll_input_file(self, load_id, thread, result):
+        """等待后台读取文件完成，然后在文本框中显示预览"""
+        if thread.is_alive():
+            self.root.after(50, self.poll_input_file, load_id, thread, result)
+            return
+        if load_id != self.load_id:
+            return  # 已打开其他文件或清空了内容
+        self.load_thread = None
+        result = result[0]
+        if isinstance(result, Exception):
+            messagebox.showerror("打开文件错误", f"读取文件时出错:\n{str(result)}")
+            self.status_bar.config(text="打开文件失败")
+            self.update_char_count()
+            return
+
+        source, preview = result
+        self.input_file = source
+        self.text_input.config(state=tk.NORMAL)
+        self.text_input.delete("1.0", tk.END)
+        if source.binary:
+            self.text_input.insert("1.0", f"（二进制文件 {source.name}，共 {source.size} 字节，"
+                                          f"将按字节模式分帧编码，每帧带有序号和校验）")
         else:
-            # 使用textwrap分割文本，确保不会在单词中间分割
-            segments = textwrap.wrap(text, width=self.max_chars,
-                                     break_long_words=True,
-                                     replace_whitespace=False)
+            self.text_input.insert("1.0", preview)
+        if not source.binary and source.chars > len(preview):
+            self.text_input.insert(tk.END, f"\n\n……（仅预览前 {len(preview)} 个字符，共 {source.chars} 个字符）")
+        self.text_input.config(state=tk.DISABLED)
+
+        self.update_char_count()
+        self.status_bar.config(text=f"已打开文件: {source.summary()}，点击“清空内容”可恢复手动输入")
+
+    def is_binary_input(self):
+        """打开的文件是否按二进制帧编码"""
+        return self.input_file is not None and (self.input_file.binary or self.binary_var.get())
+
+    def get_source_bytes(self):
+        """生成二维码时使用的完整内容（字节串）"""
+        if self.source_binary:
+            with open(self.source_file.path, "rb") as f:
+                return f.read()
+        return self.get_source_text().encode("utf-8")
+
+    def get_source_text(self):
+        """生成二维码时使用的完整原文"""
+        if self.source_file is not None:
+            return self.source_file.read_text()
+        return self.source_text
+
+    def get_target_version(self):
+        """勾选按容量分割时返回目标二维码版本，否则返回None"""
+        if not self.fill_capacity_var.get():
+            return None
+        try:
+            return min(40, max(1, int(self.qr_version_var.get())))
+        except Exception:
+            return segmenter.DEFAULT_VERSION  # fallback
 
-        return segments
+    def get_policy(self):
+        """界面上选择的编码策略；固定版本只在按容量分割时有效"""
+        version = self.get_target_version() if self.fixed_version_var.get() else None
+        return qr_core.EncodePolicy(self.ecc_levels.get(self.ecc_var.get(), qr_core.ERROR_CORRECTION),
+                                    version,
+                                    self.mask_options.get(self.mask_var.get(), qr_core.MASK_AUTO))
 
     def show_current_qr(self):
         """显示当前二维码"""
@@ -472,23 +1355,54 @@ class QRCodeGeneratorApp:
 
         # 获取当前二维码
         current_qr = self.qr_codes[self.current_index]
+        photo = self.get_preview(self.current_index)
 
         # 显示二维码图像
-        qr_label = tk.Label(self.qr_container, image=current_qr["photo"])
-        qr_label.image = current_qr["photo"]  # 保持引用
+        qr_label = tk.Label(self.qr_container, image=photo)
+        qr_label.image = photo  # 保持引用
         qr_label.pack(pady=10)
 
         # 显示页码信息
         self.page_label.config(text=f"{self.current_index + 1}/{len(self.qr_codes)}")
 
-        # 显示当前段落的字符数
+        # 显示当前段落的字符数（二进制帧为字节数）
+        unit = "字节数" if isinstance(current_qr["text"], bytes) else "字符数"
         char_info = tk.Label(self.qr_container,
-                             text=f"当前二维码字符数: {len(current_qr['text'])}",
+                             text=f"当前二维码{unit}: {len(current_qr['text'])}",
                              font=("Microsoft YaHei UI", 9),
                              fg=self.text_color,
                              bg="white")
         char_info.pack(pady=(0, 5))
 
+        # 空闲时预先绘制相邻的二维码，翻页时无需等待
+        self.root.after_idle(self.prefetch_neighbours)
+
+    def get_preview(self, index):
+        """获取指定二维码的预览图，不在缓存中时即时绘制"""
+        from PIL import ImageTk
+
+        photo = self.preview_cache.get(index)
+        if photo is not None:
+            self.preview_cache.move_to_end(index)
+            return photo
+
+        qr_data = self.qr_codes[index]
+        run = self.perf_run or self.perf_preview
+        with perf.measure(run, "render"):
+            img = qr_core.render_preview(qr_data["matrix"])
+        with perf.measure(run, "photo"):
+            photo = ImageTk.PhotoImage(img)
+        self.preview_cache[index] = photo
+        while len(self.preview_cache) > self.preview_cache_size:
+            self.preview_cache.popitem(last=False)
+        return photo
+
+    def prefetch_neighbours(self):
+        """预先绘制当前二维码前后相邻的预览图"""
+        for index in (self.current_index + 1, self.current_index - 1):
+            if 0 <= index < len(self.qr_codes) and index not in self.preview_cache:
+                self.get_preview(index)
+
     def show_next(self):
         """显示下一张二维码"""
         if self.current_index < len(self.qr_codes) - 1:
@@ -503,6 +1417,103 @@ class QRCodeGeneratorApp:
             self.show_current_qr()
             self.update_nav_buttons()
 
+    def toggle_playback(self):
+        """开始或停止自动播放"""
+        if self.playing:
+            self.stop_playback()
+        else:
+            self.start_playback()
+
+    def start_playback(self):
+        """按设定帧率循环播放二维码；勾选喷泉码时播放由全部内容生成的喷泉码帧"""
+        if not self.qr_codes or self.generating:
+            return
+
+        self.play_encoder = None
+        if self.fountain_var.get():
+            version = self.get_target_version() or segmenter.DEFAULT_VERSION
+            self.play_policy = self.get_policy()
+            try:
+                payload = self.get_source_bytes()
+                block_size = fountain.block_size_for_version(version, self.play_policy.error_correction)
+                self.play_encoder = fountain.LTEncoder(payload, block_size)
+            except Exception as e:
+                messagebox.showerror("播放错误", f"生成喷泉码时出错:\n{str(e)}")
+                return
+            self.ensure_executor()
+            self.play_next = 0
+            self.play_futures.clear()
+
+        self.playing = True
+        self.play_btn.config(text="停止播放", bg=self.warning_color)
+        self.play_tick()
+
+    def play_tick(self):
+        """显示下一帧并安排下一次刷新"""
+        if not self.playing:
+            return
+
+        try:
+            fps = min(30, max(1, int(self.fps_var.get())))
+        except Exception:
+            fps = 5  # fallback
+
+        if self.play_encoder is None:
+            self.current_index = (self.current_index + 1) % len(self.qr_codes)
+            self.show_current_qr()
+            self.update_nav_buttons()
+        else:
+            # 在进程池中提前编码后续帧，保持约2秒的缓冲
+            while len(self.play_futures) < max(4, fps * 2):
+                frame_text = self.play_encoder.frame(self.play_next)
+                future = self.executor.submit(qr_core.make_qr_matrix, frame_text, self.play_policy)
+                self.play_futures.append((self.play_next, future))
+                self.play_next += 1
+            # 下一帧尚未编码完成时跳过本次刷新
+            if self.play_futures[0][1].done():
+                index, future = self.play_futures.popleft()
+                self.show_frame(future.result(),
+                                f"喷泉码帧 {index + 1}（内容共 {self.play_encoder.k} 个分块）")
+
+        self.play_job = self.root.after(1000 // fps, self.play_tick)
+
+    def stop_playback(self):
+        """停止自动播放并恢复显示当前二维码"""
+        if not self.playing:
+            return
+
+        self.playing = False
+        if self.play_job is not None:
+            self.root.after_cancel(self.play_job)
+            self.play_job = None
+        for _, future in self.play_futures:
+            future.cancel()
+        self.play_futures.clear()
+        self.play_btn.config(text="自动播放", bg=self.primary_color)
+
+        if self.play_encoder is not None:
+            self.play_encoder = None
+            self.show_current_qr()
+
+    def show_frame(self, matrix, caption):
+        """在预览区域显示一帧（不经过预览缓存）"""
+        from PIL import ImageTk
+
+        for widget in self.qr_container.winfo_children():
+            widget.destroy()
+
+        photo = ImageTk.PhotoImage(qr_core.render_preview(matrix))
+        frame_label = tk.Label(self.qr_container, image=photo)
+        frame_label.image = photo  # 保持引用
+        frame_label.pack(pady=10)
+
+        caption_label = tk.Label(self.qr_container,
+                                 text=caption,
+                                 font=("Microsoft YaHei UI", 9),
+                                 fg=self.text_color,
+                                 bg="white")
+        caption_label.pack(pady=(0, 5))
+
     def update_nav_buttons(self):
         """更新导航按钮状态"""
         if not self.qr_codes:
@@ -510,19 +1521,33 @@ class QRCodeGeneratorApp:
             self.next_btn.config(state=tk.DISABLED)
             self.download_single_btn.config(state=tk.DISABLED)
             self.download_all_btn.config(state=tk.DISABLED)
+            self.play_btn.config(state=tk.DISABLED)
             return
 
         self.prev_btn.config(state=tk.NORMAL if self.current_index > 0 else tk.DISABLED)
         self.next_btn.config(state=tk.NORMAL if self.current_index < len(self.qr_codes) - 1 else tk.DISABLED)
-        self.download_single_btn.config(state=tk.NORMAL)
-        self.download_all_btn.config(state=tk.NORMAL)
+        # 生成过程中文件名的总数尚未确定，暂不允许下载
+        download_state = tk.DISABLED if self.generating else tk.NORMAL
+        self.download_single_btn.config(state=download_state)
+        self.download_all_btn.config(state=download_state)
+        self.play_btn.config(state=download_state)
 
     def clear_content(self):
         """清空文本输入和二维码显示区域"""
-        # 清空文本输入
+        # 停止正在进行的生成和播放
+        self.cancel_generation(silent=True)
+        self.stop_playback()
+
+        # 清空文本输入（如果打开了文件，恢复手动输入）
+        self.input_file = None
+        self.load_id += 1  # 忽略正在读取的文件
+        self.load_thread = None
+        self.text_input.config(state=tk.NORMAL)
         self.text_input.delete("1.0", tk.END)
 
         # 重置字符计数
+        self.input_chars = 0
+        self.input_bytes = 0
         self.char_count.config(text="字符数: 0")
 
         # 禁用生成按钮
@@ -530,7 +1555,12 @@ class QRCodeGeneratorApp:
 
         # 清空二维码数据
         self.qr_codes = []
+        self.source_text = ""
+        self.source_file = None
+        self.source_compressed = False
+        self.source_binary = False
         self.current_index = 0
+        self.preview_cache.clear()
 
         # 清除二维码显示区域并显示占位符
         for widget in self.qr_container.winfo_children():
@@ -560,6 +1590,13 @@ class QRCodeGeneratorApp:
         # 更新状态栏
         self.status_bar.config(text="已清空内容")
 
+    def get_export_scale(self):
+        """读取下载图片每个模块的像素数"""
+        try:
+            return min(40, max(1, int(self.export_scale_var.get())))
+        except Exception:
+            return qr_core.BOX_SIZE  # fallback
+
     def download_single_qr(self):
         """下载当前显示的二维码"""
         if not self.qr_codes or self.current_index >= len(self.qr_codes):
@@ -569,7 +1606,7 @@ class QRCodeGeneratorApp:
         current_qr = self.qr_codes[self.current_index]
 
         # 选择保存路径
-        filename = f"二维码_{self.current_index + 1}_{len(self.qr_codes)}.png"
+        filename = qr_core.qr_filename(self.current_index, len(self.qr_codes))
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
             filetypes=[("PNG 图片", "*.png"), ("所有文件", "*.*")],
@@ -579,7 +1616,8 @@ class QRCodeGeneratorApp:
         if file_path:
             try:
                 # 保存当前二维码
-                current_qr["original_image"].save(file_path, "PNG")
+                img = qr_core.matrix_to_image(current_qr["matrix"], self.get_export_scale())
+                img.save(file_path, "PNG")
                 self.status_bar.config(text=f"已保存: {os.path.basename(file_path)}")
                 messagebox.showinfo("下载成功", f"二维码已保存到:\n{file_path}")
             except Exception as e:
@@ -587,37 +1625,491 @@ class QRCodeGeneratorApp:
                 self.status_bar.config(text="保存失败")
 
     def download_all_qr(self):
-        """下载所有二维码"""
+        """下载所有二维码（后台线程写入，可取消）
+
+        PNG文件/拼图PNG保存到目录，之前由相同二维码和尺寸保存的PNG文件会跳过；ZIP/PDF保存为单个文件。
+        """
         if not self.qr_codes:
             messagebox.showwarning("下载错误", "没有可下载的二维码")
             return
 
-        # 选择保存目录
-        save_dir = filedialog.askdirectory(title="选择保存目录")
-        if not save_dir:
+        fmt = self.export_formats.get(self.export_format_var.get(), exporter.FORMAT_PNG)
+        total = len(self.qr_codes)
+
+        # 选择保存位置
+        if fmt == exporter.FORMAT_ZIP:
+            save_path = filedialog.asksaveasfilename(
+                defaultextension=".zip",
+                filetypes=[("ZIP 压缩包", "*.zip"), ("所有文件", "*.*")],
+                initialfile=exporter.archive_name(total, ".zip"))
+        elif fmt == exporter.FORMAT_PDF:
+            save_path = filedialog.asksaveasfilename(
+                defaultextension=".pdf",
+                filetypes=[("PDF 文档", "*.pdf"), ("所有文件", "*.*")],
+                initialfile=exporter.archive_name(total, ".pdf"))
+        else:
+            save_path = filedialog.askdirectory(title="选择保存目录")
+        if not save_path:
             return
 
-        try:
-            saved_count = 0
-            for i, qr_data in enumerate(self.qr_codes):
-                filename = f"二维码_{i + 1}_{len(self.qr_codes)}.png"
-                file_path = os.path.join(save_dir, filename)
-                qr_data["original_image"].save(file_path, "PNG")
-                saved_count += 1
-
-            self.status_bar.config(text=f"已保存 {saved_count} 个二维码到: {save_dir}")
-            messagebox.showinfo("下载成功", f"已成功保存 {saved_count} 个二维码到:\n{save_dir}")
-        except Exception as e:
-            messagebox.showerror("保存错误", f"保存文件时出错:\n{str(e)}")
+        box_size = self.get_export_scale()
+        matrices = [qr_data["matrix"] for qr_data in self.qr_codes]
+
+        self.export_cancel.clear()
+        self.export_progress = (0, total)
+        self.export_result = None
+        self.export_record = None
+
+        def run():
+            # 在导出线程中创建和结束统计（cProfile按线程统计）
+            stats = perf.RunStats("export", format=fmt, total=total) if perf.enabled() else None
+            try:
+                result = exporter.export_all(
+                    fmt, matrices, total, save_path, box_size=box_size,
+                    progress=self.set_export_progress, cancel_event=self.export_cancel)
+                if stats is not None:
+                    stats.add("save", result["elapsed"], result["saved"])
+                    self.export_record = stats.finish(codes=result["saved"], bytes=result["bytes"],
+                                                      cancelled=result["cancelled"])
+                self.export_result = result
+            except Exception as e:
+                if stats is not None:
+                    stats.finish(error=str(e))
+                self.export_result = e
+
+        self.export_thread = threading.Thread(target=run, daemon=True)
+        self.export_thread.start()
+
+        self.set_exporting(True)
+        self.root.after(100, lambda: self.poll_export(save_path))
+
+    def set_export_progress(self, done, total):
+        """导出进度回调（在工作线程中调用）"""
+        self.export_progress = (done, total)
+
+    def poll_export(self, save_path):
+        """轮询导出进度，完成后显示统计信息"""
+        done, total = self.export_progress
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+
+        if self.export_thread.is_alive():
+            self.status_bar.config(text=f"正在保存二维码... {done}/{total}")
+            self.root.after(100, lambda: self.poll_export(save_path))
+            return
+
+        self.set_exporting(False)
+        result = self.export_result
+        if isinstance(result, Exception):
+            messagebox.showerror("保存错误", f"保存文件时出错:\n{str(result)}")
             self.status_bar.config(text="保存失败")
+            return
+
+        summary = exporter.format_summary(result)
+        status = f"{summary} - {save_path}"
+        if self.export_record is not None:
+            status += f"；{perf.summary_text(self.export_record)}"
+        self.status_bar.config(text=status)
+        if result["errors"]:
+            details = "\n".join(f"{name}: {error}" for name, error in result["errors"][:5])
+            messagebox.showerror("保存错误", f"{summary}\n\n{details}\n\n再次下载到同一目录可继续保存剩余文件")
+        elif not result["cancelled"]:
+            messagebox.showinfo("下载成功", f"{summary}\n\n保存位置:\n{save_path}")
+
+    def cancel_export(self):
+        """取消正在进行的批量下载"""
+        self.export_cancel.set()
+        self.status_bar.config(text="正在取消保存...")
+
+    def set_exporting(self, exporting):
+        """切换“下载全部”按钮为“取消下载”并显示进度条，或恢复原状"""
+        if exporting:
+            self.download_all_btn.config(text="取消下载", command=self.cancel_export)
+            self.generate_btn.config(state=tk.DISABLED)
+            if self.progress_bar is None:
+                self.progress_bar = ttk.Progressbar(self.status_frame, mode="determinate", length=200)
+            self.progress_bar.pack(side=tk.LEFT, padx=(0, 10))
+        else:
+            self.download_all_btn.config(text="下载全部", command=self.download_all_qr)
+            self.update_char_count()  # 按输入内容恢复生成按钮状态
+            self.progress_bar.pack_forget()
+
+    def get_batch_options(self):
+        """按界面当前的设置得到批量任务参数（压缩时不再逐个确认）"""
+        import batch
+        import qr_verify
+
+        try:
+            max_chars = int(self.max_chars_var.get())
+        except Exception:
+            max_chars = qr_core.DEFAULT_MAX_CHARS
+        return batch.BatchOptions(
+            fmt=self.export_formats.get(self.export_format_var.get(), exporter.FORMAT_PNG),
+            max_chars=max_chars,
+            version=self.get_target_version(),
+            policy=self.get_policy(),
+            compress=self.compress_methods.get(self.compress_var.get()),
+            stable=self.stable_var.get(),
+            binary=self.binary_var.get(),
+            box_size=self.get_export_scale(),
+            verify=qr_verify.VERIFY_MATRIX if self.verify_var.get() else None)
+
+    def show_batch_window(self):
+        """批量生成：多个文件排队编码，每个文件导出到输出目录下以文件名命名的目录（或ZIP/PDF文件）"""
+        import batch
+
+        if self.batch_window is not None and self.batch_window.winfo_exists():
+            self.batch_window.lift()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("批量生成")
+        window.geometry("760x520")
+        window.configure(bg=self.bg_color)
+        window.transient(self.root)
+        self.batch_window = window
+        self.center_window(window)
+
+        waiting = []  # 尚未开始的 (表格行, 文件路径)
+        started = []  # 已开始的 (表格行, BatchJob)
+        state = {"queue": None, "output": ""}
+
+        main_frame = tk.Frame(window, bg=self.bg_color, padx=20, pady=15)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(main_frame,
+                 text="批量生成",
+                 font=("Microsoft YaHei UI", 16, "bold"),
+                 fg=self.primary_color,
+                 bg=self.bg_color).pack(anchor=tk.W)
+        tk.Label(main_frame,
+                 text="使用主窗口当前的分割、压缩、编码策略、导出格式和像素/模块设置；"
+                      "多个文件共用编码进程，同时处理的文件数和总大小有上限",
+                 font=("Microsoft YaHei UI", 9),
+                 fg="#6C757D",
+                 bg=self.bg_color,
+                 wraplength=700,
+                 justify=tk.LEFT).pack(anchor=tk.W, pady=(0, 10))
+
+        # 添加文件和输出目录
+        tool_frame = tk.Frame(main_frame, bg=self.bg_color)
+        tool_frame.pack(fill=tk.X, pady=(0, 8))
+
+        def add_paths(new_paths):
+            # 批量任务进行中时直接加入队列，否则等点击“开始”
+            queue_ = state["queue"]
+            running = queue_ is not None and not queue_.finished
+            for path in batch.expand_paths(new_paths):
+                if not running:
+                    row = tree.insert("", tk.END, values=(os.path.basename(path), "等待开始", ""))
+                    waiting.append((row, path))
+                    continue
+                try:
+                    job = queue_.add(path)
+                except OSError as e:
+                    messagebox.showerror("添加失败", str(e), parent=window)
+                    continue
+                row = tree.insert("", tk.END, values=(job.name, job.describe(), job.output))
+                started.append((row, job))
+            update_totals()
+
+        def add_files():
+            selected = filedialog.askopenfilenames(parent=window, title="选择要批量生成的文件")
+            if selected:
+                add_paths(window.tk.splitlist(selected))
+
+        def add_folder():
+            folder = filedialog.askdirectory(parent=window, title="选择文件夹（取其中的文件，不含子文件夹）")
+            if folder:
+                add_paths([folder])
+
+        def choose_output():
+            folder = filedialog.askdirectory(parent=window, title="选择输出目录")
+            if folder:
+                state["output"] = folder
+                output_label.config(text=folder)
+
+        for text, command in (("添加文件", add_files), ("添加文件夹", add_folder), ("输出目录...", choose_output)):
+            ttk.Button(tool_frame, text=text, style="Secondary.TButton",
+                       command=command).pack(side=tk.LEFT, padx=(0, 5))
+        output_label = tk.Label(tool_frame,
+                                text="（未选择输出目录）",
+                                font=("Microsoft YaHei UI", 9),
+                                fg=self.text_color,
+                                bg=self.bg_color)
+        output_label.pack(side=tk.LEFT, padx=(5, 0))
+
+        jobs_var = tk.IntVar(value=batch.DEFAULT_MAX_JOBS)
+        ttk.Spinbox(tool_frame, from_=1, to=8, width=4, textvariable=jobs_var).pack(side=tk.RIGHT)
+        tk.Label(tool_frame,
+                 text="同时处理:",
+                 font=("Microsoft YaHei UI", 9),
+                 fg=self.text_color,
+                 bg=self.bg_color).pack(side=tk.RIGHT, padx=(0, 5))
+
+        # 任务列表
+        list_frame = tk.Frame(main_frame, bg=self.bg_color)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        tree = ttk.Treeview(list_frame, columns=("name", "status", "output"), show="headings")
+        for column, heading, width in (("name", "文件", 180), ("status", "状态", 280), ("output", "输出", 240)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        totals_label = tk.Label(main_frame,
+                                text="",
+                                font=("Microsoft YaHei UI", 9),
+                                fg=self.text_color,
+                                bg=self.bg_color,
+                                anchor=tk.W)
+        totals_label.pack(fill=tk.X, pady=(8, 0))
+
+        def update_totals():
+            queue_ = state["queue"]
+            text = batch.format_totals(queue_.totals()) if queue_ is not None else ""
+            if waiting:
+                text = f"{text}；{len(waiting)} 个文件等待开始" if text else f"已添加 {len(waiting)} 个文件"
+            totals_label.config(text=text)
+
+        # 按钮
+        button_frame = tk.Frame(main_frame, bg=self.bg_color)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+
+        def poll():
+            queue_ = state["queue"]
+            if queue_ is None or not window.winfo_exists():
+                return
+            for row, job in list(started):
+                tree.set(row, "status", job.describe())
+            update_totals()
+            if queue_.finished:
+                queue_.close()
+                start_btn.config(state=tk.NORMAL)
+                cancel_btn.config(state=tk.DISABLED)
+                self.status_bar.config(text=f"批量生成完成：{batch.format_totals(queue_.totals())}")
+                return
+            window.after(300, poll)
+
+        def start():
+            if state["queue"] is not None and not state["queue"].finished:
+                return
+            if not waiting:
+                messagebox.showwarning("批量生成", "请先添加文件", parent=window)
+                return
+            if not state["output"]:
+                messagebox.showwarning("批量生成", "请先选择输出目录", parent=window)
+                return
+            self.ensure_executor()
+            try:
+                max_jobs = max(1, int(jobs_var.get()))
+            except Exception:
+                max_jobs = batch.DEFAULT_MAX_JOBS
+            queue_ = batch.BatchQueue(state["output"], self.get_batch_options(), max_jobs=max_jobs,
+                                      executor=self.executor, cache=self.matrix_cache)
+            try:
+                jobs = [(row, queue_.add(path)) for row, path in waiting]
+                queue_.start()
+            except OSError as e:
+                queue_.close()
+                messagebox.showerror("批量生成", f"无法开始:\n{str(e)}", parent=window)
+                return
+            for row, job in jobs:
+                tree.set(row, "output", job.output)
+            started.extend(jobs)
+            waiting[:] = []
+            state["queue"] = queue_
+            self.batch_queue = queue_
+            start_btn.config(state=tk.DISABLED)
+            cancel_btn.config(state=tk.NORMAL)
+            poll()
+
+        def cancel():
+            if state["queue"] is not None:
+                state["queue"].cancel()
+
+        def close():
+            queue_ = state["queue"]
+            if queue_ is not None and not queue_.finished:
+                if not messagebox.askyesno("批量生成", "批量任务尚未完成，是否取消并关闭？", parent=window):
+                    return
+                queue_.close()
+            window.destroy()
+
+        start_btn = tk.Button(button_frame,
+                              text="开始",
+                              command=start,
+                              font=("Microsoft YaHei UI", 10, "bold"),
+                              bg=self.primary_color,
+                              fg="white",
+                              relief="flat",
+                              padx=20,
+                              pady=6,
+                              cursor="hand2")
+        start_btn.pack(side=tk.LEFT)
+        cancel_btn = tk.Button(button_frame,
+                               text="取消",
+                               command=cancel,
+                               state=tk.DISABLED,
+                               font=("Microsoft YaHei UI", 10),
+                               bg=self.warning_color,
+                               fg="white",
+                               relief="flat",
+                               padx=15,
+                               pady=6,
+                               cursor="hand2")
+        cancel_btn.pack(side=tk.LEFT, padx=(10, 0))
+        tk.Button(button_frame,
+                  text="关闭",
+                  command=close,
+                  font=("Microsoft YaHei UI", 10),
+                  bg="#6C757D",
+                  fg="white",
+                  relief="flat",
+                  padx=20,
+                  pady=6,
+                  cursor="hand2").pack(side=tk.RIGHT)
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        window.bind("<Escape>", lambda e: close())
+        update_totals()
+
+    def lan_snapshot(self):
+        """局域网服务读取的当前内容（在服务线程中调用）"""
+        # 生成过程中列表逐渐变长；取消或生成完成后以已有的数量为准
+        total = self.generation_total if self.generating else len(self.qr_codes)
+        return self.generation_id, self.qr_codes, total
+
+    def stop_lan_server(self):
+        """停止局域网服务"""
+        if self.lan_server is not None:
+            self.lan_server.stop()
+            self.lan_server = None
+            self.lan_btn.config(text="局域网服务", bg=self.secondary_color)
+
+    def show_lan_window(self):
+        """启动局域网服务并显示访问地址（二维码），手机连接同一网络后扫描即可在浏览器中接收"""
+        from PIL import ImageTk
+        import qr_server
+
+        if self.lan_window is not None and self.lan_window.winfo_exists():
+            self.lan_window.lift()
+            return
+        if self.lan_server is None:
+            server = qr_server.StreamServer(self.lan_snapshot, box_size=self.get_export_scale())
+            try:
+                server.start()
+            except OSError as e:
+                messagebox.showerror("错误", f"启动局域网服务失败: {e}")
+                return
+            self.lan_server = server
+            self.lan_btn.config(text="局域网服务中", bg=self.warning_color)
+
+        url = self.lan_server.url
+        window = tk.Toplevel(self.root)
+        window.title("局域网服务")
+        window.configure(bg=self.bg_color)
+        window.transient(self.root)
+        self.lan_window = window
+
+        main_frame = tk.Frame(window, bg=self.bg_color, padx=20, pady=15)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        tk.Label(main_frame,
+                 text="手机连接同一局域网后扫描下方二维码，在浏览器中直接接收全部内容",
+                 font=("Microsoft YaHei UI", 9),
+                 fg="#6C757D",
+                 bg=self.bg_color,
+                 wraplength=360,
+                 justify=tk.LEFT).pack(anchor=tk.W, pady=(0, 10))
+
+        photo = ImageTk.PhotoImage(qr_core.render_preview(qr_core.make_qr_matrix(url)))
+        url_qr = tk.Label(main_frame, image=photo, bg="white")
+        url_qr.image = photo  # 保持引用
+        url_qr.pack()
+
+        url_label = tk.Label(main_frame,
+                             text=url,
+                             font=("Consolas", 12),
+                             fg=self.primary_color,
+                             bg=self.bg_color,
+                             cursor="hand2")
+        url_label.pack(pady=(10, 0))
+        url_label.bind("<Button-1>", lambda e: self.copy_text_to_clipboard(url))
+        status_label = tk.Label(main_frame,
+                                text="",
+                                font=("Microsoft YaHei UI", 9),
+                                fg=self.text_color,
+                                bg=self.bg_color)
+        status_label.pack(pady=(5, 10))
+
+        def poll():
+            if not window.winfo_exists() or self.lan_server is None:
+                return
+            status_label.config(text=f"当前 {len(self.qr_codes)} 个二维码，"
+                                     f"连接 {self.lan_server.clients} 个，已推送 {self.lan_server.sent} 个")
+            window.after(1000, poll)
+
+        def stop():
+            self.stop_lan_server()
+            window.destroy()
+
+        button_frame = tk.Frame(main_frame, bg=self.bg_color)
+        button_frame.pack(fill=tk.X)
+        tk.Button(button_frame,
+                  text="停止服务",
+                  command=stop,
+                  font=("Microsoft YaHei UI", 10),
+                  bg=self.warning_color,
+                  fg="white",
+                  relief="flat",
+                  padx=15,
+                  pady=6,
+                  cursor="hand2").pack(side=tk.LEFT)
+        tk.Button(button_frame,
+                  text="关闭窗口（继续服务）",
+                  command=window.destroy,
+                  font=("Microsoft YaHei UI", 10),
+                  bg="#6C757D",
+                  fg="white",
+                  relief="flat",
+                  padx=15,
+                  pady=6,
+                  cursor="hand2").pack(side=tk.RIGHT)
+
+        window.bind("<Escape>", lambda e: window.destroy())
+        self.center_window(window)
+        poll()
 
     def show_full_text(self):
-        """展示全部文本内容"""
-        text = self.text_input.get("1.0", tk.END).strip()
-        if not text:
+        """展示全部文本内容（只渲染可见行，支持跳转到二维码对应的段落和查找）"""
+        import text_viewer
+
+        if self.input_file is not None and self.input_file.binary:
+            messagebox.showinfo("提示", "二进制文件无法以文本形式展示")
+            return
+        if self.input_file is not None:
+            buffer = text_viewer.FileBuffer(self.input_file)
+            aligned = self.source_file is self.input_file and not self.source_binary
+        else:
+            text = self.text_input.get("1.0", tk.END).strip()
+            try:
+                text = qr_core.normalize_text(text)
+            except Exception:
+                pass
+            buffer = text_viewer.TextBuffer(text)
+            aligned = self.source_file is None and text == self.source_text
+        if not buffer.chars:
+            buffer.close()
             messagebox.showinfo("提示", "没有文本内容可展示")
             return
 
+        index = text_viewer.LineIndex(buffer)
+        # 不压缩时各段按顺序拼接就是原文，可以按二维码序号定位
+        positions = None
+        if aligned and self.qr_codes and not self.source_compressed and not self.generating:
+            positions = text_viewer.segment_positions(item["text"] for item in self.qr_codes)
+
         # 创建新窗口
         text_window = tk.Toplevel(self.root)
         text_window.title("文本内容预览")
@@ -632,6 +2124,9 @@ class QRCodeGeneratorApp:
         # 居中显示新窗口
         self.center_window(text_window)
 
+        # 关闭窗口时释放文件映射
+        text_window.bind("<Destroy>", lambda e: buffer.close() if e.widget is text_window else None)
+
         # 主容器
         main_frame = tk.Frame(text_window, bg=self.bg_color, padx=20, pady=20)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -646,64 +2141,119 @@ class QRCodeGeneratorApp:
 
         # 字符统计
         char_count_label = tk.Label(main_frame,
-                                    text=f"字符数: {len(text)}",
+                                    text=f"字符数: {buffer.chars} · 行数: {index.line_count}",
                                     font=("Microsoft YaHei UI", 10),
                                     fg=self.text_color,
                                     bg=self.bg_color)
         char_count_label.pack(anchor=tk.W, pady=(0, 10))
 
-        # 创建带滚动条的文本显示区域
+        # 查找和跳转
+        tool_frame = tk.Frame(main_frame, bg=self.bg_color)
+        tool_frame.pack(fill=tk.X, pady=(0, 10))
+
+        tk.Label(tool_frame,
+                 text="查找:",
+                 font=("Microsoft YaHei UI", 10),
+                 fg=self.text_color,
+                 bg=self.bg_color).pack(side=tk.LEFT)
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(tool_frame, textvariable=search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=(5, 5))
+        next_btn = ttk.Button(tool_frame, text="下一个", style="Secondary.TButton")
+        next_btn.pack(side=tk.LEFT)
+
+        search_status = tk.Label(tool_frame,
+                                 text="",
+                                 font=("Microsoft YaHei UI", 9),
+                                 fg="#6C757D",
+                                 bg=self.bg_color)
+        search_status.pack(side=tk.LEFT, padx=(8, 0))
+
+        # 文本显示区域（虚拟化，只加载可见行）
         text_frame = tk.Frame(main_frame, bg="white", relief="solid", bd=1)
         text_frame.pack(fill=tk.BOTH, expand=True)
-
-        # 创建文本框和滚动条
-        text_display = tk.Text(text_frame,
-                               wrap=tk.NONE,  # 改为NONE以支持水平滚动
-                               font=("Microsoft YaHei UI", 11),
-                               relief="flat",
-                               padx=15,
-                               pady=15,
-                               bg="white",
-                               fg=self.text_color,
-                               state=tk.DISABLED)  # 设置为只读
-
-        # 垂直滚动条
-        v_scrollbar = tk.Scrollbar(text_frame, orient="vertical")
-        v_scrollbar.config(command=text_display.yview)
-        text_display.config(yscrollcommand=v_scrollbar.set)
-
-        # 水平滚动条
-        h_scrollbar = tk.Scrollbar(text_frame, orient="horizontal")
-        h_scrollbar.config(command=text_display.xview)
-        text_display.config(xscrollcommand=h_scrollbar.set)
-
-        # 布局 - 使用grid布局确保滚动条正确显示
-        text_display.grid(row=0, column=0, sticky="nsew")
-        v_scrollbar.grid(row=0, column=1, sticky="ns")
-        h_scrollbar.grid(row=1, column=0, sticky="ew")
-
-        # 配置grid权重
-        text_frame.grid_rowconfigure(0, weight=1)
-        text_frame.grid_columnconfigure(0, weight=1)
-
-        # 插入文本内容
-        text_display.config(state=tk.NORMAL)
-        text_display.insert("1.0", text)
-        text_display.config(state=tk.DISABLED)
-
-        # 更新滚动条
-        text_display.update_idletasks()
-        text_display.see("1.0")  # 滚动到顶部
-
-        # 绑定鼠标滚轮事件
-        text_display.bind("<MouseWheel>", lambda e: text_display.yview_scroll(-1 * (e.delta // 120), "units"))
-        text_display.bind("<Button-4>", lambda e: text_display.yview_scroll(-1, "units"))
-        text_display.bind("<Button-5>", lambda e: text_display.yview_scroll(1, "units"))
-
-        # 绑定Shift+滚轮进行水平滚动
-        text_display.bind("<Shift-MouseWheel>", lambda e: text_display.xview_scroll(-1 * (e.delta // 120), "units"))
-        text_display.bind("<Shift-Button-4>", lambda e: text_display.xview_scroll(-1, "units"))
-        text_display.bind("<Shift-Button-5>", lambda e: text_display.xview_scroll(1, "units"))
+        viewer = text_viewer.VirtualTextView(text_frame,
+                                             index,
+                                             font=("Microsoft YaHei UI", 11),
+                                             fg=self.text_color)
+        viewer.pack(fill=tk.BOTH, expand=True)
+
+        # 查找：输入时从当前匹配处开始增量查找，回车或“下一个”查找下一处
+        search = {"offset": buffer.start, "length": 0, "job": None}
+
+        def find(next_match=False):
+            search["job"] = None
+            query = search_var.get()
+            if not query:
+                viewer.set_highlight("match")
+                search_status.config(text="")
+                return
+            start = search["offset"] + (search["length"] if next_match else 0)
+            offset, length = index.find(query, min(start, buffer.length))
+            if offset == -1:
+                viewer.set_highlight("match")
+                search_status.config(text="未找到", fg=self.warning_color)
+                return
+            search["offset"], search["length"] = offset, length
+            line, col = index.locate(offset)
+            end = index.locate(offset + length)
+            viewer.set_highlight("match", (line, col), end)
+            viewer.see(line, col)
+            search_status.config(text=f"第 {line + 1} 行", fg="#6C757D")
+
+        def schedule_find(*args):
+            if search["job"] is not None:
+                text_window.after_cancel(search["job"])
+            search["job"] = text_window.after(200, find)
+
+        search_var.trace_add("write", schedule_find)
+        search_entry.bind("<Return>", lambda e: find(next_match=True))
+        next_btn.config(command=lambda: find(next_match=True))
+        text_window.bind("<F3>", lambda e: find(next_match=True))
+
+        # 跳转到二维码对应的段落
+        if positions is not None:
+            total = len(self.qr_codes)
+            segment_var = tk.StringVar(value=str(self.current_index + 1))
+
+            def jump_to_segment(event=None):
+                try:
+                    i = min(total, max(1, int(segment_var.get()))) - 1
+                except ValueError:
+                    return
+                segment_var.set(str(i + 1))
+                viewer.set_highlight("segment", positions[i], positions[i + 1])
+                viewer.see(*positions[i])
+                # 主窗口同步显示对应的二维码
+                if not self.playing and i != self.current_index:
+                    self.current_index = i
+                    self.show_current_qr()
+
+            jump_btn = ttk.Button(tool_frame, text="跳转", style="Secondary.TButton", command=jump_to_segment)
+            jump_btn.pack(side=tk.RIGHT)
+            segment_spinbox = tk.Spinbox(tool_frame,
+                                         from_=1,
+                                         to=total,
+                                         textvariable=segment_var,
+                                         width=6,
+                                         font=("Microsoft YaHei UI", 9),
+                                         bg="#FAFAFA",
+                                         fg=self.text_color,
+                                         relief="flat",
+                                         bd=0,
+                                         highlightthickness=1,
+                                         highlightbackground="#DEE2E6",
+                                         command=jump_to_segment)
+            segment_spinbox.pack(side=tk.RIGHT, padx=(5, 5))
+            segment_spinbox.bind("<Return>", jump_to_segment)
+            tk.Label(tool_frame,
+                     text=f"二维码(共{total}):",
+                     font=("Microsoft YaHei UI", 10),
+                     fg=self.text_color,
+                     bg=self.bg_color).pack(side=tk.RIGHT)
+
+            # 打开时定位到当前二维码对应的段落
+            text_window.after_idle(jump_to_segment)
 
         # 按钮区域
         button_frame = tk.Frame(main_frame, bg=self.bg_color)
@@ -722,10 +2272,10 @@ class QRCodeGeneratorApp:
                               cursor="hand2")
         close_btn.pack(side=tk.RIGHT)
 
-        # 复制按钮
+        # 复制按钮（点击时才读取完整文本）
         copy_btn = tk.Button(button_frame,
                              text="复制文本",
-                             command=lambda: self.copy_text_to_clipboard(text),
+                             command=lambda: self.copy_text_to_clipboard(buffer.read_text()),
                              font=("Microsoft YaHei UI", 10),
                              bg=self.success_color,
                              fg="white",
@@ -735,11 +2285,10 @@ class QRCodeGeneratorApp:
                              cursor="hand2")
         copy_btn.pack(side=tk.RIGHT, padx=(0, 10))
 
-        # 设置焦点到关闭按钮
-        close_btn.focus_set()
+        # 设置焦点到查找框
+        search_entry.focus_set()
 
-        # 绑定回车键关闭窗口
-        text_window.bind("<Return>", lambda e: text_window.destroy())
+        # 绑定Esc键关闭窗口
         text_window.bind("<Escape>", lambda e: text_window.destroy())
 
     def copy_text_to_clipboard(self, text):
@@ -761,12 +2310,45 @@ class QRCodeGeneratorApp:
         y = (window.winfo_screenheight() - height) // 2
         window.geometry(f"{width}x{height}+{x}+{y}")
 
+    def report_startup(self, run):
+        """主窗口第一次显示后记录启动耗时（TEXT_COPIER_STARTUP，见 perf.py），exit 模式下随即退出"""
+        start = time.perf_counter()
+        state = {"shown": False}
+
+        def shown():
+            run.add("window", time.perf_counter() - start)
+            record = run.finish()
+            text = f"启动耗时: {perf.summary_text(record)}"
+            self.status_bar.config(text=text)
+            if sys.stderr is not None:  # 无控制台的exe中为None
+                print(text, file=sys.stderr)
+            if perf.startup_mode() == perf.STARTUP_EXIT:
+                self.on_close()
+
+        def mapped(event):
+            # 子控件的Map事件也会传到主窗口的绑定上；在事件处理完（绘制完成）后再计时
+            if event.widget is self.root and not state["shown"]:
+                state["shown"] = True
+                self.root.after_idle(shown)
+
+        self.root.bind("<Map>", mapped, add="+")
+
     def open_github(self, event):
         """打开GitHub页面"""
+        import webbrowser
+
         webbrowser.open("https://github.com/xuzhenkang/text_copier")
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = QRCodeGeneratorApp(root)
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()  # 打包为exe后进程池需要
+    startup = perf.startup_run()  # 设置 TEXT_COPIER_STARTUP 后测量启动耗时
+    with perf.measure(startup, "widgets"):
+        root = TkinterDnD.Tk() if TkinterDnD is not None else tk.Tk()
+        app = QRCodeGeneratorApp(root)
+    if startup is not None:
+        app.report_startup(startup)
     root.mainloop()
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+性能测量：分阶段耗时统计、峰值内存，以及可选的cProfile/tracemalloc
+
+默认不做任何统计。设置环境变量后启用：
+
+- TEXT_COPIER_PERF=1          记录每次生成/导出各阶段的耗时，摘要显示在状态栏（命令行输出到stderr），
+                              并以JSON Lines格式追加到日志文件
+- TEXT_COPIER_PERF_LOG=路径   日志文件路径（默认为用户目录下的 text_copier_perf.jsonl），设置后同样启用统计
+- TEXT_COPIER_PROFILE=cprofile,tracemalloc
+                              同时对每次运行做性能剖析：cProfile结果保存为日志旁边的 .prof 文件
+                              （可用 python -m pstats 查看），tracemalloc的内存分配排行写入日志
+- TEXT_COPIER_STARTUP=1       测量图形界面的启动耗时（进程启动和导入、创建窗口、到主窗口第一次显示），
+                              显示在状态栏并写入日志；=exit 时测量后立即退出，用于反复比较启动速度
+
+cProfile和tracemalloc只统计开始统计的线程/进程；编码在工作进程中进行，其耗时由工作进程
+测量后回传（timed_call），在摘要中标注为各进程合计。
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+PERF_ENV = "TEXT_COPIER_PERF"
+PERF_LOG_ENV = "TEXT_COPIER_PERF_LOG"
+PROFILE_ENV = "TEXT_COPIER_PROFILE"
+STARTUP_ENV = "TEXT_COPIER_STARTUP"
+STARTUP_EXIT = "exit"  # 测量启动耗时后立即退出
+DEFAULT_LOG_NAME = "text_copier_perf.jsonl"
+TRACEMALLOC_TOP = 10  # 日志中记录的内存分配排行数量
+
+# 阶段名称（日志中使用英文键，状态栏显示中文）
+STAGE_LABELS = OrderedDict([
+    ("split", "分割"),
+    ("compress", "压缩"),
+    ("confirm", "等待确认"),
+    ("encode", "编码"),
+    ("render", "绘制"),
+    ("photo", "转换"),
+    ("save", "保存"),
+    ("launch", "启动进程"),
+    ("widgets", "创建窗口"),
+    ("window", "首次显示"),
+])
+
+_profiling = False  # 同一时间只允许一个cProfile（Python 3.12起重复启用会报错）
+
+
+def enabled():
+    """是否通过环境变量启用了性能统计"""
+    return bool(os.environ.get(PERF_ENV, "") not in ("", "0")
+                or os.environ.get(PERF_LOG_ENV) or os.environ.get(PROFILE_ENV))
+
+
+def log_path():
+    """日志文件路径"""
+    return os.environ.get(PERF_LOG_ENV) or os.path.join(os.path.expanduser("~"), DEFAULT_LOG_NAME)
+
+
+def profilers():
+    """TEXT_COPIER_PROFILE 中指定的剖析工具"""
+    value = os.environ.get(PROFILE_ENV, "").lower()
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def startup_mode():
+    """TEXT_COPIER_STARTUP 的值（未设置时为None）"""
+    value = os.environ.get(STARTUP_ENV, "").lower()
+    return None if value in ("", "0") else value
+
+
+def startup_run():
+    """启用了启动耗时测量时返回统计对象，起点为进程创建时间（无法获取时为调用时）"""
+    if startup_mode() is None:
+        return None
+    run = RunStats("startup", profile=False, mode=startup_mode(), frozen=bool(getattr(sys, "frozen", False)))
+    age = process_age()
+    if age is not None:
+        run.start -= age
+        run.add("launch", age)
+    return run
+
+
+def process_age():
+    """当前进程已运行的秒数（Linux和Windows），无法获取时返回None
+
+    包括解释器启动和导入模块的时间；单文件exe解压到临时目录的时间发生在另一个（父）进程中，不包括在内。
+    """
+    try:
+        if os.name == "nt":
+            return _windows_process_age()
+        with open("/proc/self/stat") as f:
+            # 进程名可能含空格，从最后一个右括号之后开始分割；starttime为其后第20个字段
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _windows_process_age():
+    import ctypes
+    from ctypes import wintypes
+
+    creation, exit_time, kernel, user, now = (wintypes.FILETIME() for _ in range(5))
+    get_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_process.restype = wintypes.HANDLE
+    if not ctypes.windll.kernel32.GetProcessTimes(get_process(), ctypes.byref(creation), ctypes.byref(exit_time),
+                                                  ctypes.byref(kernel), ctypes.byref(user)):
+        return None
+    ctypes.windll.kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+
+    def ticks(filetime):  # 100纳秒为单位
+        return (filetime.dwHighDateTime << 32) | filetime.dwLowDateTime
+
+    return max(0.0, (ticks(now) - ticks(creation)) / 1e7)
+
+
+def timed_call(func, *args):
+    """调用func并返回 (结果, 耗时秒数)，用于在工作进程中测量"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def timed_iter(iterable, run, stage):
+    """逐个产出iterable的元素，把每次等待下一个元素的耗时计入run的stage阶段（run为None时原样产出）"""
+    if run is None:
+        for item in iterable:
+            yield item
+        return
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        run.add(stage, time.perf_counter() - start)
+        yield item
+
+
+@contextmanager
+def measure(run, stage, count=1):
+    """把with块的耗时计入run的stage阶段；run为None（未启用统计）时不做任何事"""
+    if run is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add(stage, time.perf_counter() - start, count)
+
+
+class RunStats:
+    """一次生成（或导出）的分阶段统计
+
+    add/measure 可在多个线程中调用；finish 必须在创建它的线程中调用（cProfile按线程统计）。
+    """
+
+    def __init__(self, name, profile=True, **info):
+        self.name = name
+        self.info = dict(info)
+        self.stages = OrderedDict()  # 阶段 -> [耗时, 次数]
+        self.worker_stages = set()  # 在工作进程中测量、耗时为各进程合计的阶段
+        self.start = time.perf_counter()
+        self.record = None
+
+        tools = profilers() if profile else set()
+        self._profile = None
+        global _profiling
+        if "cprofile" in tools and not _profiling:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            _profiling = True
+        self._trace = "tracemalloc" in tools and not tracemalloc.is_tracing()
+        if self._trace:
+            tracemalloc.start()
+
+    def add(self, stage, seconds, count=1, worker=False):
+        """累计某阶段的耗时；worker为True表示在工作进程中测量"""
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += count
+        if worker:
+            self.worker_stages.add(stage)
+
+    def measure(self, stage, count=1):
+        return measure(self, stage, count)
+
+    def finish(self, codes=0, **info):
+        """结束统计：返回记录字典并追加到日志文件（写入失败时记录中带有log_error）"""
+        if self.record is not None:
+            return self.record
+        elapsed = time.perf_counter() - self.start
+        record = OrderedDict([
+            ("time", time.strftime("%Y-%m-%d %H:%M:%S")),
+            ("run", self.name),
+            ("elapsed", round(elapsed, 4)),
+            ("codes", codes),
+            ("codes_per_s", round(codes / elapsed, 2) if elapsed and codes else None),
+            ("peak_rss_mb", _round(peak_rss_mb(), 1)),
+            ("stages", OrderedDict((stage, {"seconds": round(seconds, 4), "count": count,
+                                            "worker": stage in self.worker_stages})
+                                   for stage, (seconds, count) in self.stages.items())),
+        ])
+        record.update(self.info)
+        record.update(info)
+        self.record = record
+
+        path = log_path()
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        except OSError:
+            pass  # 下面写入时再报告错误
+        self._stop_profilers(record)
+
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            record["log_error"] = str(e)
+        return record
+
+    def _stop_profilers(self, record):
+        global _profiling
+        if self._profile is not None:
+            self._profile.disable()
+            _profiling = False
+            base = os.path.splitext(log_path())[0]
+            path = f"{base}_{self.name}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+            try:
+                self._profile.dump_stats(path)
+                record["profile"] = path
+            except OSError as e:
+                record["profile_error"] = str(e)
+            self._profile = None
+        if self._trace:
+            snapshot = tracemalloc.take_snapshot()
+            record["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            tracemalloc.stop()
+            self._trace = False
+            record["tracemalloc_top"] = [
+                f"{stat.traceback}: {stat.size / 1024:.1f} KiB ({stat.count})"
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]]
+
+
+def summary_text(record):
+    """状态栏中显示的摘要，如“用时 2.31s · 分割 0.05s · 编码 8.12s(进程合计) · 43.2 个/秒 · 峰值内存 96MB”"""
+    parts = [f"用时 {record['elapsed']:.2f}s"]
+    for stage, data in record["stages"].items():
+        label = STAGE_LABELS.get(stage, stage)
+        text = f"{label} {data['seconds']:.2f}s"
+        if data.get("worker"):
+            text += "(进程合计)"
+        parts.append(text)
+    if record.get("codes_per_s"):
+        parts.append(f"{record['codes_per_s']} 个/秒")
+    if record.get("peak_rss_mb") is not None:
+        parts.append(f"峰值内存 {record['peak_rss_mb']:.0f}MB")
+    return " · ".join(parts)
+
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+def peak_rss_mb(children=False):
+    """进程的峰值常驻内存（MB），无法获取时返回None
+
+    children: 为True时返回已结束的子进程（如进程池）中的最大值（仅Unix）
+    """
+    try:
+        import resource
+    except ImportError:
+        if children:
+            return None
+        counters = _windows_memory_counters()
+        return None if counters is None else counters.PeakWorkingSetSize / (1024 * 1024)
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb():
+    """进程当前的常驻内存（MB），无法获取时返回None（Linux读取/proc，Windows为工作集）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    counters = _windows_memory_counters()
+    return None if counters is None else counters.WorkingSetSize / (1024 * 1024)
+
+
+def _windows_memory_counters():
+    """Windows下进程的内存计数（PROCESS_MEMORY_COUNTERS），其他系统或失败时返回None"""
+    if os.name != "nt":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        get_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_process.restype = wintypes.HANDLE
+        get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_info.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not get_info(get_process(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+    except (OSError, AttributeError):
+        return None
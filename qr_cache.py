@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+按内容寻址的二维码模块矩阵缓存
+
+以 文本段（或二进制帧）+ 编码参数 的SHA-256作为键缓存生成的模块矩阵，修改一小段文字
+后重新生成时，只有内容变化的段需要重新编码。内存中按LRU保留最近使用的矩阵，
+可选地同时保存到磁盘目录，跨次运行复用。
+
+缓存的是模块矩阵而不是图像，像素尺寸和空白边距在绘制时才决定，不影响缓存。
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from bitmatrix import BitMatrix
+
+CACHE_FORMAT = 1  # 缓存格式或编码方式变化时递增，旧缓存自动失效
+DEFAULT_MAX_ITEMS = 8192  # 内存中最多缓存的矩阵数量（版本20约1.2KB/个）
+CACHE_DIR_ENV = "TEXT_COPIER_CACHE_DIR"  # 设置后图形界面同时使用该磁盘缓存目录
+
+
+def cache_key(segment, params=()):
+    """缓存键：文本段（或二进制帧）和编码参数的SHA-256"""
+    h = hashlib.sha256(f"{CACHE_FORMAT}|{params!r}|".encode("utf-8"))
+    if isinstance(segment, bytes):
+        h.update(b"b")
+        h.update(segment)
+    else:
+        h.update(b"t")
+        h.update(segment.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+class MatrixCache:
+    """模块矩阵缓存：内存LRU + 可选磁盘目录（线程安全）"""
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, cache_dir=None):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.items = OrderedDict()  # 键 -> BitMatrix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def get(self, segment, params=()):
+        """返回缓存的矩阵，没有时返回None"""
+        key = cache_key(segment, params)
+        with self._lock:
+            matrix = self.items.get(key)
+            if matrix is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return matrix
+
+        if self.cache_dir:
+            matrix = self._load(key)
+            if matrix is not None:
+                self._remember(key, matrix)
+                with self._lock:
+                    self.hits += 1
+                return matrix
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, segment, matrix, params=()):
+        """缓存矩阵（启用磁盘缓存时同时写入磁盘）"""
+        key = cache_key(segment, params)
+        self._remember(key, matrix)
+        if self.cache_dir:
+            try:
+                self._store(key, matrix)
+            except OSError:
+                pass  # 磁盘缓存只是加速手段，写入失败不影响生成
+
+    def _remember(self, key, matrix):
+        with self._lock:
+            self.items[key] = matrix
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                raw = f.read()
+            return BitMatrix(int.from_bytes(raw[:2], "big"), raw[2:])
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, matrix):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再改名，中断时不会留下不完整的缓存
+        part = f"{path}.{os.getpid()}.part"
+        with open(part, "wb") as f:
+            f.write(matrix.size.to_bytes(2, "big") + matrix.data)
+        os.replace(part, path)
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        with self._lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成核心模块 - 不依赖Tkinter，可在无显示环境中使用
+
+图形界面（main.py）和命令行（cli.py）共用这里的分割与编码逻辑。
+"""
+
+import os
+from collections import OrderedDict, deque, namedtuple
+from functools import partial
+
+import qrcode
+
+import binary_payload
+import compression
+import qr_mask
+import segmenter
+from bitmatrix import BitMatrix
+
+# 二维码参数（与图形界面保持一致）
+DEFAULT_MAX_CHARS = 800  # 每个二维码最多包含的字符数
+ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_M
+BOX_SIZE = 10
+BORDER = 4
+PREVIEW_SIZE = 350  # 预览图边长
+MAX_PENDING = 64  # 使用共享进程池时每个序列最多同时提交的段数（限制内存占用）
+
+# 纠错等级：等级越高越耐污损，但每个二维码能放的内容越少
+ECC_LEVELS = OrderedDict([
+    ("L", qrcode.constants.ERROR_CORRECT_L),
+    ("M", qrcode.constants.ERROR_CORRECT_M),
+    ("Q", qrcode.constants.ERROR_CORRECT_Q),
+    ("H", qrcode.constants.ERROR_CORRECT_H),
+])
+ECC_RECOVERY = {  # 大约可恢复的污损比例（%）
+    qrcode.constants.ERROR_CORRECT_L: 7,
+    qrcode.constants.ERROR_CORRECT_M: 15,
+    qrcode.constants.ERROR_CORRECT_Q: 25,
+    qrcode.constants.ERROR_CORRECT_H: 30,
+}
+MASK_AUTO = "auto"  # 按标准扣分规则在8种掩码中选择（qr_mask的快速实现）
+MASK_PATTERNS = tuple(range(qr_mask.MASK_COUNT))
+
+# 编码策略：纠错等级；固定版本（None为按内容选择最小版本）；掩码（MASK_AUTO或0-7）
+# 影响模块矩阵，同时作为缓存键的一部分
+EncodePolicy = namedtuple("EncodePolicy", "error_correction version mask")
+DEFAULT_POLICY = EncodePolicy(ERROR_CORRECTION, None, MASK_AUTO)
+
+
+def ecc_name(error_correction):
+    """纠错等级的名称（L/M/Q/H）"""
+    for name, value in ECC_LEVELS.items():
+        if value == error_correction:
+            return name
+    raise ValueError(f"无效的纠错等级: {error_correction}")
+
+
+def describe_policy(policy, version=None):
+    """编码策略在容量和编码速度上的取舍说明，version为分割时的目标版本"""
+    version = policy.version or version or segmenter.DEFAULT_VERSION
+    ecc = policy.error_correction
+    parts = [f"纠错{ecc_name(ecc)}：可恢复约{ECC_RECOVERY[ecc]}%的污损，"
+             f"版本{version}每个二维码最多 {segmenter.capacity(version, ecc)} 字节"]
+    if policy.version:
+        parts.append(f"固定版本{version}：所有二维码大小相同，省去版本选择，编码更快")
+    else:
+        parts.append("版本按内容自动选择：最后一个二维码可能较小")
+    if policy.mask == MASK_AUTO:
+        parts.append("掩码自动选择：扫描最可靠")
+    else:
+        parts.append(f"固定掩码{policy.mask}：省去掩码评估，编码略快，个别二维码可能较难识别")
+    return "；".join(parts)
+
+
+def normalize_text(text):
+    """处理代理对字符，返回可编码的文本"""
+    return text.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+
+def split_text(text, max_chars=DEFAULT_MAX_CHARS):
+    """将长文本分割为多个段落，确保尽量不会在单词中间分割"""
+    if len(text) <= max_chars:
+        return [text]
+    return list(segmenter.iter_split_text(text, max_chars))
+
+
+def split_segments(text, max_chars=DEFAULT_MAX_CHARS, version=None, compress=None, stable=False,
+                   error_correction=ERROR_CORRECTION):
+    """分割文本：指定version时按该版本二维码容量分割，否则按字符数分割
+
+    compress: 压缩方式（zlib/lzma/bz2），先压缩再分割，每段带有供接收端解压的头部
+    stable: 稳定分段，断点由内容决定，修改文字后只有附近的段变化（不压缩时有效）
+    error_correction: 按容量分割时使用的纠错等级，应与编码时一致
+    """
+    if compress:
+        return compression.build_segments(text, compress, max_chars, version, error_correction)
+    if stable:
+        return list(segmenter.iter_stable_chunks((text,), max_chars, version, error_correction))
+    if version:
+        return segmenter.split_by_capacity(text, version, error_correction)
+    return split_text(text, max_chars)
+
+
+def iter_segments(chunks, max_chars=DEFAULT_MAX_CHARS, version=None, compress=None, stable=False,
+                  error_correction=ERROR_CORRECTION):
+    """与split_segments相同，但输入为按顺序产出文本块的可迭代对象（如大文件），逐段产出"""
+    if compress:
+        return iter(compression.build_segments(chunks, compress, max_chars, version, error_correction))
+    if stable:
+        return segmenter.iter_stable_chunks(chunks, max_chars, version, error_correction)
+    if version:
+        return segmenter.iter_capacity_chunks(chunks, version, error_correction)
+    return segmenter.iter_split_chunks(chunks, max_chars)
+
+
+def make_qr_matrix(segment, policy=DEFAULT_POLICY):
+    """生成单个文本段（或二进制帧）的二维码模块矩阵（BitMatrix）
+
+    每个模块只占1比特，体积远小于图像，适合在工作进程与界面之间传递和长期保存。
+    policy: 编码策略（EncodePolicy）；固定版本时内容超出该版本容量会抛出异常
+    """
+    error_correction, version, mask = policy
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=error_correction,
+        box_size=BOX_SIZE,
+        border=BORDER,
+        # 自动选择掩码时只用掩码0生成一次，其余掩码由qr_mask换算和评估
+        mask_pattern=0 if mask == MASK_AUTO else mask,
+    )
+    if isinstance(segment, bytes):
+        # 二进制帧只使用字节模式，避免模式切换使实际占用超过按容量计算的长度
+        segment = qrcode.util.QRData(segment, mode=segmenter.MODE_8BIT_BYTE)
+    qr.add_data(segment)
+    qr.make(fit=version is None)
+
+    matrix = BitMatrix.from_modules(qr.modules)
+    if mask == MASK_AUTO:
+        matrix = qr_mask.best_mask(matrix, qr.version, error_correction)[1]
+    return matrix
+
+
+def matrix_to_image(matrix, box_size=BOX_SIZE, border=BORDER):
+    """把模块矩阵绘制为二维码图像（黑白"1"模式），box_size为每个模块的像素数"""
+    return matrix.to_image(box_size, border)
+
+
+def _center(img, size):
+    """把图像居中放到 size x size 的白色画布上（多出的部分相当于加宽空白边距）"""
+    if img.size[0] == size:
+        return img
+    from PIL import Image  # 启动时不加载PIL（见 bitmatrix.py）
+
+    canvas = Image.new("1", (size, size), 1)
+    offset = (size - img.size[0]) // 2
+    canvas.paste(img, (offset, offset))
+    return canvas
+
+
+def render_preview(matrix, border=BORDER, size=PREVIEW_SIZE):
+    """绘制界面预览用的二维码图像
+
+    直接按能放进预览区域的最大整数倍放大，不先绘制大图再缩小，模块边缘清晰。
+    """
+    return _center(matrix.to_image(matrix.fit_scale(border, size), border), size)
+
+
+def render_images(matrix, box_size=BOX_SIZE, border=BORDER, size=PREVIEW_SIZE):
+    """一次栅格化出 (预览图, 导出图)，两者共用同一个每模块1像素的图像"""
+    preview, full = matrix.to_images((matrix.fit_scale(border, size), box_size), border)
+    return _center(preview, size), full
+
+
+def make_qr_image(segment):
+    """生成单个文本段的原始二维码图像"""
+    return matrix_to_image(make_qr_matrix(segment))
+
+
+def qr_filename(index, total):
+    """二维码文件名，index从0开始"""
+    return f"二维码_{index + 1}_{total}.png"
+
+
+def iter_qr_matrices(segments, workers=None, cache=None, policy=DEFAULT_POLICY, executor=None):
+    """按顺序生成每个文本段的模块矩阵，workers>1时使用进程池并行
+
+    cache: 可选的 qr_cache.MatrixCache，命中的段不再编码，新编码的矩阵写入缓存
+    policy: 编码策略（EncodePolicy）
+    executor: 可选的共享进程池（如批量任务中多个文档共用），此时忽略workers，
+        同时最多提交 MAX_PENDING 个段，按顺序取回结果
+    """
+    if cache is None:
+        for matrix in _encode_matrices(segments, workers, policy, executor):
+            yield matrix
+        return
+
+    cached = [cache.get(segment, policy) for segment in segments]
+    encoded = _encode_matrices([s for s, m in zip(segments, cached) if m is None], workers, policy, executor)
+    for segment, matrix in zip(segments, cached):
+        if matrix is None:
+            matrix = next(encoded)
+            cache.put(segment, matrix, policy)
+        yield matrix
+
+
+def _encode_matrices(segments, workers, policy, executor=None):
+    if executor is not None:
+        for matrix in _encode_shared(segments, policy, executor):
+            yield matrix
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(segments) <= 1:
+        for segment in segments:
+            yield make_qr_matrix(segment, policy)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for matrix in executor.map(partial(make_qr_matrix, policy=policy), segments, chunksize=8):
+            yield matrix
+
+
+def _encode_shared(segments, policy, executor):
+    """在共享进程池中编码，提交窗口有上限；提前停止迭代时取消尚未开始的任务"""
+    pending = deque()
+    try:
+        for segment in segments:
+            pending.append(executor.submit(make_qr_matrix, segment, policy))
+            if len(pending) >= MAX_PENDING:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_qr_images(segments, workers=None, box_size=BOX_SIZE, cache=None, policy=DEFAULT_POLICY):
+    """按顺序生成每个文本段的二维码图像"""
+    for matrix in iter_qr_matrices(segments, workers, cache, policy):
+        yield matrix_to_image(matrix, box_size)
+
+
+def save_qr_sequence(text, save_dir, max_chars=DEFAULT_MAX_CHARS, workers=None, progress=None,
+                     version=None, box_size=BOX_SIZE, compress=None, cache=None, stable=False,
+                     policy=DEFAULT_POLICY):
+    """将文本分割、编码并保存为PNG序列，返回保存的文件路径列表
+
+    progress: 可选回调 progress(done, total)
+    version: 按该二维码版本的容量分割（此时忽略max_chars）
+    box_size: 保存图片中每个模块的像素数
+    compress: 先压缩再分割（zlib/lzma/bz2）
+    cache: 可选的 qr_cache.MatrixCache，内容未变的段直接复用
+    stable: 稳定分段，与cache配合时修改少量文字后重新生成只需编码变化的段
+    policy: 编码策略（EncodePolicy）；固定版本时按该版本的容量分割
+    """
+    segments = split_segments(normalize_text(text), max_chars, version or policy.version, compress, stable,
+                              policy.error_correction)
+    return _save_segments(segments, save_dir, workers, progress, box_size, cache, policy)
+
+
+def save_file_sequence(path, save_dir, max_bytes=DEFAULT_MAX_CHARS, workers=None, progress=None,
+                       version=None, box_size=BOX_SIZE, cache=None, policy=DEFAULT_POLICY):
+    """将任意文件按二进制帧（字节模式）编码并保存为PNG序列，返回保存的文件路径列表
+
+    max_bytes: 每个二维码最多包含的字节数（含帧头部）
+    """
+    segments = binary_payload.split_file(path, max_bytes, version or policy.version, policy.error_correction)
+    return _save_segments(segments, save_dir, workers, progress, box_size, cache, policy)
+
+
+def _save_segments(segments, save_dir, workers, progress, box_size, cache, policy):
+    os.makedirs(save_dir, exist_ok=True)
+
+    paths = []
+    for i, img in enumerate(iter_qr_images(segments, workers, box_size, cache, policy)):
+        file_path = os.path.join(save_dir, qr_filename(i, len(segments)))
+        img.save(file_path, "PNG")
+        paths.append(file_path)
+        if progress is not None:
+            progress(i + 1, len(segments))
+
+    return paths
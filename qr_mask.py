@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+二维码掩码的快速选择
+
+qrcode 自动选择掩码时，会把8种掩码各完整生成一遍矩阵，再逐个模块计算扣分，
+占了编码时间的八成以上。这里只生成一次（掩码0）的矩阵，其余掩码通过对数据区做
+异或得到；四条扣分规则全部用整数的位运算一次处理整个矩阵，不再逐个模块循环。
+
+扣分规则和选择结果与 qrcode.util.lost_point 完全一致（评估时格式信息区同样视为
+浅色），因此生成的二维码与原来逐一尝试的结果相同。
+
+矩阵按 BitMatrix 的打包格式整体视为一个大整数：每行补齐到整字节，行末的补齐位
+始终为0，恰好把相邻两行隔开，水平方向的连续模块不会跨行计算。
+"""
+
+from functools import lru_cache
+
+import qrcode
+from qrcode import util
+
+from bitmatrix import BitMatrix
+
+MASK_COUNT = 8
+
+# 规则3：1:1:3:1:1 的深浅模块，一侧带4个浅色模块（与定位图形相似）
+_FINDER_PATTERNS = ((1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0),
+                    (0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1))
+
+try:
+    _popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def _popcount(value):
+        return bin(value).count("1")
+
+
+def _pack(modules):
+    """把模块列表（None视为浅色）打包为整数，布局与 BitMatrix.data 相同"""
+    return int.from_bytes(BitMatrix.from_modules(modules).data, "big")
+
+
+def _function_modules(version, error_correction, mask_pattern, test):
+    """qrcode放置功能图形（定位、校正、时序、格式和版本信息）后的矩阵，数据区为None"""
+    qr = qrcode.QRCode(version=version, error_correction=error_correction)
+    qr.data_cache = ()  # 不需要编码数据
+    qr.map_data = lambda data, mask_pattern: None
+    qr.makeImpl(test, mask_pattern)
+    return qr.modules
+
+
+def _windows(real, step, length):
+    """length个模块（间隔step位）都在矩阵内的起点"""
+    valid = real
+    for k in range(1, length):
+        valid &= real >> (k * step)
+    return valid
+
+
+class _Layout:
+    """某个版本和纠错等级下与数据无关的部分，每个进程只计算一次"""
+
+    def __init__(self, version, error_correction):
+        size = version * 4 + 17
+        row_bytes = (size + 7) // 8
+        self.size = size
+        self.nbytes = row_bytes * size
+        self.width = width = row_bytes * 8  # 相邻两行在整数中的位距
+        self.total = size * size
+
+        real_row = ((1 << size) - 1) << (width - size)
+        real = 0
+        for _ in range(size):
+            real = (real << width) | real_row
+        self.real = real
+
+        # 评估时使用的功能图形（格式信息区为浅色），以及各掩码实际写入的格式信息
+        test_modules = _function_modules(version, error_correction, 0, True)
+        self.test_function = _pack(test_modules)
+        self.function = [_pack(_function_modules(version, error_correction, mask, False))
+                         for mask in range(MASK_COUNT)]
+
+        # 各掩码在数据区翻转的模块
+        self.masks = []
+        for mask in range(MASK_COUNT):
+            func = util.mask_func(mask)
+            rows = [[cell is None and func(i, j) for j, cell in enumerate(row)]
+                    for i, row in enumerate(test_modules)]
+            self.masks.append(_pack(rows))
+
+        # 各扣分规则的有效起点：连续5个（规则1）、2x2（规则2）、连续11个（规则3）
+        self.run_h = _windows(real, 1, 5)
+        self.run_v = _windows(real, width, 5)
+        pair = _windows(real, 1, 2)
+        self.block = pair & (pair >> width)
+        self.finder_h = _windows(real, 1, 11)
+        self.finder_v = _windows(real, width, 11)
+
+
+@lru_cache(maxsize=None)
+def _layout(version, error_correction):
+    return _Layout(version, error_correction)
+
+
+def _run_penalty(x, step, valid):
+    """规则1：同色连续 n(>=5) 个模块扣 n-2 分，即长度为5的窗口数 + 每段2分"""
+    same = ~(x ^ (x >> step))
+    windows = same & (same >> step) & (same >> (2 * step)) & (same >> (3 * step)) & valid
+    starts = windows & ~(windows << step)
+    return _popcount(windows) + 2 * _popcount(starts)
+
+
+def _finder_penalty(x, step, valid):
+    """规则3：每处类似定位图形的排列扣40分"""
+    shifted = [x >> (k * step) for k in range(11)]
+    count = 0
+    for pattern in _FINDER_PATTERNS:
+        match = valid
+        for bit, value in zip(pattern, shifted):
+            match &= value if bit else ~value
+        count += _popcount(match)
+    return 40 * count
+
+
+def penalty(x, layout):
+    """按4条规则计算打包矩阵的扣分，与 qrcode.util.lost_point 相同"""
+    width = layout.width
+    points = _run_penalty(x, 1, layout.run_h) + _run_penalty(x, width, layout.run_v)
+
+    # 规则2：每个同色的2x2方块扣3分（方块可以重叠）
+    same_h = ~(x ^ (x >> 1))
+    same_v = ~(x ^ (x >> width))
+    points += 3 * _popcount(same_h & (same_h >> width) & same_v & layout.block)
+
+    points += _finder_penalty(x, 1, layout.finder_h) + _finder_penalty(x, width, layout.finder_v)
+
+    # 规则4：深色模块比例每偏离50%达5%扣10分
+    percent = _popcount(x) * 100.0 / layout.total
+    points += int(abs(percent - 50) / 5) * 10
+    return points
+
+
+def best_mask(matrix, version, error_correction, mask_pattern=0):
+    """由使用mask_pattern生成的矩阵，得到扣分最低的掩码及其矩阵
+
+    返回 (掩码编号, BitMatrix)。扣分相同时取编号较小的掩码，与qrcode一致。
+    """
+    layout = _layout(version, error_correction)
+    x = int.from_bytes(matrix.data, "big")
+    # 去掉原掩码，格式信息区换成评估时的浅色
+    base = x ^ layout.masks[mask_pattern] ^ layout.function[mask_pattern] ^ layout.test_function
+
+    best = None
+    for mask in range(MASK_COUNT):
+        points = penalty(base ^ layout.masks[mask], layout)
+        if best is None or points < best[0]:
+            best = (points, mask)
+
+    mask = best[1]
+    if mask == mask_pattern:
+        return mask, matrix
+    x = base ^ layout.masks[mask] ^ layout.test_function ^ layout.function[mask]
+    return mask, BitMatrix(matrix.size, x.to_bytes(layout.nbytes, "big"))
@@ -0,0 +1,660 @@
+# -*- coding: utf-8 -*-
+"""
+局域网流式服务：手机在浏览器中直接拉取二维码序列（或原始文本段），不必对着屏幕逐个扫描
+
+只使用标准库（asyncio），完全离线。监听所有网卡，但只接受局域网（私有地址、本机、
+链路本地）的连接，其他来源返回403。请求头 Host 必须是IP地址或localhost加本服务的端口
+（防止DNS重绑定：恶意网页把自己的域名解析到局域网地址后读取内容），浏览器发起的
+WebSocket连接的 Origin 必须与 Host 一致（防止其他网页跨域连接），否则同样返回403。
+
+HTTP 接口::
+
+    GET /                    内置的接收页面（无外部资源）
+    GET /info                当前序列信息 {"sequence", "total", "available"}
+    GET /segment/<i>         第i段（从0开始）的原始内容
+    GET /frame/<i>.png       第i个二维码的PNG图像
+    GET /ws?from=<i>&mode=png|raw
+                             WebSocket：从第i段开始依次推送
+
+WebSocket 中服务端发送的二进制消息为 序号(4字节) + 总数(4字节)（大端序）+ 内容
+（PNG图像或原始段），文本消息为JSON控制消息：
+
+- {"type": "hello", "sequence", "total", "start", "mode"}  连接后首先发送
+- {"type": "reset", "sequence", "total"}  重新生成了二维码，客户端应从0开始重新接收
+- {"type": "done", "total"}  全部发送完毕（连接保持，可继续seek）
+
+客户端发送 {"ack": i} 确认已处理到第i段，服务端最多只领先确认 WINDOW 段（背压），
+网络较慢或手机处理不过来时不会堆积；{"seek": i} 跳转到第i段。断线后用 from=最后确认的
+序号+1 重新连接即可续传。serve/pull 命令（cli.py）和 pull() 是用于测试的本地客户端。
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import ipaddress
+import json
+import os
+import socket
+import struct
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import qr_core
+
+DEFAULT_HOST = "0.0.0.0"  # 监听所有网卡（只接受局域网来源）
+DEFAULT_PORT = 8765
+WINDOW = 4  # 最多领先客户端确认的段数
+POLL_INTERVAL = 0.2  # 等待新二维码生成时的检查间隔（秒）
+MAX_REQUEST_BYTES = 16 * 1024  # 请求头的最大长度
+MAX_MESSAGE_BYTES = 64 * 1024  # 客户端WebSocket消息的最大长度
+
+MODE_PNG = "png"  # 推送二维码图像
+MODE_RAW = "raw"  # 推送原始文本段（或二进制帧）
+MODES = (MODE_PNG, MODE_RAW)
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_FRAME_HEADER = struct.Struct(">II")  # 序号、总数
+
+# WebSocket 操作码
+_OP_CONTINUATION = 0x0
+_OP_TEXT = 0x1
+_OP_BINARY = 0x2
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+
+
+class ProtocolError(Exception):
+    """请求或WebSocket消息格式错误"""
+
+
+def is_lan_address(address):
+    """是否为局域网地址（私有地址、本机、链路本地）"""
+    try:
+        ip = ipaddress.ip_address(address.split("%")[0])
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_private or ip.is_loopback or ip.is_link_local
+
+
+def is_allowed_host(host, port):
+    """请求头 Host 是否为IP地址或localhost，且端口为port（省略端口时视为80）"""
+    try:
+        url = urlsplit("//" + host)
+        hostname, host_port = url.hostname, url.port or 80
+    except ValueError:
+        return False
+    if not hostname or host_port != port or url.username is not None or url.path:
+        return False
+    if hostname == "localhost":
+        return True
+    try:
+        ipaddress.ip_address(hostname)
+    except ValueError:
+        return False
+    return True
+
+
+def is_same_origin(origin, host):
+    """WebSocket请求的 Origin 是否指向当前的 Host"""
+    url = urlsplit(origin)
+    return url.scheme in ("http", "https") and url.netloc.lower() == host.lower()
+
+
+def lan_ip():
+    """本机在局域网中的地址（用于显示访问地址），无法确定时返回127.0.0.1"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # UDP的connect不发送数据，只用来选出默认路由对应的网卡地址
+        sock.connect(("10.255.255.255", 1))
+        return sock.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        sock.close()
+
+
+def segment_payload(segment):
+    """文本段的UTF-8字节（二进制帧原样）"""
+    return segment if isinstance(segment, bytes) else segment.encode("utf-8")
+
+
+def png_bytes(matrix, box_size):
+    buf = io.BytesIO()
+    qr_core.matrix_to_image(matrix, box_size).save(buf, "PNG")
+    return buf.getvalue()
+
+
+# ---- WebSocket 帧 ----
+
+def encode_ws_frame(opcode, payload, mask=False):
+    """组装一个完整的WebSocket帧；客户端发送的帧需要掩码"""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", length)
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    return bytes(header) + key + _apply_mask(payload, key)
+
+
+def _apply_mask(data, key):
+    # 按整数一次异或整个消息，比逐字节循环快得多
+    repeated = (key * (len(data) // 4 + 1))[:len(data)]
+    value = int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")
+    return value.to_bytes(len(data), "big")
+
+
+async def read_ws_message(reader, max_bytes=MAX_MESSAGE_BYTES):
+    """读取一条完整的消息（合并分片），返回 (操作码, 内容)"""
+    opcode = None
+    parts = []
+    size = 0
+    while True:
+        first, second = await reader.readexactly(2)
+        frame_opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await reader.readexactly(8))[0]
+        if length > max_bytes:
+            raise ProtocolError("WebSocket消息过长")
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key is not None:
+            payload = _apply_mask(payload, key)
+        if frame_opcode >= _OP_CLOSE:
+            return frame_opcode, payload  # 控制帧不分片
+        if frame_opcode != _OP_CONTINUATION:
+            opcode = frame_opcode
+        parts.append(payload)
+        size += length
+        if size > max_bytes:
+            raise ProtocolError("WebSocket消息过长")
+        if first & 0x80:
+            return opcode, b"".join(parts)
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+async def _read_request(reader):
+    """读取HTTP请求行和请求头，返回 (方法, 路径, 查询参数, 请求头)"""
+    try:
+        data = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise ProtocolError("请求头过长")
+    lines = data.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise ProtocolError("无效的请求行")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    return method, url.path, parse_qs(url.query), headers
+
+
+def _int_param(query, name, default=0):
+    try:
+        return max(0, int(query.get(name, [default])[0]))
+    except ValueError:
+        raise ProtocolError(f"无效的参数: {name}")
+
+
+class StreamServer:
+    """在后台线程中运行的流式服务
+
+    snapshot: 返回 (序列ID, 二维码列表, 总数) 的函数，列表元素为含 "text"（段）和
+        "matrix"（BitMatrix）的字典（与图形界面的 qr_codes 相同）。生成过程中列表可以
+        逐渐变长；序列ID变化表示重新生成了内容。会在服务线程中调用。
+    """
+
+    def __init__(self, snapshot, host=DEFAULT_HOST, port=DEFAULT_PORT, box_size=qr_core.BOX_SIZE,
+                 allow=is_lan_address):
+        self.snapshot = snapshot
+        self.host = host
+        self.port = port
+        self.box_size = box_size
+        self.allow = allow
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.clients = 0  # 当前WebSocket连接数
+        self.sent = 0  # 已推送的段数
+        self._ready = threading.Event()
+        self._error = None
+        self._connections = {}  # 正在处理的连接: writer -> 处理结束时完成的future
+        # 发给客户端的序列标识带上本次启动的随机前缀，服务重启后客户端不会误用之前的续传进度
+        self._instance = os.urandom(4).hex()
+
+    def sequence_label(self, sequence):
+        return f"{self._instance}-{sequence}"
+
+    @property
+    def url(self):
+        host = lan_ip() if self.host in ("0.0.0.0", "") else self.host
+        return f"http://{host}:{self.port}/"
+
+    def start(self):
+        """启动服务线程，监听成功后返回；端口被占用等错误时抛出OSError"""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, limit=MAX_REQUEST_BYTES))
+            # 端口为0时使用系统分配的端口
+            self.port = self.server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            # 关闭仍在进行的连接，等待它们的处理协程结束
+            for writer in list(self._connections):
+                writer.close()
+            if self._connections:
+                self.loop.run_until_complete(asyncio.wait(list(self._connections.values()), timeout=2))
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    def stop(self):
+        """停止服务（可在任意线程中调用）"""
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+
+    # ---- HTTP ----
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        finished = self._connections[writer] = self.loop.create_future()
+        try:
+            if not peer or not self.allow(peer[0]):
+                await self._respond(writer, 403, "text/plain; charset=utf-8", "只接受局域网连接".encode("utf-8"))
+                return
+            method, path, query, headers = await _read_request(reader)
+            if not is_allowed_host(headers.get("host", ""), self.port):
+                await self._respond(writer, 403, "text/plain; charset=utf-8", "请使用IP地址访问".encode("utf-8"))
+            elif method != "GET":
+                await self._respond(writer, 405, "text/plain; charset=utf-8", b"GET only")
+            elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(reader, writer, query, headers)
+            else:
+                await self._route(writer, path)
+        except ProtocolError as e:
+            await self._respond(writer, 400, "text/plain; charset=utf-8", str(e).encode("utf-8"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            del self._connections[writer]
+            finished.set_result(None)
+
+    async def _respond(self, writer, status, content_type, body):
+        reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+                  405: "Method Not Allowed"}.get(status, "OK")
+        writer.write((f"HTTP/1.1 {status} {reason}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      "Cache-Control: no-store\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, writer, path):
+        if path == "/":
+            await self._respond(writer, 200, "text/html; charset=utf-8", CLIENT_PAGE.encode("utf-8"))
+            return
+        sequence, items, total = self.snapshot()
+        if path == "/info":
+            body = json.dumps({"sequence": self.sequence_label(sequence), "total": total, "available": len(items)})
+            await self._respond(writer, 200, "application/json", body.encode("utf-8"))
+            return
+        for prefix, suffix in (("/segment/", ""), ("/frame/", ".png")):
+            if path.startswith(prefix) and path.endswith(suffix):
+                number = path[len(prefix):len(path) - len(suffix)]
+                if not number.isdigit() or int(number) >= len(items):
+                    break
+                item = items[int(number)]
+                if suffix:
+                    body = await self.loop.run_in_executor(None, png_bytes, item["matrix"], self.box_size)
+                    await self._respond(writer, 200, "image/png", body)
+                elif isinstance(item["text"], bytes):
+                    await self._respond(writer, 200, "application/octet-stream", item["text"])
+                else:
+                    await self._respond(writer, 200, "text/plain; charset=utf-8", segment_payload(item["text"]))
+                return
+        await self._respond(writer, 404, "text/plain; charset=utf-8", b"Not Found")
+
+    # ---- WebSocket ----
+
+    async def _websocket(self, reader, writer, query, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise ProtocolError("缺少 Sec-WebSocket-Key")
+        # 浏览器总会带上 Origin；命令行客户端（pull）不带，不受跨域限制
+        origin = headers.get("origin")
+        if origin is not None and not is_same_origin(origin, headers.get("host", "")):
+            await self._respond(writer, 403, "text/plain; charset=utf-8", "不接受其他网页的连接".encode("utf-8"))
+            return
+        start = _int_param(query, "from")
+        mode = query.get("mode", [MODE_PNG])[0]
+        if mode not in MODES:
+            raise ProtocolError(f"无效的模式: {mode}")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n").encode("ascii"))
+        await writer.drain()
+
+        self.clients += 1
+        session = _Session(self, reader, writer, start, mode)
+        try:
+            await session.run()
+        finally:
+            self.clients -= 1
+
+
+class _Session:
+    """一个WebSocket连接：按客户端确认的进度推送，最多领先 WINDOW 段"""
+
+    def __init__(self, server, reader, writer, start, mode):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.mode = mode
+        self.next = start  # 下一个要发送的序号
+        self.acked = start - 1  # 客户端已确认的最大序号
+        self.wake = asyncio.Event()
+        self.closed = False
+
+    async def send(self, opcode, payload):
+        self.writer.write(encode_ws_frame(opcode, payload))
+        await self.writer.drain()  # 网络发送缓冲区满时在此等待
+
+    async def send_json(self, message):
+        await self.send(_OP_TEXT, json.dumps(message).encode("utf-8"))
+
+    async def receive(self):
+        """处理客户端消息：确认、跳转、ping、关闭"""
+        try:
+            while True:
+                opcode, payload = await read_ws_message(self.reader)
+                if opcode == _OP_CLOSE:
+                    self.writer.write(encode_ws_frame(_OP_CLOSE, payload[:2]))
+                    break
+                if opcode == _OP_PING:
+                    self.writer.write(encode_ws_frame(_OP_PONG, payload))
+                    continue
+                if opcode != _OP_TEXT:
+                    continue
+                try:
+                    message = json.loads(payload.decode("utf-8"))
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                if isinstance(message.get("ack"), int):
+                    self.acked = max(self.acked, message["ack"])
+                if isinstance(message.get("seek"), int) and message["seek"] >= 0:
+                    self.next = message["seek"]
+                    self.acked = self.next - 1
+                self.wake.set()
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.closed = True
+            self.wake.set()
+
+    async def wait(self, timeout=POLL_INTERVAL):
+        try:
+            await asyncio.wait_for(self.wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.wake.clear()
+
+    async def run(self):
+        server = self.server
+        sequence, items, total = server.snapshot()
+        await self.send_json({"type": "hello", "sequence": server.sequence_label(sequence), "total": total,
+                              "start": self.next, "mode": self.mode})
+        receiver = asyncio.ensure_future(self.receive())
+        done_sent = False
+        try:
+            while not self.closed:
+                current, items, total = server.snapshot()
+                if current != sequence:
+                    sequence = current
+                    self.next, self.acked, done_sent = 0, -1, False
+                    await self.send_json({"type": "reset", "sequence": server.sequence_label(sequence), "total": total})
+                if total and self.next >= total:
+                    if not done_sent and self.acked >= total - 1:
+                        await self.send_json({"type": "done", "total": total})
+                        done_sent = True
+                    await self.wait()
+                    continue
+                if self.next - self.acked > WINDOW or self.next >= len(items):
+                    # 等待客户端确认，或等待后面的二维码生成
+                    await self.wait()
+                    continue
+                done_sent = False
+                index = self.next
+                item = items[index]
+                if self.mode == MODE_PNG:
+                    payload = await server.loop.run_in_executor(None, png_bytes, item["matrix"], server.box_size)
+                else:
+                    payload = segment_payload(item["text"])
+                await self.send(_OP_BINARY, _FRAME_HEADER.pack(index, total) + payload)
+                server.sent += 1
+                if self.next == index:  # 发送期间没有跳转
+                    self.next = index + 1
+        except ConnectionError:
+            pass
+        finally:
+            receiver.cancel()
+
+
+# ---- 本地测试客户端 ----
+
+async def _open_ws(host, port, start, mode):
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((f"GET /ws?from={start}&mode={mode} HTTP/1.1\r\n"
+                  f"Host: {host}:{port}\r\n"
+                  "Upgrade: websocket\r\n"
+                  "Connection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    await writer.drain()
+    response = await reader.readuntil(b"\r\n\r\n")
+    if not response.startswith(b"HTTP/1.1 101") or _accept_key(key).encode("ascii") not in response:
+        writer.close()
+        status = response.split(b"\r\n")[0].decode("latin-1")
+        raise ProtocolError(f"WebSocket握手失败: {status}")
+    return reader, writer
+
+
+async def _pull(host, port, start, mode, limit, on_frame):
+    reader, writer = await _open_ws(host, port, start, mode)
+    frames = {}
+    info = {"sequence": None, "total": None, "done": False}
+    try:
+        while True:
+            opcode, payload = await read_ws_message(reader, max_bytes=1 << 26)
+            if opcode == _OP_CLOSE:
+                break
+            if opcode == _OP_TEXT:
+                message = json.loads(payload.decode("utf-8"))
+                if message["type"] in ("hello", "reset"):
+                    info["sequence"], info["total"] = message["sequence"], message["total"]
+                    if message["type"] == "reset":
+                        break  # 内容已变化，之前收到的部分作废，由调用方决定是否从头接收
+                elif message["type"] == "done":
+                    info["done"] = True
+                    break
+                continue
+            if opcode != _OP_BINARY:
+                continue
+            index, total = _FRAME_HEADER.unpack_from(payload)
+            frames[index] = payload[_FRAME_HEADER.size:]
+            info["total"] = total
+            writer.write(encode_ws_frame(_OP_TEXT, json.dumps({"ack": index}).encode("utf-8"), mask=True))
+            await writer.drain()
+            if on_frame is not None:
+                on_frame(index, total, frames[index])
+            if limit is not None and len(frames) >= limit:
+                break  # 模拟中途断线
+        writer.write(encode_ws_frame(_OP_CLOSE, struct.pack(">H", 1000), mask=True))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass  # 连接中断，返回已收到的部分
+    finally:
+        writer.close()
+    return info, frames
+
+
+def pull(host, port, start=0, mode=MODE_RAW, limit=None, on_frame=None):
+    """连接服务并接收（从第start段开始），返回 (信息字典, {序号: 内容})
+
+    信息字典包含 sequence、total、done（是否已收到全部）。limit: 收到这么多段后断开，用于测试续传。
+    on_frame(序号, 总数, 内容): 每收到一段时调用（如立即写入磁盘，断线时不丢失已收到的部分）。
+    连接中断或服务端重新生成了内容（sequence变为新的序列）时返回已收到的部分（done为False）。
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_pull(host, port, start, mode, limit, on_frame))
+    finally:
+        loop.close()
+
+
+# ---- 内置接收页面 ----
+
+CLIENT_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>长文本二维码 - 局域网接收</title>
+<style>
+body { font-family: sans-serif; margin: 16px; color: #2C3E50; }
+h1 { font-size: 20px; color: #2E86AB; }
+#code { max-width: 100%; image-rendering: pixelated; }
+button { font-size: 16px; margin: 4px 8px 4px 0; padding: 6px 14px; }
+progress { width: 100%; height: 18px; }
+#status { margin: 8px 0; }
+</style>
+</head>
+<body>
+<h1>长文本二维码 - 局域网接收</h1>
+<div>
+  <button id="raw">直接接收内容</button>
+  <button id="png">逐个显示二维码</button>
+  <button id="save" disabled>保存</button>
+  <button id="restart">从头开始</button>
+</div>
+<progress id="bar" value="0" max="1"></progress>
+<div id="status">选择接收方式</div>
+<img id="code" alt="">
+<script>
+var ws = null, mode = "raw", parts = {}, total = 0, sequence = null, received = 0;
+function key() { return "text_copier_" + sequence + "_" + mode; }
+function status(text) { document.getElementById("status").textContent = text; }
+function nextIndex() { var i = 0; while (parts[i] !== undefined) i++; return i; }
+function connect(from) {
+  if (ws) { ws.onclose = null; ws.close(); }
+  ws = new WebSocket("ws://" + location.host + "/ws?from=" + from + "&mode=" + mode);
+  ws.binaryType = "arraybuffer";
+  ws.onmessage = function (event) {
+    if (typeof event.data === "string") {
+      var msg = JSON.parse(event.data);
+      if (msg.type === "hello" || msg.type === "reset") {
+        if (msg.type === "reset" || msg.sequence !== sequence) { parts = {}; received = 0; }
+        sequence = msg.sequence; total = msg.total;
+        var saved = parseInt(localStorage.getItem(key()) || "0", 10);
+        if (msg.type === "hello" && mode === "raw" && saved > msg.start && received === 0) {
+          status("上次接收到第 " + saved + " 个，本页面未保存内容，从头接收");
+        }
+      } else if (msg.type === "done") {
+        status("已全部接收（" + total + " 个）");
+        document.getElementById("save").disabled = mode !== "raw";
+      }
+      return;
+    }
+    var view = new DataView(event.data);
+    var index = view.getUint32(0), count = view.getUint32(4);
+    total = count;
+    var body = event.data.slice(8);
+    if (mode === "raw") {
+      if (parts[index] === undefined) received++;
+      parts[index] = new Uint8Array(body);
+    } else {
+      var img = document.getElementById("code");
+      if (img.src) URL.revokeObjectURL(img.src);
+      img.src = URL.createObjectURL(new Blob([body], {type: "image/png"}));
+      received = index + 1;
+    }
+    document.getElementById("bar").max = total;
+    document.getElementById("bar").value = mode === "raw" ? received : index + 1;
+    status("第 " + (index + 1) + " / " + total + " 个");
+    localStorage.setItem(key(), String(index + 1));
+    ws.send(JSON.stringify({ack: index}));
+  };
+  ws.onclose = function () {
+    // 断线后从尚未收到的位置续传
+    status("连接断开，2秒后重连…");
+    setTimeout(function () { connect(mode === "raw" ? nextIndex() : received); }, 2000);
+  };
+}
+function start(newMode) {
+  mode = newMode; parts = {}; received = 0;
+  document.getElementById("save").disabled = true;
+  var from = mode === "png" && sequence !== null ? parseInt(localStorage.getItem(key()) || "0", 10) : 0;
+  connect(from);
+}
+document.getElementById("raw").onclick = function () { start("raw"); };
+document.getElementById("png").onclick = function () { start("png"); };
+document.getElementById("restart").onclick = function () {
+  if (sequence !== null) localStorage.removeItem(key());
+  parts = {}; received = 0;
+  if (ws && ws.readyState === 1) ws.send(JSON.stringify({seek: 0})); else connect(0);
+};
+document.getElementById("save").onclick = function () {
+  // 原始段按序拼接（压缩段和二进制帧需要接收端按格式还原）
+  var list = [];
+  for (var i = 0; i < total; i++) list.push(parts[i]);
+  var a = document.createElement("a");
+  a.href = URL.createObjectURL(new Blob(list));
+  a.download = "received.txt";
+  a.click();
+};
+</script>
+</body>
+</html>
+"""
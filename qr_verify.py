@@ -0,0 +1,617 @@
+# -*- coding: utf-8 -*-
+"""
+本地回环校验：把生成的二维码解码回内容，拼接后与原文逐字节比较
+
+不需要摄像头和网络，在生成的同时用进程池并行解码，及早发现编码错误（例如代理对
+处理不当、分割位置不对），而不是等到手机扫描失败才发现。
+
+解码器独立实现（不复用 qr_mask 的换算），直接从模块矩阵读取：
+
+1. 由边长得到版本，读取两处格式信息（BCH纠错，取最接近的有效值）得到纠错等级和掩码
+2. 检查定位、时序、校正图形和格式/版本信息与标准一致
+3. 按之字形顺序读出数据模块并去掉掩码，按RS分块去交织，重新计算纠错码字并比较
+4. 解析数字、字母数字、字节模式的数据段，得到原始字节（文本为UTF-8）
+
+也可以从绘制出的图像（或保存的PNG）中按模块中心采样后再解码。
+"""
+
+import hashlib
+import io
+import operator
+import os
+import re
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import qrcode
+from PIL import Image, ImageOps
+from qrcode import base, util
+
+import binary_payload
+import compression
+import qr_core
+from bitmatrix import BitMatrix
+
+# 内容类型：决定拼接方式
+KIND_TEXT = "text"  # 各段首尾相接即为原文
+KIND_COMPRESSED = "compressed"  # compression 的压缩段
+KIND_BINARY = "binary"  # binary_payload 的二进制帧
+KINDS = (KIND_TEXT, KIND_COMPRESSED, KIND_BINARY)
+
+# 校验方式
+VERIFY_MATRIX = "matrix"  # 解码模块矩阵
+VERIFY_IMAGE = "image"  # 绘制为图像后再解码（同时检查绘制）
+
+MAX_FORMAT_ERRORS = 3  # 格式信息（15比特）最多可纠正的错误比特数
+MAX_REPORTED_ERRORS = 20  # 报告中最多保留的失败段数
+COMPARE_BLOCK_SIZE = 1 << 20  # 比较二进制文件时每次读取的字节数
+SAVED_NAME = re.compile(r"^二维码_(\d+)_\d+\.png$")  # qr_core.qr_filename 的文件名
+COMPRESSED_HEADER = re.compile(rb"^C[A-Z]\d+/\d+:")  # compression 的压缩段头部
+
+# 段首出现这些类别的字符时，说明分割落在了一个字符（字素）的中间
+_COMBINING_CATEGORIES = ("Mn", "Mc", "Me")
+_JOINERS = ("\u200d",)  # 零宽连接符
+
+
+class DecodeError(ValueError):
+    """二维码无法解码或内容与标准不符"""
+
+
+def _format_table():
+    """15比特格式信息 -> (纠错等级, 掩码)"""
+    table = {}
+    for ecc in (qrcode.constants.ERROR_CORRECT_L, qrcode.constants.ERROR_CORRECT_M,
+                qrcode.constants.ERROR_CORRECT_Q, qrcode.constants.ERROR_CORRECT_H):
+        for mask in range(8):
+            table[util.BCH_type_info((ecc << 3) | mask)] = (ecc, mask)
+    return table
+
+
+_FORMATS = _format_table()
+
+
+def _matrix_int(matrix):
+    return int.from_bytes(matrix.data, "big")
+
+
+def _bit(x, nbits, width, row, col):
+    return (x >> (nbits - 1 - row * width - col)) & 1
+
+
+def _read_format(x, size, width):
+    """读取左上角（纵向）和右上/左下（横向）两份格式信息，位序与 qrcode 写入时相同"""
+    nbits = size * width
+    vertical = horizontal = 0
+    for i in range(15):
+        if i < 6:
+            pos = (i, 8)
+        elif i < 8:
+            pos = (i + 1, 8)
+        else:
+            pos = (size - 15 + i, 8)
+        vertical |= _bit(x, nbits, width, *pos) << i
+
+        if i < 8:
+            pos = (8, size - i - 1)
+        elif i < 9:
+            pos = (8, 15 - i)
+        else:
+            pos = (8, 14 - i)
+        horizontal |= _bit(x, nbits, width, *pos) << i
+    return vertical, horizontal
+
+
+def _decode_format(copies):
+    """在所有有效格式信息中找与读到的值汉明距离最小的一个"""
+    best, best_distance = None, MAX_FORMAT_ERRORS + 1
+    for bits, value in _FORMATS.items():
+        distance = min(bin(bits ^ copy).count("1") for copy in copies)
+        if distance < best_distance:
+            best, best_distance = value, distance
+    if best is None:
+        raise DecodeError("无法读取格式信息")
+    return best
+
+
+class _Template:
+    """某个版本（和纠错等级、掩码）下与数据无关的部分，每个进程只计算一次"""
+
+    def __init__(self, version, error_correction, mask):
+        size = version * 4 + 17
+        width = (size + 7) // 8 * 8
+        qr = qrcode.QRCode(version=version, error_correction=error_correction)
+        qr.data_cache = ()
+        qr.map_data = lambda data, mask_pattern: None
+        qr.makeImpl(False, mask)
+        modules = qr.modules
+
+        # 功能图形区域及其应有的颜色
+        region = dark = 0
+        for row in modules:
+            region_row = dark_row = 0
+            for cell in row:
+                region_row = (region_row << 1) | (cell is not None)
+                dark_row = (dark_row << 1) | bool(cell)
+            region = (region << width) | (region_row << (width - size))
+            dark = (dark << width) | (dark_row << (width - size))
+        self.region = region
+        self.dark = dark
+
+        # 数据模块的读取顺序（与 QRCode.map_data 相同的之字形）以及掩码翻转的模块
+        func = util.mask_func(mask)
+        order = []
+        flip = 0
+        nbits = size * width
+        row, inc = size - 1, -1
+        for col in range(size - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            while True:
+                for c in (col, col - 1):
+                    if modules[row][c] is None:
+                        order.append(row * width + c)
+                        if func(row, c):
+                            flip |= 1 << (nbits - 1 - row * width - c)
+                row += inc
+                if row < 0 or row >= size:
+                    row -= inc
+                    inc = -inc
+                    break
+        self.flip = flip
+        self.nbits = nbits
+        self.blocks = base.rs_blocks(version, error_correction)
+        codewords = sum(block.total_count for block in self.blocks)
+        # 多出的剩余比特不属于任何码字
+        self.pick = operator.itemgetter(*order[:codewords * 8])
+
+
+@lru_cache(maxsize=None)
+def _template(version, error_correction, mask):
+    return _Template(version, error_correction, mask)
+
+
+def _gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return base.gexp(base.glog(a) + base.glog(b))
+
+
+@lru_cache(maxsize=None)
+def _rs_table(ec_count):
+    """RS生成多项式乘以每个可能的首项系数后的结果，打包为整数（按位移一步完成一次除法）"""
+    generator = [1]
+    for i in range(ec_count):
+        # 乘以 (x - α^i)
+        root = base.gexp(i)
+        generator = [a ^ _gf_mul(b, root) for a, b in zip(generator + [0], [0] + generator)]
+    low = generator[1:]  # 首项系数为1
+    return tuple(int.from_bytes(bytes(_gf_mul(f, g) for g in low), "big") for f in range(256))
+
+
+def _rs_remainder(data, ec_count):
+    """数据码字除以生成多项式的余式，即应有的纠错码字"""
+    table = _rs_table(ec_count)
+    shift = 8 * (ec_count - 1)
+    mask = (1 << (8 * ec_count)) - 1
+    rem = 0
+    for byte in data:
+        rem = ((rem << 8) & mask) ^ table[(rem >> shift) ^ byte]
+    return rem.to_bytes(ec_count, "big")
+
+
+def _split_blocks(codewords, blocks):
+    """按RS分块去交织，返回各块的 (数据码字, 纠错码字)"""
+    data = [bytearray() for _ in blocks]
+    ecc = [bytearray() for _ in blocks]
+    pos = 0
+    for part, counts in ((data, [block.data_count for block in blocks]),
+                         (ecc, [block.total_count - block.data_count for block in blocks])):
+        for i in range(max(counts)):
+            for r, count in enumerate(counts):
+                if i < count:
+                    part[r].append(codewords[pos])
+                    pos += 1
+    return data, ecc
+
+
+def _check_ecc(data_blocks, ecc_blocks):
+    """由数据码字重新计算纠错码字，与读到的比较"""
+    for index, (data, ecc) in enumerate(zip(data_blocks, ecc_blocks)):
+        if _rs_remainder(data, len(ecc)) != ecc:
+            raise DecodeError(f"第 {index + 1} 个RS块的纠错码字不一致")
+
+
+def _parse_segments(data, version):
+    """解析数据比特流中的各数据段，返回内容字节串"""
+    bits = int.from_bytes(data, "big")
+    total = len(data) * 8
+    pos = 0
+
+    def read(n):
+        nonlocal pos
+        if pos + n > total:
+            raise DecodeError("数据段超出数据区")
+        pos += n
+        return (bits >> (total - pos)) & ((1 << n) - 1)
+
+    out = bytearray()
+    while total - pos >= 4:
+        mode = read(4)
+        if mode == 0:  # 终止符
+            break
+        if mode not in (util.MODE_NUMBER, util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE):
+            raise DecodeError(f"不支持的数据模式: {mode:04b}")
+        count = read(util.length_in_bits(mode, version))
+        if mode == util.MODE_NUMBER:
+            while count >= 3:
+                value = read(10)
+                if value > 999:
+                    raise DecodeError("无效的数字模式数据")
+                out += b"%03d" % value
+                count -= 3
+            if count:
+                value = read(util.NUMBER_LENGTH[count])
+                if value >= 10 ** count:
+                    raise DecodeError("无效的数字模式数据")
+                out += b"%0*d" % (count, value)
+        elif mode == util.MODE_ALPHA_NUM:
+            while count >= 2:
+                value = read(11)
+                if value >= 45 * 45:
+                    raise DecodeError("无效的字母数字模式数据")
+                out.append(util.ALPHA_NUM[value // 45])
+                out.append(util.ALPHA_NUM[value % 45])
+                count -= 2
+            if count:
+                value = read(6)
+                if value >= 45:
+                    raise DecodeError("无效的字母数字模式数据")
+                out.append(util.ALPHA_NUM[value])
+        else:
+            for _ in range(count):
+                out.append(read(8))
+    return bytes(out)
+
+
+def decode_matrix(matrix):
+    """解码模块矩阵（BitMatrix），返回内容字节串；无法解码或与标准不符时抛出DecodeError"""
+    size = matrix.size
+    version, remainder = divmod(size - 17, 4)
+    if remainder or not 1 <= version <= 40:
+        raise DecodeError(f"无效的二维码边长: {size}")
+    width = matrix.row_bytes * 8
+    x = _matrix_int(matrix)
+
+    error_correction, mask = _decode_format(_read_format(x, size, width))
+    template = _template(version, error_correction, mask)
+    if x & template.region != template.dark:
+        raise DecodeError("功能图形与标准不一致")
+
+    bits = format(x ^ template.flip, f"0{template.nbits}b")
+    stream = "".join(template.pick(bits))
+    codewords = int(stream, 2).to_bytes(len(stream) // 8, "big")
+    data_blocks, ecc_blocks = _split_blocks(codewords, template.blocks)
+    _check_ecc(data_blocks, ecc_blocks)
+    return _parse_segments(b"".join(bytes(block) for block in data_blocks), version)
+
+
+def sample_image(img):
+    """从二维码图像中按模块中心采样得到模块矩阵（适用于本程序绘制的、未经缩放变形的图像）"""
+    gray = img.convert("L")
+    bbox = ImageOps.invert(gray).point(lambda v: 255 if v > 127 else 0).getbbox()
+    if bbox is None:
+        raise DecodeError("图像中没有二维码")
+    left, top, right, bottom = bbox
+    # 左上角定位图形的第一行为连续7个深色模块
+    row = gray.crop((left, top, right, top + 1)).tobytes()
+    run = next((i for i, v in enumerate(row) if v > 127), len(row))
+    box = run / 7
+    size = round((right - left) / box) if box else 0
+    if size < 21 or (size - 17) % 4 or abs((bottom - top) - (right - left)) > box:
+        raise DecodeError("无法识别二维码的位置和模块大小")
+    modules = gray.crop(bbox).resize((size, size), Image.NEAREST).point(lambda v: 255 if v > 127 else 0)
+    # "1;I" 反相：深色模块为1，与 BitMatrix 的打包格式相同
+    return BitMatrix(size, modules.convert("1").tobytes("raw", "1;I"))
+
+
+def decode_image(img):
+    """解码二维码图像（PIL.Image），返回内容字节串"""
+    return decode_matrix(sample_image(img))
+
+
+def segment_bytes(segment):
+    """文本段（或二进制帧）编码进二维码的原始字节"""
+    if isinstance(segment, bytes):
+        return segment
+    return segment.encode("utf-8")
+
+
+def check_segment(segment, matrix, box_size=None):
+    """解码一个二维码并与原段比较，返回 (解码得到的字节串或None, 错误信息或None)
+
+    box_size: 指定时先按该尺寸绘制图像，从图像解码（同时检查绘制）
+    适合交给进程池执行。
+    """
+    try:
+        if box_size:
+            decoded = decode_image(qr_core.matrix_to_image(matrix, box_size))
+        else:
+            decoded = decode_matrix(matrix)
+    except DecodeError as e:
+        return None, str(e)
+    try:
+        expected = segment_bytes(segment)
+    except UnicodeEncodeError as e:
+        return decoded, f"原段无法按UTF-8编码: {e.reason}"
+    if decoded != expected:
+        offset = next((i for i, (a, b) in enumerate(zip(decoded, expected)) if a != b),
+                      min(len(decoded), len(expected)))
+        return decoded, f"内容不一致（第 {offset} 字节起，解码 {len(decoded)} 字节，原段 {len(expected)} 字节）"
+    return decoded, None
+
+
+def split_warning(segment):
+    """文本段开头落在字符中间（组合字符、连接符）时返回提示，否则返回None"""
+    if isinstance(segment, bytes) or not segment:
+        return None
+    first = segment[0]
+    if unicodedata.category(first) in _COMBINING_CATEGORIES or first in _JOINERS:
+        return f"段首为组合字符 U+{ord(first):04X}，分割落在字符中间"
+    if "\udc00" <= first <= "\udfff":
+        return "段首为孤立的代理项，分割落在代理对中间"
+    return None
+
+
+def detect_kind(payload):
+    """由第一个二维码的内容判断内容类型（校验已保存的图片、不知道生成方式时使用）"""
+    try:
+        binary_payload.parse_frame(payload)
+        return KIND_BINARY
+    except ValueError:
+        pass
+    if re.match(COMPRESSED_HEADER, payload):
+        return KIND_COMPRESSED
+    return KIND_TEXT
+
+
+def reassemble(payloads, kind):
+    """把按顺序解码得到的各段内容拼接还原为原文字节串（文本为UTF-8）"""
+    if kind == KIND_BINARY:
+        assembler = binary_payload.FrameAssembler()
+        for payload in payloads:
+            assembler.add_frame(payload)
+        data = assembler.result()
+        if data is None:
+            raise ValueError(f"二进制帧不完整，缺少 {len(assembler.missing())} 帧")
+        return data
+    if kind == KIND_COMPRESSED:
+        return compression.decode_segments([p.decode("ascii") for p in payloads]).encode("utf-8")
+    return b"".join(payloads)
+
+
+def compare(data, expected_chunks):
+    """逐字节比较data与按顺序产出的原文块（str按UTF-8编码），一致时返回None，否则返回第一个不同的字节位置"""
+    pos = 0
+    for chunk in expected_chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        part = data[pos:pos + len(chunk)]
+        if part != chunk:
+            return pos + next((i for i, (a, b) in enumerate(zip(part, chunk)) if a != b), len(part))
+        pos += len(chunk)
+    return None if pos == len(data) else pos
+
+
+def iter_file_bytes(path, block_size=COMPARE_BLOCK_SIZE):
+    """按块读取文件的原始字节"""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def check_png(source):
+    """解码一张保存的二维码PNG（路径或文件内容），返回 (字节串或None, 错误信息或None)"""
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            return decode_image(img), None
+    except (OSError, DecodeError) as e:
+        return None, str(e)
+
+
+def list_saved_codes(path):
+    """列出导出的二维码PNG（目录或ZIP），按序号排序，返回 [(文件名, 路径或文件内容)]"""
+    items = []
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                match = SAVED_NAME.match(os.path.basename(name))
+                if match:
+                    items.append((int(match.group(1)), name, zf.read(name)))
+    else:
+        for name in os.listdir(path):
+            match = SAVED_NAME.match(name)
+            if match:
+                items.append((int(match.group(1)), name, os.path.join(path, name)))
+    items.sort()
+    return [(name, source) for _, name, source in items]
+
+
+class LoopbackVerifier:
+    """边生成边校验：每得到一个矩阵就交给进程池解码，最后拼接并与原文比较
+
+    用法::
+
+        verifier = LoopbackVerifier(kind)
+        for matrix in verifier.wrap(segments, matrices):
+            ...  # 照常保存
+        report = verifier.finish(原文块)
+
+    kind: 内容类型，None表示按第一个二维码的内容判断
+    executor: 可传入已有的进程池（如图形界面的编码进程池），此时不再另建，也不负责关闭
+    """
+
+    def __init__(self, kind=KIND_TEXT, workers=None, box_size=None, executor=None):
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"无效的内容类型: {kind}")
+        self.kind = kind
+        self.box_size = box_size
+        self.executor = executor
+        self.own_executor = False
+        if executor is None:
+            if workers is None:
+                workers = os.cpu_count() or 1
+            if workers > 1:
+                self.executor = ProcessPoolExecutor(max_workers=workers)
+                self.own_executor = True
+        self.pending = {}  # 序号 -> future 或 (解码结果, 错误)
+        self.warnings = []
+        self.start = time.perf_counter()
+
+    def _submit(self, index, func, *args):
+        if self.executor is None:
+            self.pending[index] = func(*args)
+        else:
+            self.pending[index] = self.executor.submit(func, *args)
+
+    def submit(self, index, segment, matrix):
+        """提交第index个二维码的校验"""
+        warning = split_warning(segment)
+        if warning:
+            self.warnings.append((index, warning))
+        self._submit(index, check_segment, segment, matrix, self.box_size)
+
+    def submit_png(self, index, source):
+        """提交第index张保存的PNG（路径或文件内容）的校验"""
+        self._submit(index, check_png, source)
+
+    def wrap(self, segments, matrices):
+        """原样产出matrices中的每个矩阵，同时提交校验"""
+        for index, (segment, matrix) in enumerate(zip(segments, matrices)):
+            self.submit(index, segment, matrix)
+            yield matrix
+
+    def close(self):
+        """停止校验，尚未开始的任务不再执行"""
+        for result in self.pending.values():
+            if not isinstance(result, tuple):
+                result.cancel()
+        if self.own_executor:
+            self.executor.shutdown(wait=False)
+        self.executor = None
+
+    def finish(self, expected_chunks=None):
+        """等待全部校验完成，拼接解码内容并与原文块比较，返回报告字典（可在后台线程中调用）
+
+        expected_chunks: 按顺序产出原文（str或bytes）的可迭代对象，None时只校验各段；
+            也可以是以内容类型为参数、返回这样的可迭代对象的函数（内容类型由解码结果判断时使用）
+        """
+        payloads = []
+        failed = []
+        decoded_bytes = 0
+        try:
+            for index in sorted(self.pending):
+                result = self.pending[index]
+                if not isinstance(result, tuple):
+                    result = result.result()
+                decoded, error = result
+                if error:
+                    failed.append((index, error))
+                if decoded is not None:
+                    decoded_bytes += len(decoded)
+                payloads.append(decoded)
+        finally:
+            self.close()
+        elapsed = time.perf_counter() - self.start
+
+        report = {
+            "kind": self.kind,
+            "codes": len(payloads),
+            "failed": failed[:MAX_REPORTED_ERRORS],
+            "failed_count": len(failed),
+            "warnings": self.warnings[:MAX_REPORTED_ERRORS],
+            "decoded_bytes": decoded_bytes,
+            "elapsed": elapsed,
+            "codes_per_s": len(payloads) / elapsed if elapsed else 0.0,
+            "match": None,
+            "mismatch_offset": None,
+            "bytes": None,
+            "sha256": None,
+            "error": None,
+        }
+        if not payloads:
+            report["error"] = "没有二维码"
+        elif any(p is None for p in payloads):
+            report["error"] = "部分二维码无法解码，无法拼接"
+        if report["error"]:
+            report["match"] = False
+            return report
+
+        if report["kind"] is None:
+            report["kind"] = detect_kind(payloads[0])
+        try:
+            data = reassemble(payloads, report["kind"])
+        except (ValueError, UnicodeDecodeError) as e:
+            report["error"] = f"拼接失败: {e}"
+            report["match"] = False
+            return report
+        report["bytes"] = len(data)
+        report["sha256"] = hashlib.sha256(data).hexdigest()
+        if expected_chunks is not None:
+            if callable(expected_chunks):
+                expected_chunks = expected_chunks(report["kind"])
+            offset = compare(data, expected_chunks)
+            report["match"] = offset is None
+            report["mismatch_offset"] = offset
+        return report
+
+
+def verify_segments(segments, matrices, kind=KIND_TEXT, expected_chunks=None, workers=None, box_size=None):
+    """校验已生成的全部矩阵，返回报告字典"""
+    verifier = LoopbackVerifier(kind, workers, box_size)
+    try:
+        for index, (segment, matrix) in enumerate(zip(segments, matrices)):
+            verifier.submit(index, segment, matrix)
+    except BaseException:
+        verifier.close()
+        raise
+    return verifier.finish(expected_chunks)
+
+
+def verify_saved(path, expected_chunks=None, workers=None, kind=None):
+    """校验导出的二维码PNG（目录或ZIP）：逐张解码、拼接并与原文比较，返回报告字典"""
+    verifier = LoopbackVerifier(kind, workers)
+    try:
+        for index, (name, source) in enumerate(list_saved_codes(path)):
+            verifier.submit_png(index, source)
+    except BaseException:
+        verifier.close()
+        raise
+    return verifier.finish(expected_chunks)
+
+
+def format_report(report):
+    """生成校验结果的简要说明"""
+    text = (f"校验 {report['codes']} 个二维码，用时 {report['elapsed']:.2f}s"
+            f"（{report['codes_per_s']:.1f} 个/秒）")
+    if report["failed_count"]:
+        text += f"，{report['failed_count']} 个失败"
+    if report["error"]:
+        return f"{text}：{report['error']}"
+    if report["match"] is None:
+        return f"{text}：全部解码成功，拼接后共 {report['bytes']} 字节"
+    if report["match"]:
+        return f"{text}：拼接后与原文逐字节一致（{report['bytes']} 字节）"
+    return f"{text}：拼接后与原文不一致，第 {report['mismatch_offset']} 字节起不同"
+
+
+def format_failures(report):
+    """失败的二维码和分割提示，每行一条（序号从1开始）"""
+    lines = [f"第 {index + 1} 个: {error}" for index, error in report["failed"]]
+    lines += [f"第 {index + 1} 个: {warning}" for index, warning in report["warnings"]]
+    return lines
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+文本分割
+
+- 按字符数分割：线性时间的生成器，可处理内存映射的大文件
+- 按二维码容量分割：中文（UTF-8每字3字节）和英文按字符数分割时生成的二维码版本
+  相差很大，这里按目标版本和纠错级别的实际比特容量来切分，使每个二维码尽量装满，
+  从而减少二维码总数
+- 稳定分段（内容定义分割）：断点由附近文本的滚动哈希决定，而不是距开头的距离，
+  修改一处文字只影响附近的一两段，其余段（和已生成的二维码）保持不变
+"""
+
+import codecs
+import mmap
+from collections import deque
+
+from qrcode import constants, util
+
+# 二维码编码模式
+MODE_NUMBER = util.MODE_NUMBER
+MODE_ALPHA_NUM = util.MODE_ALPHA_NUM
+MODE_8BIT_BYTE = util.MODE_8BIT_BYTE
+MODE_KANJI = util.MODE_KANJI
+
+DEFAULT_VERSION = 20  # 默认目标版本（97x97模块，手机较易识别）
+
+# qrcode库对长度不少于该值的数字/字母数字串使用更紧凑的模式（QRCode.add_data默认值）
+OPTIMIZE_MINIMUM = 20
+
+# 断句时优先选择的空白字符
+BREAK_CHARS = (" ", "\n", "\t", "\r", "\u3000")
+
+FILE_CHUNK_SIZE = 1 << 20  # 读取文件时每次解码的字节数
+
+# 每个模式指示符占4比特
+MODE_INDICATOR_BITS = 4
+
+# 稳定分段参数
+CDC_MIN_FRACTION = 0.75  # 段内断点在最大长度的3/4到1之间选取
+CDC_ANCHOR_GAP = 4  # 锚点平均间隔（以最大段长计），编辑的影响不会越过下一个锚点
+CDC_WINDOW = 64  # Gear哈希每步左移一位，64位哈希只受最近64个字符影响
+_MASK64 = (1 << 64) - 1
+
+
+def _gear_table():
+    """Gear哈希的字符映射表（固定种子的splitmix64，保证不同运行间断点一致）"""
+    table = []
+    x = 0
+    for _ in range(256):
+        x = (x + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        table.append(z ^ (z >> 31))
+    return tuple(table)
+
+
+_GEAR = _gear_table()
+
+
+def _break_point(buf, start, end):
+    """在buf[start:end]中寻找最后一个空白字符之后的位置，没有则返回end"""
+    best = max(buf.rfind(ch, start, end) for ch in BREAK_CHARS)
+    if best <= start:
+        return end
+    return best + 1
+
+
+def iter_split_chunks(chunks, max_chars):
+    """按字符数分割依次到来的文本块，逐段产出
+
+    尽量在空白字符之后断开，不在单词中间分割；单词超过max_chars时强制断开。
+    空白保留在上一段末尾，所有段首尾相接即为原文。
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars 必须大于0")
+
+    buf = ""
+    pos = 0
+    for chunk in chunks:
+        if pos:
+            buf = buf[pos:]
+            pos = 0
+        buf += chunk
+
+        # 需要看到段尾之后的一个字符才能判断是否正好断在单词边界
+        while len(buf) - pos > max_chars:
+            end = pos + max_chars
+            if not buf[end].isspace():
+                end = _break_point(buf, pos, end)
+            yield buf[pos:end]
+            pos = end
+
+    if pos < len(buf):
+        yield buf[pos:]
+
+
+def iter_split_text(text, max_chars):
+    """按字符数分割文本，逐段产出"""
+    return iter_split_chunks((text,), max_chars)
+
+
+def iter_file_chunks(path, encoding="utf-8", chunk_size=FILE_CHUNK_SIZE):
+    """以内存映射方式读取文件，按块解码产出文本，不一次性载入整个文件"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            return
+        with data:
+            for offset in range(0, len(data), chunk_size):
+                text = decoder.decode(data[offset:offset + chunk_size])
+                if text:
+                    yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def bit_limit(version, error_correction):
+    """指定版本和纠错级别下可用的数据比特数"""
+    util.check_version(version)
+    return util.BIT_LIMIT_TABLE[error_correction][version]
+
+
+def data_bits(mode, length):
+    """length个字符（字节模式为字节数）在指定模式下的数据比特数"""
+    if mode == MODE_NUMBER:
+        return 10 * (length // 3) + util.NUMBER_LENGTH.get(length % 3, 0)
+    if mode == MODE_ALPHA_NUM:
+        return 11 * (length // 2) + 6 * (length % 2)
+    if mode == MODE_KANJI:
+        return 13 * length
+    return 8 * length
+
+
+def capacity(version, error_correction, mode=MODE_8BIT_BYTE):
+    """单一模式下一个二维码最多能容纳的字符数（字节模式为字节数）"""
+    available = bit_limit(version, error_correction) - MODE_INDICATOR_BITS \
+        - util.length_in_bits(mode, version)
+    # 数据比特数随长度单调递增，二分查找最大长度
+    lo, hi = 0, available
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if data_bits(mode, mid) <= available:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def segment_bits(segment, version):
+    """文本段交给qrcode编码时所需的比特数（与QRCode.add_data的分块方式一致）"""
+    mode_sizes = util.mode_sizes_for_version(version)
+    bits = 0
+    for chunk in util.optimal_data_chunks(segment, minimum=OPTIMIZE_MINIMUM):
+        bits += MODE_INDICATOR_BITS + mode_sizes[chunk.mode] + data_bits(chunk.mode, len(chunk))
+    return bits
+
+
+def _capacity_end(text, start, length, limit, version, max_span):
+    """二分查找从start开始能放进目标版本的最长前缀的结束位置"""
+    lo, hi = start + 1, min(length, start + max_span)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if segment_bits(text[start:mid], version) <= limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _fits(text, start, end, limit, version):
+    """text[start:end]能否放进目标版本
+
+    比特数不随长度单调变化：截短后段尾的数字/字母数字串不足 OPTIMIZE_MINIMUM 个字符时
+    改用字节模式编码，较短的段反而可能放不下，因此在较早的位置断开前都要重新检查。
+    """
+    return segment_bits(text[start:end], version) <= limit
+
+
+def _capacity_cut(text, start, length, limit, version, max_span):
+    """返回从start开始、能放进目标版本的一段的结束位置"""
+    end = _capacity_end(text, start, length, limit, version, max_span)
+
+    if end < length:
+        # 在段尾10%范围内寻找空白字符作为断点（从后往前取第一个放得下的）
+        window_start = end - max(1, (end - start) // 10)
+        for i in range(end - 1, max(window_start, start) - 1, -1):
+            if text[i].isspace() and _fits(text, start, i + 1, limit, version):
+                return i + 1
+    return end
+
+
+def iter_capacity_chunks(chunks, version, error_correction):
+    """按目标版本容量分割依次到来的文本块，逐段产出，所有段首尾相接即为原文
+
+    在段尾附近有空白字符时在空白后断开，尽量不在单词中间分割。
+    """
+    limit = bit_limit(version, error_correction)
+    # 数字模式每字符约3.33比特，任何一段都不可能超过这个字符数
+    max_span = limit * 3 // 10 + 1
+
+    buf = ""
+    pos = 0
+    for chunk in chunks:
+        if pos:
+            buf = buf[pos:]
+            pos = 0
+        buf += chunk
+
+        # 剩余文本超过一段的最大长度时，段尾位置不会再受后续文本影响
+        while len(buf) - pos > max_span:
+            end = _capacity_cut(buf, pos, len(buf), limit, version, max_span)
+            yield buf[pos:end]
+            pos = end
+
+    while pos < len(buf):
+        end = _capacity_cut(buf, pos, len(buf), limit, version, max_span)
+        yield buf[pos:end]
+        pos = end
+
+
+def _gear_hash(h, ch):
+    o = ord(ch)
+    return ((h << 1) + _GEAR[(o ^ (o >> 8)) & 0xFF]) & _MASK64
+
+
+def _cdc_cut(buf, start, end):
+    """在段的后1/4范围内选取滚动哈希最小的位置作为断点
+
+    每个位置的Gear哈希只取决于它之前的CDC_WINDOW个字符。插入或删除文字后，
+    只要新旧两段的选取范围有重叠，取到的往往是同一个位置，之后的断点就与原来一致。
+    """
+    min_end = start + max(1, int((end - start) * CDC_MIN_FRACTION))
+    if min_end >= end:
+        return end
+    h = 0
+    best, best_hash = end, None
+    for i in range(max(start, min_end - CDC_WINDOW), end):
+        h = _gear_hash(h, buf[i])
+        if i >= min_end and (best_hash is None or h < best_hash):
+            best, best_hash = i, h
+    return best
+
+
+def iter_stable_chunks(chunks, max_chars=None, version=None, error_correction=None):
+    """稳定分段：按内容定义的断点分割依次到来的文本块，所有段首尾相接即为原文
+
+    指定version时每段不超过该版本的容量，否则每段不超过max_chars个字符。
+
+    - 锚点：滚动哈希低于阈值的位置（平均每 CDC_ANCHOR_GAP 段一个），只由附近的
+      文本决定，段总是在锚点处断开，因此一处修改最多影响到下一个锚点为止
+    - 锚点之间按 _cdc_cut 选取断点，通常修改后一两段内就与原来的断点重合
+
+    代价是每段平均没有装满，比普通分割多约两成的段。指定version时，锚点或选取的断点
+    处的段放不下（见 _fits）则改在能放下的最长位置断开。
+    """
+    if version:
+        limit = bit_limit(version, error_correction)
+        max_span = limit * 3 // 10 + 1
+        nominal = capacity(version, error_correction)
+    elif not max_chars or max_chars < 1:
+        raise ValueError("max_chars 必须大于0")
+    else:
+        max_span = nominal = max_chars
+    threshold = (1 << 64) // (nominal * CDC_ANCHOR_GAP)
+    min_gap = max(1, nominal // 4)  # 锚点最小间隔，避免重复内容处锚点过密
+
+    def cut(buf, pos):
+        if version:
+            end = _capacity_end(buf, pos, len(buf), limit, version, max_span)
+        else:
+            end = min(len(buf), pos + max_chars)
+        while anchors and anchors[0] <= pos:
+            anchors.popleft()
+        if anchors and anchors[0] <= end:
+            candidate = anchors[0]
+        elif end >= len(buf):
+            return end
+        else:
+            candidate = _cdc_cut(buf, pos, end)
+        if version and candidate < end and not _fits(buf, pos, candidate, limit, version):
+            return end
+        return candidate
+
+    buf = ""
+    pos = 0
+    h = 0
+    anchors = deque()
+    last_anchor = -min_gap
+    for chunk in chunks:
+        if pos:
+            buf = buf[pos:]
+            anchors = deque(a - pos for a in anchors)
+            last_anchor -= pos
+            pos = 0
+        scanned = len(buf)
+        buf += chunk
+
+        # 热点循环：内联哈希计算
+        gear, mask = _GEAR, _MASK64
+        for i, o in enumerate(map(ord, buf[scanned:]), scanned):
+            h = ((h << 1) + gear[(o ^ (o >> 8)) & 0xFF]) & mask
+            if h < threshold and i - last_anchor >= min_gap:
+                anchors.append(i)
+                last_anchor = i
+
+        # 剩余文本超过一段的最大长度时，断点位置不会再受后续文本影响
+        while len(buf) - pos > max_span:
+            end = cut(buf, pos)
+            yield buf[pos:end]
+            pos = end
+
+    while pos < len(buf):
+        end = cut(buf, pos)
+        yield buf[pos:end]
+        pos = end
+
+
+def iter_capacity_segments(text, version, error_correction):
+    """按目标版本容量依次产出文本段"""
+    return iter_capacity_chunks((text,), version, error_correction)
+
+
+def min_version_for_bytes(nbytes, error_correction):
+    """字节模式下能容纳nbytes字节的最小版本，超出版本40容量时返回None"""
+    for version in range(1, 41):
+        if capacity(version, error_correction) >= nbytes:
+            return version
+    return None
+
+
+def estimate_codes(chars, nbytes, max_chars, version, error_correction):
+    """只根据字符数和UTF-8字节数粗略估算二维码数量和版本，返回 (数量, 版本)
+
+    不需要读取文本内容，适合输入时实时显示。按字节模式估算，
+    数字/字母较多的文本实际数量会更少。版本为None表示单个二维码放不下。
+    """
+    if chars <= 0:
+        return 0, None
+    if version:
+        per_code = max(1, capacity(version, error_correction))
+        return -(-nbytes // per_code), version
+
+    count = -(-chars // max_chars)
+    segment_bytes = nbytes if count == 1 else -(-nbytes * max_chars // chars)
+    return count, min_version_for_bytes(segment_bytes, error_correction)
+
+
+def split_by_capacity(text, version=DEFAULT_VERSION, error_correction=constants.ERROR_CORRECT_M):
+    """将文本按二维码容量分割为段落列表"""
+    return list(iter_capacity_segments(text, version, error_correction))
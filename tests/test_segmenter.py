@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+分割的回归测试：按容量分割和稳定分段产出的每一段都必须放得进目标版本
+
+    python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qrcode import constants  # noqa: E402
+
+import segmenter  # noqa: E402
+
+VERSIONS = (2, 5, 10, 15, 20)
+ECC_LEVELS = (constants.ERROR_CORRECT_L, constants.ERROR_CORRECT_M,
+              constants.ERROR_CORRECT_Q, constants.ERROR_CORRECT_H)
+# 数字、字母、空白和中文混排；长短不一的数字/字母数字串在段尾被截短时会改用字节模式
+_WORDS = ["12345", "678", "9" * 15, "2024-01-01", "ABC", "DEF123", "A1B2" * 4, "hello", "world",
+          "二维码", "长文本", " ", "\n", "\t"]
+
+
+def mixed_text(words=5000, seed=1):
+    rnd = random.Random(seed)
+    return "".join(rnd.choice(_WORDS) for _ in range(words))
+
+
+class CapacityFitTest(unittest.TestCase):
+    """每一段的比特数不超过目标版本和纠错等级的容量，拼接后与原文一致"""
+
+    text = mixed_text()
+
+    def check_segments(self, split):
+        for version in VERSIONS:
+            for ecc in ECC_LEVELS:
+                limit = segmenter.bit_limit(version, ecc)
+                segments = split(self.text, version, ecc)
+                self.assertEqual("".join(segments), self.text)
+                for i, segment in enumerate(segments):
+                    bits = segmenter.segment_bits(segment, version)
+                    self.assertLessEqual(bits, limit, f"版本{version} 纠错{ecc} 第{i}段: {segment[-30:]!r}")
+
+    def test_split_by_capacity(self):
+        self.check_segments(segmenter.split_by_capacity)
+
+    def test_stable_chunks(self):
+        self.check_segments(lambda text, version, ecc: list(
+            segmenter.iter_stable_chunks((text,), version=version, error_correction=ecc)))
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+大文本虚拟化查看器
+
+文本框中只放当前可见的几十行，滚动时按行号从原文（内存中的字符串或内存映射的
+文件）取出对应的行重新填充，打开速度和内存占用与文本大小无关。
+
+行号通过稀疏索引定位：原文按固定大小分块，只记录每块之前的换行数，
+定位某一行时先二分找到所在块，再在块内查找换行符。
+"""
+
+import bisect
+import codecs
+import mmap
+import sys
+import tkinter as tk
+import tkinter.font as tkfont
+
+BLOCK_SIZE = 32 * 1024  # 索引分块大小（字符数或字节数）
+MAX_LINE_CHARS = 4000  # 单行最多显示的字符数，超出部分截断
+TRUNCATE_MARK = " …"  # 截断标记
+WHEEL_LINES = 3  # 鼠标滚轮每格滚动的行数
+
+
+class TextBuffer:
+    """内存中的文本，偏移量以字符计"""
+
+    def __init__(self, text):
+        self.text = text
+        self.start = 0
+        self.length = len(text)
+        self.unit = 1  # 换行符长度
+        self.chars = len(text)
+
+    def count_newlines(self, start, end):
+        return self.text.count("\n", start, end)
+
+    def find_newline(self, start, end=None):
+        return self.text.find("\n", start, self.length if end is None else end)
+
+    def find(self, query, start):
+        """查找文本，返回 (偏移量, 长度)，找不到时偏移量为-1"""
+        return self.text.find(query, start), len(query)
+
+    def decode(self, start, end):
+        return self.text[start:end]
+
+    def read_text(self):
+        return self.text
+
+    def close(self):
+        pass
+
+
+def _byte_layout(encoding, head):
+    """文件编码 -> (不含BOM的编解码器, 正文起始字节数)"""
+    name = codecs.lookup(encoding).name
+    if name == "utf-8-sig":
+        return "utf-8", 3 if head.startswith(codecs.BOM_UTF8) else 0
+    if name in ("utf-16", "utf-32"):
+        if name == "utf-16":
+            boms = ((codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+        else:
+            boms = ((codecs.BOM_UTF32_LE, "utf-32-le"), (codecs.BOM_UTF32_BE, "utf-32-be"))
+        for bom, codec in boms:
+            if head.startswith(bom):
+                return codec, len(bom)
+        # 没有BOM时按本机字节序解码（与Python的行为一致）
+        return f"{name}-{'le' if sys.byteorder == 'little' else 'be'}", 0
+    return name, 0
+
+
+class FileBuffer:
+    """内存映射的文本文件（FileSource），偏移量以字节计"""
+
+    def __init__(self, source):
+        self.chars = source.chars
+        self._file = open(source.path, "rb")
+        if source.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""  # 空文件无法映射
+        self.codec, self.start = _byte_layout(source.encoding, self.data[:4])
+        self.newline = "\n".encode(self.codec)
+        self.unit = len(self.newline)
+        self.length = len(self.data)
+        self._source = source
+
+    def _aligned(self, pos):
+        return (pos - self.start) % self.unit == 0
+
+    def count_newlines(self, start, end):
+        block = self.data[start:end]
+        if self.unit == 1:
+            return block.count(self.newline)
+        # 多字节编码（UTF-16/32）按字符计数，避免把跨字符的字节误认为换行
+        return block.decode(self.codec, "surrogatepass").count("\n")
+
+    def _find_bytes(self, needle, start, end):
+        pos = self.data.find(needle, start, end)
+        while pos != -1 and not self._aligned(pos):
+            pos = self.data.find(needle, pos + 1, end)
+        return pos
+
+    def find_newline(self, start, end=None):
+        return self._find_bytes(self.newline, start, self.length if end is None else end)
+
+    def find(self, query, start):
+        """查找文本，返回 (偏移量, 字节长度)，找不到时偏移量为-1"""
+        needle = query.encode(self.codec)
+        return self._find_bytes(needle, start, self.length), len(needle)
+
+    def decode(self, start, end):
+        return self.data[start:end].decode(self.codec, "replace")
+
+    def read_text(self):
+        return self._source.read_text()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+class LineIndex:
+    """按行号随机读取原文的稀疏索引"""
+
+    def __init__(self, buffer, block_size=BLOCK_SIZE):
+        self.buffer = buffer
+        # 块大小取4的倍数，保证多字节编码时块边界落在字符边界上
+        block_size -= block_size % 4
+        self.block_starts = list(range(buffer.start, buffer.length, block_size)) or [buffer.start]
+        self.newlines_before = []  # 每块之前的换行数
+        count = 0
+        for start in self.block_starts:
+            self.newlines_before.append(count)
+            count += buffer.count_newlines(start, min(start + block_size, buffer.length))
+        self.line_count = count + 1
+
+    def line_offset(self, line):
+        """第line行（从0开始）的起始偏移量"""
+        if line <= 0:
+            return self.buffer.start
+        # 第line行从第line个换行符之后开始
+        target = line - 1
+        i = bisect.bisect_right(self.newlines_before, target) - 1
+        pos = self.block_starts[i]
+        for _ in range(target - self.newlines_before[i] + 1):
+            newline = self.buffer.find_newline(pos)
+            if newline == -1:
+                return self.buffer.length
+            pos = newline + self.buffer.unit
+        return pos
+
+    def locate(self, offset):
+        """偏移量 -> (行号, 列号)，列号以字符计"""
+        i = bisect.bisect_right(self.block_starts, offset) - 1
+        line = self.newlines_before[i] + self.buffer.count_newlines(self.block_starts[i], offset)
+        start = self.line_offset(line)
+        return line, len(self.buffer.decode(start, offset))
+
+    def get_lines(self, first, count, max_chars=MAX_LINE_CHARS):
+        """从第first行起最多count行的文本，过长的行截断"""
+        buffer = self.buffer
+        pos = self.line_offset(first)
+        lines = []
+        while len(lines) < count and pos <= buffer.length:
+            end = buffer.find_newline(pos)
+            if end == -1:
+                end = buffer.length
+            # 多字节编码时一个字符最多4字节，先按字节截取再按字符截断
+            limit = max_chars * (1 if isinstance(buffer, TextBuffer) else 4)
+            text = buffer.decode(pos, min(end, pos + limit))
+            if text.endswith("\r"):
+                text = text[:-1]  # Windows换行
+            if end - pos > limit or len(text) > max_chars:
+                text = text[:max_chars] + TRUNCATE_MARK
+            lines.append(text)
+            if end >= buffer.length:
+                break
+            pos = end + buffer.unit
+        return lines
+
+    def find(self, query, offset):
+        """从offset开始查找，找不到时从头查找，返回 (偏移量, 长度)，仍找不到时偏移量为-1"""
+        pos, length = self.buffer.find(query, offset)
+        if pos == -1 and offset > self.buffer.start:
+            pos, length = self.buffer.find(query, self.buffer.start)
+        return pos, length
+
+
+def segment_positions(segments):
+    """各段在原文中的起始位置 [(行号, 列号), ...]，最后一项为原文结尾
+
+    要求各段按顺序拼接后就是原文（不压缩时的分割结果）。
+    """
+    line = col = 0
+    positions = [(0, 0)]
+    for segment in segments:
+        newlines = segment.count("\n")
+        if newlines:
+            line += newlines
+            col = len(segment) - segment.rfind("\n") - 1
+        else:
+            col += len(segment)
+        positions.append((line, col))
+    return positions
+
+
+class VirtualTextView(tk.Frame):
+    """只渲染可见行的只读文本框，带垂直/水平滚动条"""
+
+    def __init__(self, master, index, font, fg, bg="white", highlight="#FFF3CD", match="#F18F01"):
+        super().__init__(master, bg=bg)
+        self.index = index
+        self.top = 0  # 首个可见行的行号
+        self.rows = 1  # 可见行数
+        self.highlights = {}  # 标签 -> ((起始行, 列), (结束行, 列))
+        self.linespace = tkfont.Font(font=font).metrics("linespace")
+
+        self.text = tk.Text(self,
+                            wrap=tk.NONE,
+                            font=font,
+                            relief="flat",
+                            padx=15,
+                            pady=15,
+                            bg=bg,
+                            fg=fg,
+                            height=1,
+                            state=tk.DISABLED)
+        self.text.tag_configure("segment", background=highlight)
+        self.text.tag_configure("match", background=match, foreground="white")
+        self.text.tag_raise("match")
+
+        v_scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.v_scrollbar = v_scrollbar
+        h_scrollbar = tk.Scrollbar(self, orient="horizontal", command=self.text.xview)
+        self.text.config(xscrollcommand=h_scrollbar.set)
+
+        self.text.grid(row=0, column=0, sticky="nsew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # 窗口大小变化时重新计算可见行数
+        self.text.bind("<Configure>", self.on_resize)
+
+        # 鼠标滚轮和键盘滚动
+        self.text.bind("<MouseWheel>", lambda e: self.scroll(-WHEEL_LINES * (e.delta // 120)))
+        self.text.bind("<Button-4>", lambda e: self.scroll(-WHEEL_LINES))
+        self.text.bind("<Button-5>", lambda e: self.scroll(WHEEL_LINES))
+        self.text.bind("<Shift-MouseWheel>", lambda e: self.text.xview_scroll(-1 * (e.delta // 120), "units"))
+        self.text.bind("<Shift-Button-4>", lambda e: self.text.xview_scroll(-1, "units"))
+        self.text.bind("<Shift-Button-5>", lambda e: self.text.xview_scroll(1, "units"))
+        for key, lines in (("<Up>", -1), ("<Down>", 1)):
+            self.text.bind(key, lambda e, n=lines: self.scroll(n) or "break")
+        self.text.bind("<Prior>", lambda e: self.scroll(-self.rows) or "break")
+        self.text.bind("<Next>", lambda e: self.scroll(self.rows) or "break")
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0) or "break")
+        self.text.bind("<Control-End>", lambda e: self.scroll_to(self.index.line_count) or "break")
+
+    def on_resize(self, event):
+        rows = max(1, (event.height - 30) // self.linespace)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def yview(self, *args):
+        """垂直滚动条回调"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.index.line_count))
+        elif args[0] == "scroll":
+            step = self.rows if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def scroll(self, lines):
+        self.scroll_to(self.top + lines)
+
+    def scroll_to(self, line):
+        top = max(0, min(line, self.index.line_count - self.rows))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def see(self, line, col=0):
+        """滚动到指定位置，位置不在可见范围内时显示在上方三分之一处"""
+        if not self.top <= line < self.top + self.rows:
+            self.top = -1  # 强制重新渲染
+            self.scroll_to(line - self.rows // 3)
+        self.text.see(f"{line - self.top + 1}.{col}")
+
+    def set_highlight(self, tag, start=None, end=None):
+        """设置高亮范围（行, 列），start为None时取消高亮"""
+        if start is None:
+            self.highlights.pop(tag, None)
+        else:
+            self.highlights[tag] = (start, end)
+        self.render()
+
+    def render(self):
+        """用可见范围内的行重新填充文本框"""
+        lines = self.index.get_lines(self.top, self.rows + 1)
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+
+        bottom = self.top + len(lines)
+        for tag, (start, end) in self.highlights.items():
+            if end[0] < self.top or start[0] >= bottom:
+                continue
+            first = f"{start[0] - self.top + 1}.{start[1]}" if start[0] >= self.top else "1.0"
+            last = f"{end[0] - self.top + 1}.{end[1]}" if end[0] < bottom else tk.END
+            self.text.tag_add(tag, first, last)
+        self.text.config(state=tk.DISABLED)
+
+        total = max(1, self.index.line_count)
+        self.v_scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))